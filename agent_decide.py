@@ -3,12 +3,16 @@ from dataclasses import dataclass
 import math
 from typing import Any, Dict
 
-import httpx
-from openai import OpenAI
-
+import os
 import time
 import utils
-from utils.llm_lock import LLM_CALL_LOCK
+from utils.decision_cache import DecisionCache, decision_fingerprint
+from utils.guided_json import DECISION_SCHEMA, guided_kwargs, read_json_object, schema_max_tokens
+from utils.llm_client import client_for, timeout_for
+from utils.llm_metrics import LLM_METRICS
+from utils.llm_sched import LLM_SCHEDULER, PRIORITY_DECISION
+from utils.prompt_builder import build_decision_messages
+from utils.prompt_encoder import encode_informs
 
 agent_prompt = """You are an expert in Coin investing.
 
@@ -51,71 +55,107 @@ class Agent_openai:
         temperature: float = 0.1,
         timeout_connect: float = 5.0,
         timeout_read: float = 180.0,  # ✅ 로컬 LLM이면 120이 짧을 수 있어 180 권장
+        guided: str | None = None,    # ✅ "vllm" | "response_format" | None
+        decision_cache: DecisionCache | None = None,  # ✅ 시장 상태가 같으면 hold 재사용
     ):
-        self.client = OpenAI(
+        # ✅ 프로세스 공용 keep-alive 풀(utils.llm_client) + 호출 지점별 timeout
+        self.client = client_for(
+            "decision",
             base_url=base_url,
             api_key=api_key,
-            http_client=httpx.Client(
-                timeout=httpx.Timeout(
-                    connect=timeout_connect,
-                    read=timeout_read,
-                    write=30.0,
-                    pool=5.0,
-                )
-            ),
+            timeout=timeout_for("decision", connect=timeout_connect, read=timeout_read),
         )
         self.model = model
         self.agent_prompt = agent_prompt
         self.max_tokens = max_tokens
         self.temperature = temperature
+        self.guided = guided
+        self.decision_cache = decision_cache
 
     def decide(self, informs: dict) -> Dict:
+        # 시장 상태(양자화)가 이전과 같으면 LLM 호출 없이 이전 hold 재사용(buy/sell은 캐시 안 함)
+        cache_key = None
+        if self.decision_cache is not None:
+            cache_key = decision_fingerprint(informs)
+            cached = self.decision_cache.get(cache_key)
+            if cached is not None:
+                print("[DECISION CACHE] hit:", informs.get("coin_name", ""))
+                return cached
+
         system_content = (
             f"{self.agent_prompt}\n\n"
             f"{output_contract}\n\n"
             f"[JSON SCHEMA]\n{json.dumps(output_schema, ensure_ascii=False)}\n"
         )
 
-        user_content = (
-            f"[Recent coin_price]\n{informs.get('coin_price', '')}\n\n"
-            f"[Recent fear_greed_index]\n{informs.get('fear_greed_index', '')}\n\n"
-            f"[Recent news]\n{informs.get('news', '')}\n\n"
-            f"[Recent trading reflection]\n{informs.get('reflection', '')}\n\n"
-            f"[trading method transcript]\n{informs.get('youtube_transcript', '')}\n\n"
+        # 가격/뉴스는 헤더 1회 + 반올림 표로 압축
+        informs, report = encode_informs(informs)
+
+        # 고정(계약/트랜스크립트) → 사이클 공통(reflection/FNG/뉴스) → 코인별(가격) 순서: vLLM prefix cache 재사용
+        messages = build_decision_messages(
+            system_content,
+            transcript=informs.get("youtube_transcript", ""),
+            cycle={
+                "Recent trading reflection": informs.get("reflection", ""),
+                "Recent fear_greed_index": informs.get("fear_greed_index", ""),
+                "Recent news": informs.get("news", ""),
+            },
+            coin={
+                "Recent coin_price": informs.get("coin_price", ""),
+            },
         )
 
-        print("System content length:", len(system_content))
-        print("User content length:", len(user_content))
+        print("System content length:", len(messages[0]["content"]))
+        print("User content length:", len(messages[1]["content"]))
+        print("[PROMPT TOKENS]", report)
         print("All information has been prepared. Making decision...")
 
-        with LLM_CALL_LOCK:
-            resp = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": user_content},
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-            )
-
-        raw = (resp.choices[0].message.content or "").strip()
+        # ✅ 전체 시간 / usage 토큰 수 기록(LLM_METRICS, 슬롯 대기는 LLM_SCHEDULER)
+        #  - guided면 '}'에서 끊으려고 스트리밍(TTFT/디코드 속도도 같이), 아니면 기존처럼 한 번에
+        with LLM_METRICS.track("decision") as call, LLM_SCHEDULER.slot(PRIORITY_DECISION, "decision"):
+            call.acquired()
+            if self.guided:
+                # 스키마로 출력 제한 + '}' 닫히면 바로 끊기
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=schema_max_tokens(DECISION_SCHEMA),  # 스키마를 다 채워도 안 잘리게
+                    temperature=self.temperature,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    **guided_kwargs(DECISION_SCHEMA, self.guided),
+                )
+                raw = read_json_object(call.stream(stream)).strip()
+            else:
+                resp = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature,
+                )
+                call.done(resp)
+                raw = (resp.choices[0].message.content or "").strip()
         data = json.loads(raw)
 
-        return {
+        decision = {
             "decision": str(data["decision"]).strip().lower(),
             "percentage": int(data["percentage"]),
             "reason": str(data["reason"]),
         }
+        if cache_key is not None:
+            self.decision_cache.put(cache_key, decision)
+        return decision
 
 
 if __name__ == "__main__":
     t_start = time.perf_counter()
+    DECISION_CACHE_TTL = float(os.getenv("DECISION_CACHE_TTL_SECONDS", "3600"))  # 0이면 결정 캐시 끔
     # decision agent initialize
     agent = Agent_openai(
         base_url="http://127.0.0.1:9000/v1",
         api_key="not-used",
         model="unsloth/Mistral-Small-24B-Instruct-2501-bnb-4bit",
+        decision_cache=DecisionCache(ttl_seconds=DECISION_CACHE_TTL) if DECISION_CACHE_TTL > 0 else None,
     )
     print("Agent initialized.")
 
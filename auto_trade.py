@@ -1,19 +1,26 @@
-import os, time, json
+import os, time, json, threading
 from datetime import datetime, timedelta
 import pyupbit
 from dotenv import load_dotenv
-from utils.get_fear import get_fear_greed_index
-from utils.get_reflection import get_recent_trades, generate_reflection
+from utils.get_fear import fng_is_valid, fng_ttl_seconds, get_fear_greed_index
+from utils.get_reflection import REFLECTION_CACHE, get_recent_trades, generate_reflection
 from utils.get_vid import get_vid_script
 from utils.db_utils import DataBase
 from utils.rss import fetch_rss_news
+from utils import resample
+from utils.prompt_encoder import encode_news, encode_ohlcv, estimate_tokens
 from coin_cand import top_liquid_coins, make_liquidity_row
-from openai import OpenAI
+from utils.llm_client import client_for
+from utils.llm_metrics import LLM_METRICS
+from utils.scheduler import CandleScheduler, CoinFanOut
+from utils.ttl_cache import SOURCE_CACHE
+from utils.valuation import valuate
 
 load_dotenv()
 
 # ✅ profit 계산 안정화: dict 대신 "첫 총자산"만 저장
 equity_first = None
+KRW_LOCK = threading.Lock()
 
 ###################### prompts ######################
 system_prompt = """You are an expert in Bitcoin investing. Analyze the provided data including technical indicators, market data, recent news headlines, the Fear and Greed Index, YouTube video transcript, and the chart image. Tell me whether to buy, sell, or hold at the moment. Consider the following in your analysis:
@@ -46,33 +53,48 @@ output_schema = {
 }
 
 ############### main functions #####################################
+def krw_markets():
+    """KRW 마켓 목록(SOURCE_CACHE). 못 구하면 None(= 보유 코인 전부 평가)"""
+    if not SOURCE_CACHE.has_source("krw_markets"):
+        return None
+    try:
+        return SOURCE_CACHE.get("krw_markets")
+    except Exception as e:
+        print("[MARKET LIST FAIL] value all holdings:", repr(e))
+        return None
+
+
 def ai_trading(coin_name, model_input, reflection=None, youtube_transcript=None):
     global equity_first
 
     ##### call openai api #######################
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))  # for gpt
+    client = client_for("decision", base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+                        api_key=os.getenv("OPENAI_API_KEY"))  # for gpt
     # client = OpenAI(base_url="http://127.0.0.1:9000/v1")
     base_currency = coin_name.split("-")[1]
 
+    # ✅ prefix cache: 고정 프롬프트 → 트랜스크립트(프로세스 고정) → reflection(사이클마다 변경)
     system_content = (
         f"{system_prompt}\n\n"
-        f"[Recent trading reflection]\n{reflection}\n\n"
-        f"[Wonyyotti trading method transcript]\n{youtube_transcript}\n"
+        f"[Wonyyotti trading method transcript]\n{youtube_transcript}\n\n"
+        f"[Recent trading reflection]\n{reflection}\n"
     )
 
-    response = client.chat.completions.create(
-        model="gpt-4.1",
-        # model="stelterlab/Mistral-Small-24B-Instruct-2501-AWQ",
-        messages=[
-            {"role": "system", "content": system_content},
-            {"role": "user", "content": json.dumps(model_input, ensure_ascii=False)}
-        ],
-        response_format={
-            "type": "json_schema",
-            "json_schema": {"name": "trading_decision", "strict": True, "schema": output_schema}
-        },
-        max_tokens=4095
-    )
+    with LLM_METRICS.track("decision") as call:
+        response = client.chat.completions.create(
+            model="gpt-4.1",
+            # model="stelterlab/Mistral-Small-24B-Instruct-2501-AWQ",
+            messages=[
+                {"role": "system", "content": system_content},
+                {"role": "user", "content": json.dumps(model_input, ensure_ascii=False)}
+            ],
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "trading_decision", "strict": True, "schema": output_schema}
+            },
+            max_tokens=4095
+        )
+        call.done(response)
 
     result = json.loads(response.choices[0].message.content)
 
@@ -91,15 +113,17 @@ def ai_trading(coin_name, model_input, reflection=None, youtube_transcript=None)
     order_executed = False
 
     if result["decision"] == "buy":
-        my_krw = float(upbit.get_balance("KRW") or 0.0)
-        spend = my_krw * (percent / 100) * 0.9995
-
-        if spend > 5000:
-            print("### Buy Order Executed ###")
-            print(upbit.buy_market_order(coin_name, spend))
-            order_executed = True
-        else:
-            print("### Buy Order Failed: Insufficient KRW (less than 5000 KRW) ###")
+        # ✅ 코인별 실행이 동시에 돌아서 KRW 조회~매수 주문은 잠금
+        with KRW_LOCK:
+            my_krw = float(upbit.get_balance("KRW") or 0.0)
+            spend = my_krw * (percent / 100) * 0.9995
+
+            if spend > 5000:
+                print("### Buy Order Executed ###")
+                print(upbit.buy_market_order(coin_name, spend))
+                order_executed = True
+            else:
+                print("### Buy Order Failed: Insufficient KRW (less than 5000 KRW) ###")
 
     elif result["decision"] == "sell":
         my_coin = float(upbit.get_balance(base_currency) or 0.0)
@@ -127,49 +151,15 @@ def ai_trading(coin_name, model_input, reflection=None, youtube_transcript=None)
     if base_row:
         coin_balance = float(base_row.get("balance") or 0.0) + float(base_row.get("locked") or 0.0)
 
-    # ✅ KRW 잔고(가용+locked) - 로그/총자산용
-    krw_row = next((b for b in balances if b.get("currency") == "KRW"), None)
-    if krw_row:
-        krw_balance = float(krw_row.get("balance") or 0.0) + float(krw_row.get("locked") or 0.0)
-    else:
+    # ✅ 전체 포트폴리오 총자산(KRW 환산): KRW 마켓 보유 코인 시세 일괄 1번 + 짧은 TTL 캐시, 빠진 티커만 개별 현재가
+    valuation = valuate(balances, krw_markets())
+    print("[EQUITY]", valuation.summary())
+    krw_balance = valuation.krw_balance
+    total_equity = valuation.total_equity
+    if not any(b.get("currency") == "KRW" for b in balances):
+        # KRW 행이 없으면 평가에는 KRW 0으로 들어감 → 따로 조회해서 더함
         krw_balance = float(upbit.get_balance("KRW") or 0.0)
-
-    # ✅ 가격 조회 최적화: 한 번에 current_price들 가져오기 (실패 시 개별 orderbook fallback)
-    tickers = []
-    qty_by_ticker = {}
-    for b in balances:
-        cur = b.get("currency")
-        if not cur or cur == "KRW":
-            continue
-
-        qty = float(b.get("balance") or 0.0) + float(b.get("locked") or 0.0)
-        if qty <= 0:
-            continue
-
-        ticker = f"KRW-{cur}"
-        tickers.append(ticker)
-        qty_by_ticker[ticker] = qty
-
-    prices = {}
-    if tickers:
-        try:
-            prices = pyupbit.get_current_price(tickers) or {}
-        except Exception:
-            prices = {}
-
-    # ✅ 전체 포트폴리오 총자산(KRW 환산)
-    total_equity = krw_balance
-    for ticker, qty in qty_by_ticker.items():
-        price = prices.get(ticker)
-
-        # fallback: get_current_price가 누락/실패한 경우 개별 orderbook로 재시도
-        if price is None:
-            try:
-                price = pyupbit.get_orderbook(ticker=ticker)["orderbook_units"][0]["ask_price"]
-            except Exception:
-                continue  # 가격 못 가져오면 스킵
-
-        total_equity += qty * float(price)
+        total_equity += krw_balance
 
     # ✅ 해당 트레이딩 코인의 평균 매입가(그대로 유지)
     coin_avg_buy_price = next(
@@ -201,37 +191,64 @@ def ai_trading(coin_name, model_input, reflection=None, youtube_transcript=None)
         "profit": profit,                  # ✅ 세션 시작 대비 총자산 변화
     }
 
-def build_model_input(coin, df, fng, news_items):
+def build_model_input(coin, df, fng, news_items, ohlcv_rows=None):
     if isinstance(fng, list):
         fng = fng[0] if fng else {}
+    # 키 순서 = 프롬프트 순서: 사이클 공통(FNG/뉴스) 먼저, 코인별(ticker/ohlcv)은 마지막
     return {
-        "ticker": coin,
-        "ohlcv_4days": json.loads(df.to_json()),
         "fear_greed_index": {
             "value": fng.get("value"),
             "classification": fng.get("value_classification"),
             "timestamp": fng.get("timestamp"),
             "note": "Fear & Greed Index is a broad crypto market sentiment proxy; use as a secondary signal."
         },
-        "news": news_items or [],
-        "data_attribution": {"fear_greed_source": fng.get("source")}
+        "news": encode_news(news_items or [], max_items=len(news_items or [])),
+        "data_attribution": {"fear_greed_source": fng.get("source")},
+        "ticker": coin,
+        # ✅ df.to_json()(epoch-ms 키 + 전체 자릿수) 대신 요약 1줄 + 헤더 1회 반올림 표
+        "ohlcv_4days": encode_ohlcv(df, rows=ohlcv_rows),
     }
 
 if __name__ == "__main__":
     video_id = "-UJHObtnp5A"
-    youtube_transcript = get_vid_script(video_id)
 
     SCAN_EVERY = timedelta(hours=25)
-    next_scan_at = datetime.now()
 
     # ✅ 뉴스 갱신 주기 추가
     NEWS_EVERY = timedelta(hours=12)
-    next_news_at = datetime.now()
-    cached_news = []
 
     database = DataBase()
     coin_candidates = ['KRW-BTC']
 
+    def scan_candidates():
+        print(f"{datetime.now()}: Starting liquidity scan...")
+        top_k = top_liquid_coins(score_days=10, verbose=True, workers=int(os.getenv("LIQ_SCAN_WORKERS", "8")))
+        row_fn = make_liquidity_row()
+        database.log_liquidity_scan(top_k, row_fn)
+        return [t for t, _ in top_k]
+
+    # ✅ 외부 소스는 SOURCE_CACHE(소스별 TTL, 실패 시 이전 값 유지)로
+    #  - 후보/뉴스는 스케줄러 job이 주기마다 갱신, TTL(2배)은 job이 밀렸을 때 대비
+    SOURCE_CACHE.register("liquidity_candidates", scan_candidates, ttl=2 * SCAN_EVERY.total_seconds(), is_valid=bool)
+    SOURCE_CACHE.register(
+        "news",
+        lambda: fetch_rss_news(feed_url="https://cryptopotato.com/feed/", limit=10, summary_len=200, content_len=300),
+        ttl=2 * NEWS_EVERY.total_seconds(),
+    )
+    # FNG는 응답의 time_until_update까지 캐시
+    SOURCE_CACHE.register("fng", lambda: get_fear_greed_index(limit=1, date_format="kr"), ttl=3600,
+                          ttl_from=fng_ttl_seconds, is_valid=fng_is_valid)
+    # 총자산 평가 대상(상장폐지/비KRW 보유분은 시세 조회 안 함)
+    SOURCE_CACHE.register("krw_markets", lambda: set(pyupbit.get_tickers(fiat="KRW")), ttl=3600, is_valid=bool)
+    SOURCE_CACHE.register("transcript", lambda: get_vid_script(None, None, video_id), ttl=24 * 3600,
+                          is_valid=bool)  # 갱신은 get_vid 디스크 캐시(YOUTUBE_CACHE_REFRESH_SECONDS)가 담당
+
+    try:
+        youtube_transcript = SOURCE_CACHE.get("transcript")
+    except Exception as e:
+        print(f"{datetime.now()}: Transcript fetch failed: {e}")
+        youtube_transcript = ""
+
     # ✅ 시작 시: DB에서 최신 cand 먼저 로드 + 예외처리
     try:
         latest = database.get_liq_cand(limit=20)
@@ -239,45 +256,44 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"{datetime.now()}: Failed to load candidates from DB: {e}. Use default candidates.")
 
-    # ✅ 시작하자마자 스캔 방지
-    next_scan_at = datetime.now() + SCAN_EVERY
-
-    while True:
-        now = datetime.now()
-
-        # ✅ 유동성 스캔(주기 도래 시에만)
-        if now >= next_scan_at:
-            print(f"{now}: Starting liquidity scan...")
-            top_k = top_liquid_coins(score_days=10, verbose=True)
-            row_fn = make_liquidity_row()
-            database.log_liquidity_scan(top_k, row_fn)
-            coin_candidates = [t for t, _ in top_k] or coin_candidates
-            next_scan_at = now + SCAN_EVERY
-
-        # ✅ 뉴스 갱신 (캐시)
-        if now >= next_news_at:
-            try:
-                cached_news = fetch_rss_news(
-                    feed_url="https://cryptopotato.com/feed/",
-                    limit=10,
-                    summary_len=200,
-                    content_len=300
-                )
-                print(f"{now}: RSS news updated. items={len(cached_news)}")
-            except Exception as e:
-                print(f"{now}: RSS news fetch failed: {e}")
-            next_news_at = now + NEWS_EVERY
-
-        fear_greed_index = get_fear_greed_index(limit=1, date_format="kr")
+    # ✅ 시작하자마자 스캔 방지(DB 후보로 캐시를 채워 둠)
+    SOURCE_CACHE.put("liquidity_candidates", coin_candidates)
+
+    def trade_cycle():
+        global coin_candidates, youtube_transcript
+
+        # ✅ 유동성 스캔 / 뉴스: 별도 주기 job이 갱신, 여기선 캐시 값 사용
+        coin_candidates = SOURCE_CACHE.get("liquidity_candidates") or coin_candidates
+
+        try:
+            cached_news = SOURCE_CACHE.get("news")
+        except Exception as e:
+            print(f"{datetime.now()}: RSS news fetch failed: {e}")
+            cached_news = []
+
+        try:
+            fear_greed_index = SOURCE_CACHE.get("fng")
+        except Exception as e:
+            fear_greed_index = {"value": None, "error": repr(e)}
+
+        try:
+            youtube_transcript = SOURCE_CACHE.get("transcript")
+        except Exception as e:
+            print(f"{datetime.now()}: Transcript fetch failed: {e}")
         recent_trades = get_recent_trades()
         reflection = generate_reflection(recent_trades, {"fear_greed_index": fear_greed_index})
+        print("[REFLECTION CACHE]", {**REFLECTION_CACHE.stats(), "cycle": REFLECTION_CACHE.snapshot_delta()})
+        print("[SOURCE CACHE]", SOURCE_CACHE.stats())
 
-        for coin in coin_candidates:
-            df = pyupbit.get_ohlcv(coin, count=200, interval="minute30")
+        # ✅ 코인별로 나눠 실행: 코인마다 COIN_DEADLINE초까지만 기다리고, 안 끝난 코인은 다음 회차에서 skip
+        def trade_coin(coin):
+            df = resample.get_ohlcv(coin, count=200, interval="minute30")
             if df is None or df.empty:
-                continue
+                return
 
             model_input = build_model_input(coin, df, fear_greed_index, cached_news)
+            print(f"[PROMPT TOKENS] {coin}: raw ohlcv={estimate_tokens(df.to_json())} "
+                  f"encoded={estimate_tokens(model_input['ohlcv_4days'])}")
             trade = ai_trading(coin, model_input, reflection, youtube_transcript)
 
             database.log_trade(
@@ -293,4 +309,22 @@ if __name__ == "__main__":
                 trade["profit"]
             )
 
-        time.sleep(1 * 60 * 180)  # 3hours pause before next iteration (원 코드 유지)
\ No newline at end of file
+        for coin in coin_candidates:
+            coin_jobs.submit(coin, trade_coin, coin)
+        coin_jobs.wait(COIN_DEADLINE)
+
+        print("[SCHEDULER]", scheduler.stats(), coin_jobs.stats())
+
+    COIN_DEADLINE = float(os.getenv("COIN_DEADLINE_SECONDS", "300")) or None
+    coin_jobs = CoinFanOut("trade", max_workers=int(os.getenv("TRADE_COIN_WORKERS", "4")))
+
+    # ✅ 고정 3시간 sleep 대신 캔들 마감(기본 4시간봉) + offset에 매매, 스캔/뉴스는 별도 주기 job
+    scheduler = CandleScheduler(max_workers=3)
+    scheduler.add_candle_job("trade", trade_cycle, interval=os.getenv("TRADE_INTERVAL", "minute240"),
+                             offset=float(os.getenv("TRADE_CLOSE_OFFSET_SECONDS", "10")),
+                             jitter=float(os.getenv("TRADE_JITTER_SECONDS", "5")), run_at_start=True)
+    scheduler.add_periodic_job("liquidity_scan", lambda: SOURCE_CACHE.get("liquidity_candidates", force=True),
+                               every=SCAN_EVERY.total_seconds(), run_at_start=False)
+    scheduler.add_periodic_job("news", lambda: SOURCE_CACHE.get("news", force=True),
+                               every=NEWS_EVERY.total_seconds(), overlap="coalesce", run_at_start=False)
+    scheduler.run_forever()
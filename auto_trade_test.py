@@ -13,21 +13,40 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 import os
+import asyncio
 import json
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 from typing import Dict
 
-import httpx
 import pyupbit
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # ✅ 사용자 프로젝트 모듈(참고 코드 구조 유지)
 import utils
-from utils.llm_lock import LLM_CALL_LOCK
+from utils.llm_client import aclose as llm_aclose, async_client_for, client_for, timeout_for
+from utils.llm_metrics import LLM_METRICS
+from utils.llm_sched import LLM_SCHEDULER, PRIORITY_DECISION
 from utils.db_utils import DataBase
+from utils.decision_cache import DecisionCache, decision_fingerprint
+from utils.guided_json import DECISION_SCHEMA, aread_json_object, guided_kwargs, read_json_object, schema_max_tokens
+from utils.prompt_builder import build_decision_messages, prefix_report
+from utils.prompt_encoder import encode_informs
+from utils.ohlcv_cache import OHLCV_CACHE
+from utils.get_fear import fng_is_valid, fng_ttl_seconds
+from utils.aio_http import aclose as aio_close
+from utils.get_fear import aget_fear_greed_index
+from utils.rss import afetch_rss_news
+from utils.scheduler import CandleScheduler, CoinFanOut, candle_loop, periodic_loop
+from utils.shard import QueuedDataBase, SharedHandles, run_supervisor
+from utils.snapshot import abuild_snapshot, build_snapshot
+from utils.upbit_async import AsyncUpbit, aget_orderbook, aget_tickers
+from utils.valuation import QUOTE_CACHE, Valuation, avaluate, valuate
+from utils.ttl_cache import SOURCE_CACHE
 
 # (선택) 참고 코드에서 쓰던 유동성 스캔 모듈이 있다면 그대로 사용
 # 없으면 아래 try/except로 KRW-BTC 단일 운용도 가능하게 처리했습니다.
@@ -87,7 +106,7 @@ output_contract = """[OUTPUT CONTRACT]
 
 class Agent_openai:
     """
-    ✅ 사용자가 주신 첫 번째 코드 스타일(HTTPX timeout 커스텀 + OpenAI(base_url))
+    ✅ 사용자가 주신 첫 번째 코드 스타일(timeout 커스텀 + OpenAI(base_url))
     ✅ 최대한 보존
     """
 
@@ -101,58 +120,90 @@ class Agent_openai:
         temperature: float = 0.1,
         timeout_connect: float = 5.0,
         timeout_read: float = 180.0,
+        prompt_budget_tokens: int | None = None,
+        decision_cache: DecisionCache | None = None,
+        guided: str | None = None,
     ):
-        self.client = OpenAI(
-            base_url=base_url,
-            api_key=api_key,
-            # ✅ httpx timeout 커스텀(첫 번째 코드 그대로)
-            http_client=httpx.Client(
-                timeout=httpx.Timeout(
-                    connect=timeout_connect,
-                    read=timeout_read,
-                    write=30.0,
-                    pool=5.0,
-                )
-            ),
-        )
+        # ✅ 프로세스 공용 keep-alive 풀(utils.llm_client) + 호출 지점별 timeout
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout_for("decision", connect=timeout_connect, read=timeout_read)
+        self.client = client_for("decision", base_url=base_url, api_key=api_key, timeout=self.timeout)
         self.model = model
         self.agent_prompt = agent_prompt
         self.max_tokens = max_tokens
         self.temperature = temperature
+        self.prompt_budget_tokens = prompt_budget_tokens
+        self.decision_cache = decision_cache
+        # ✅ "vllm"(extra_body guided_json) / "response_format"(json_schema) / None(프롬프트 계약만)
+        self.guided = guided
+
+    def build_messages(self, informs: dict) -> list[dict]:
+        return self._build(informs)[0]
+
+    def _build(self, informs: dict) -> tuple[list[dict], dict]:
+        """(messages, encode_informs 토큰 리포트). 인코딩은 1번만"""
+        # ✅ 가격/뉴스는 헤더 1회 + 반올림 표로 압축(토큰 예산 넘으면 행 수 축소)
+        informs, report = encode_informs(informs, self.prompt_budget_tokens)
 
-    def decide(self, informs: dict) -> TradingDecision:
         system_content = (
             f"{self.agent_prompt}\n\n"
             f"{output_contract}\n\n"
             f"[JSON SCHEMA]\n{json.dumps(output_schema, ensure_ascii=False)}\n"
         )
 
-        # ✅ 원본 코드의 user_content 구성 방식 보존
-        user_content = (
-            f"[Recent coin_price]\n{informs.get('coin_price', '')}\n\n"
-            f"[Recent fear_greed_index]\n{informs.get('fear_greed_index', '')}\n\n"
-            f"[Recent news]\n{informs.get('news', '')}\n\n"
-            f"[Recent trading reflection]\n{informs.get('reflection', '')}\n\n"
-            f"[trading method transcript]\n{informs.get('youtube_transcript', '')}\n\n"
+        # ✅ prefix cache: 고정(계약/트랜스크립트) → 사이클 공통(reflection/FNG/뉴스) → 코인별(가격)
+        messages = build_decision_messages(
+            system_content,
+            transcript=informs.get("youtube_transcript", ""),
+            cycle={
+                "Recent trading reflection": informs.get("reflection", ""),
+                "Recent fear_greed_index": informs.get("fear_greed_index", ""),
+                "Recent news": informs.get("news", ""),
+            },
+            coin={
+                "Recent coin_price": informs.get("coin_price", ""),
+            },
         )
-
-        print("System content length:", len(system_content))
-        print("User content length:", len(user_content))
+        return messages, report
+
+    def _cached(self, informs: dict) -> tuple[str | None, TradingDecision | None]:
+        # ✅ 시장 상태(양자화)가 이전과 같으면 LLM 호출 없이 이전 결정 재사용(hold만 캐시됨, utils.decision_cache)
+        if self.decision_cache is None:
+            return None, None
+        cache_key = decision_fingerprint(informs)
+        cached = self.decision_cache.get(cache_key)
+        if cached is not None:
+            print("[DECISION CACHE] hit:", informs.get("coin_name", ""))
+            return cache_key, TradingDecision(**cached)
+        return cache_key, None
+
+    def _prepare(self, built: tuple[list[dict], dict]) -> list[dict]:
+        """_build() 결과 출력 후 messages 반환"""
+        messages, report = built
+
+        print("System content length:", len(messages[0]["content"]))
+        print("User content length:", len(messages[1]["content"]))
+        print("[PROMPT TOKENS]", report)
         print("All information has been prepared. Making decision...")
+        return messages
+
+    def _create_kwargs(self, messages: list[dict]) -> dict:
+        kwargs = dict(
+            model=self.model,
+            messages=messages,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        if self.guided:
+            # ✅ 스키마로 출력 제한 + max_tokens는 스키마 최대 길이(다 채워도 안 잘리게) + '}' 닫히면 바로 끊기
+            kwargs["max_tokens"] = schema_max_tokens(DECISION_SCHEMA)
+            kwargs.update(guided_kwargs(DECISION_SCHEMA, self.guided))
+        return kwargs
 
-        with LLM_CALL_LOCK:
-            resp = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": user_content},
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-            )
-
-        raw = (resp.choices[0].message.content or "").strip()
-
+    def _finish(self, raw: str, cache_key: str | None) -> TradingDecision:
         # ✅ 참고 코드처럼 JSON 파싱 방어 로직만 추가(계약 위반 대비)
         try:
             data = json.loads(raw)
@@ -164,12 +215,124 @@ class Agent_openai:
             else:
                 raise
 
-        return TradingDecision(
+        decision = TradingDecision(
             decision=str(data["decision"]).strip().lower(),
             percentage=int(data["percentage"]),
             reason=str(data["reason"]),
         )
 
+        if cache_key is not None:
+            self.decision_cache.put(cache_key, asdict(decision))
+
+        return decision
+
+    def decide(self, informs: dict) -> TradingDecision:
+        cache_key, cached = self._cached(informs)
+        if cached is not None:
+            return cached
+        return self._decide(self._prepare(self._build(informs)), cache_key)
+
+    def _decide(self, messages: list[dict], cache_key: str | None) -> TradingDecision:
+        # ✅ 첫 토큰(TTFT) / 디코드 속도 / usage 토큰 수 기록(LLM_METRICS, 슬롯 대기는 LLM_SCHEDULER)
+        #  - 스트리밍은 guided '}' 조기 종료 + timeout/취소 시 스트림을 닫아 서버 디코딩을 멈추는 용도
+        with LLM_METRICS.track("decision") as call, LLM_SCHEDULER.slot(PRIORITY_DECISION, "decision"):
+            call.acquired()
+            stream = self.client.chat.completions.create(**self._create_kwargs(messages))
+            if self.guided:
+                raw = read_json_object(call.stream(stream)).strip()
+            else:
+                raw = call.read_text(stream).strip()
+
+        return self._finish(raw, cache_key)
+
+    async def adecide(self, informs: dict) -> TradingDecision:
+        """decide()의 asyncio 버전(같은 캐시/스케줄러 슬롯/지표). 취소되면 스트림을 닫아 서버 디코딩도 중단"""
+        cache_key, cached = self._cached(informs)
+        if cached is not None:
+            return cached
+        return await self._adecide(self._prepare(self._build(informs)), cache_key)
+
+    async def _adecide(self, messages: list[dict], cache_key: str | None) -> TradingDecision:
+        # AsyncOpenAI는 이벤트 루프별 클라이언트라 호출 시점에 가져옴
+        client = async_client_for("decision", base_url=self.base_url, api_key=self.api_key, timeout=self.timeout)
+
+        with LLM_METRICS.track("decision") as call:
+            async with LLM_SCHEDULER.aslot(PRIORITY_DECISION, "decision"):
+                call.acquired()
+                stream = await client.chat.completions.create(**self._create_kwargs(messages))
+                if self.guided:
+                    raw = (await aread_json_object(call.astream(stream))).strip()
+                else:
+                    raw = (await call.aread_text(stream)).strip()
+
+        return self._finish(raw, cache_key)
+
+    def decide_batch(self, informs_by_coin: Dict[str, dict], max_in_flight: int = 8):
+        """
+        코인별 결정을 동시에 제출하고, 끝나는 순서대로 (coin, TradingDecision | Exception) yield.
+        - 결정 캐시 적중 코인은 LLM/인코딩 없이 먼저 yield, 나머지는 코인당 인코딩 1번(_batch_prepare)
+        - vLLM continuous batching으로 여러 프롬프트가 함께 디코딩되므로 사이클 시간이 코인 수에 선형으로 늘지 않음
+        - 실제 서버 동시 요청 수는 LLM_SCHEDULER가 한 번 더 제한
+        """
+        ready, pending = self._batch_prepare(informs_by_coin)
+        yield from ready
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(pending)))) as pool:
+            futures = {pool.submit(self._decide, self._prepare(built), cache_key): coin
+                       for coin, (cache_key, built) in pending.items()}
+            for fut in as_completed(futures):
+                coin = futures[fut]
+                try:
+                    yield coin, fut.result()
+                except Exception as e:
+                    yield coin, e
+
+    async def adecide_batch(self, informs_by_coin: Dict[str, dict], max_in_flight: int = 8,
+                            timeout: float | None = None):
+        """
+        decide_batch의 asyncio 버전: async for coin, result in agent.adecide_batch(...)
+        - timeout(초) 넘긴 코인은 취소하고 TimeoutError를 결과로
+        """
+        ready, pending = self._batch_prepare(informs_by_coin)
+        for item in ready:
+            yield item
+        if not pending:
+            return
+
+        sem = asyncio.Semaphore(max(1, max_in_flight))
+
+        async def one(coin, cache_key, built):
+            async with sem:
+                try:
+                    return coin, await asyncio.wait_for(self._adecide(self._prepare(built), cache_key), timeout)
+                except Exception as e:
+                    return coin, e
+
+        for fut in asyncio.as_completed([one(c, k, b) for c, (k, b) in pending.items()]):
+            yield await fut
+
+    def _batch_prepare(self, informs_by_coin: Dict[str, dict]) -> tuple[list, dict]:
+        """
+        배치 공통 준비(코인마다 인코딩 1번, decide 단계에서 그대로 재사용).
+        반환: ([(coin, 캐시 적중 결과 | 준비 중 예외)], {coin: (cache_key, (messages, report))})
+        """
+        ready, pending = [], {}
+        for coin, informs in informs_by_coin.items():
+            try:
+                cache_key, cached = self._cached(informs)
+                if cached is not None:
+                    ready.append((coin, cached))
+                    continue
+                pending[coin] = (cache_key, self._build(informs))
+            except Exception as e:
+                ready.append((coin, e))
+
+        if pending:
+            print("[PROMPT PREFIX]", prefix_report([built[0] for _, built in pending.values()]))
+        return ready, pending
+
 
 def clamp_percent(decision: str, pct: int) -> int:
     pct = int(pct)
@@ -187,39 +350,19 @@ def calc_total_equity_krw(upbit: pyupbit.Upbit, KRW_MARKETS: set[str]) -> tuple[
     """
     total_equity(KRW) = KRW 잔고 + (보유 코인들 * 현재가)
     반환: (krw_balance, total_equity, balances_raw)
+    - 보유 코인 시세는 일괄 1번 + 짧은 TTL 캐시(utils.valuation), 빠진 티커만 개별 호가
     """
-    balances = upbit.get_balances() or []
-
-    # KRW
-    krw_row = next((b for b in balances if b.get("currency") == "KRW"), None)
-    krw_balance = 0.0
-    if krw_row:
-        krw_balance = float(krw_row.get("balance") or 0.0) + float(krw_row.get("locked") or 0.0)
-
-    total_equity = float(krw_balance)
-
-    # coins
-    for b in balances:
-        cur = b.get("currency")
-        if not cur or cur == "KRW":
-            continue
+    return valuate_account(upbit, KRW_MARKETS).as_tuple()
 
-        qty = float(b.get("balance") or 0.0) + float(b.get("locked") or 0.0)
-        if qty <= 0:
-            continue
 
-        t = f"KRW-{cur}"
-        if t not in KRW_MARKETS:
-            continue
+def valuate_account(upbit: pyupbit.Upbit, KRW_MARKETS: set[str]) -> Valuation:
+    """calc_total_equity_krw + 시세 나이(quote_age_s)/평가 못한 티커"""
+    return valuate(upbit.get_balances() or [], KRW_MARKETS)
 
-        try:
-            p = safe_get_current_price(t)
-        except Exception:
-            continue
-
-        total_equity += qty * p
 
-    return krw_balance, total_equity, balances
+async def avaluate_account(upbit: AsyncUpbit, KRW_MARKETS: set[str]) -> Valuation:
+    """valuate_account의 asyncio 버전"""
+    return await avaluate(await upbit.get_balances() or [], KRW_MARKETS)
 
 
 def get_coin_balance(balances: list, base_currency: str) -> tuple[float, float]:
@@ -236,7 +379,11 @@ def get_coin_balance(balances: list, base_currency: str) -> tuple[float, float]:
     return coin_balance, avg_buy
 
 
-def main():
+def main(shared: SharedHandles | None = None):
+    """
+    shared가 없으면 단일 프로세스(TRADE_WORKERS>1이면 supervisor로 워커들을 띄움),
+    있으면 워커: 자기 샤드 코인만 매매하고 LLM 스케줄러/rate limiter/DB 쓰기는 공유
+    """
     # =========================================================
     # ✅ (1) 환경 로드 / 기본 설정
     # =========================================================
@@ -254,7 +401,19 @@ def main():
 
     # 실행 파라미터
     SCAN_EVERY = timedelta(hours=float(os.getenv("SCAN_EVERY_HOURS", "25")))
-    SLEEP_EVERY = int(os.getenv("SLEEP_EVERY_SECONDS", str(30 * 60)))  # 기본 30분
+    NEWS_TTL = float(os.getenv("NEWS_TTL_SECONDS", "600"))                 # 뉴스 재조회 주기
+    FNG_TTL = float(os.getenv("FNG_TTL_SECONDS", "3600"))                  # time_until_update 없을 때
+    YOUTUBE_TTL = float(os.getenv("YOUTUBE_TTL_SECONDS", str(24 * 3600)))  # 트랜스크립트 갱신 주기
+    TRADE_INTERVAL = os.getenv("TRADE_INTERVAL", "minute30")                  # 이 캔들 마감마다 매매
+    TRADE_CLOSE_OFFSET = float(os.getenv("TRADE_CLOSE_OFFSET_SECONDS", "10"))  # 마감 후 캔들 확정 대기
+    TRADE_JITTER = float(os.getenv("TRADE_JITTER_SECONDS", "5"))
+    DECIDE_MAX_IN_FLIGHT = int(os.getenv("DECIDE_MAX_IN_FLIGHT", "8"))  # 코인별 결정 동시 요청 수
+    DECISION_CACHE_TTL = float(os.getenv("DECISION_CACHE_TTL_SECONDS", "3600"))  # 0이면 결정 캐시 끔
+    LLM_METRICS_PATH = os.getenv("LLM_METRICS_PATH", "")  # 사이클마다 LLM 지표 덤프(.json/.prom)
+    TRADE_ASYNC = os.getenv("TRADE_ASYNC", "0") == "1"  # 1이면 asyncio 루프(한 스레드에서 I/O 동시 처리)
+    TRADE_WORKERS = int(os.getenv("TRADE_WORKERS", "1"))  # 2 이상이면 코인 후보를 워커 프로세스들로 샤딩
+    DECIDE_TIMEOUT = float(os.getenv("DECIDE_TIMEOUT_SECONDS", "0")) or None  # asyncio 모드 코인별 결정 timeout
+    COIN_DEADLINE = float(os.getenv("COIN_DEADLINE_SECONDS", "300")) or None  # 코인별 주문/로그 대기 상한
 
     # 운용 설정
     MIN_KRW_ORDER = float(os.getenv("MIN_KRW_ORDER", "5000"))  # 업비트 최소 주문
@@ -269,26 +428,76 @@ def main():
     # =========================================================
     # ✅ (2) 클라이언트/DB 초기화
     # =========================================================
-    upbit = pyupbit.Upbit(access, secret)
-    database = DataBase()
+    if shared is None and TRADE_WORKERS > 1:
+        run_supervisor(main, TRADE_WORKERS)
+        return
 
-    # KRW 마켓 캐시
-    KRW_MARKETS = set(pyupbit.get_tickers(fiat="KRW"))
+    upbit = pyupbit.Upbit(access, secret)
+    aupbit = AsyncUpbit(access, secret)
+    if shared is None:
+        database = DataBase()
+    else:
+        # 워커: 공유 스케줄러/limiter 연결, DB 쓰기는 writer 프로세스로
+        shared.attach()
+        database = QueuedDataBase(shared.db_queue)
+        print(f"[WORKER {shared.index}/{shared.workers}] pid={os.getpid()}")
+
+    # 유동성 스캔은 한 프로세스(단일 실행 또는 0번 워커)만, 다른 워커는 공유 결과를 읽음
+    RUNS_LIQ_SCAN = HAS_LIQ_SCAN and (shared is None or shared.index == 0)
 
     # 수익 기준점
     equity_first = None
-
-    # 유동성 스캔 스케줄
-    next_scan_at = datetime.min
+    equity_lock = threading.Lock()
 
     # =========================================================
-    # ✅ (3) 유튜브 트랜스크립트 1회 캐시 (가능할 때만)
+    # ✅ (3) 외부 소스 캐시(소스별 TTL + 만료 직전 백그라운드 갱신 + 갱신 실패 시 이전 값 유지)
     # =========================================================
+    def scan_candidates() -> list[str]:
+        top_k = top_liquid_coins(score_days=10, verbose=True, workers=int(os.getenv("LIQ_SCAN_WORKERS", "8")))
+        row_fn = make_liquidity_row()
+        database.log_liquidity_scan(top_k, row_fn)
+        candidates = [t for t, _ in top_k]
+        if shared is not None:
+            shared.state["candidates"] = candidates
+        return candidates
+
+    def my_coins() -> list[str]:
+        """이 프로세스가 매매할 코인(워커면 자기 샤드만)"""
+        return [c for c in coin_candidates if shared is None or shared.owns(c)]
+
+    # FNG는 응답의 time_until_update를 TTL로 사용
+    # afetch: asyncio 모드(SOURCE_CACHE.aget)에서 쓰는 비동기 소스
+    SOURCE_CACHE.register("fng", utils.get_fear_greed_index, ttl=FNG_TTL, afetch=aget_fear_greed_index,
+                          ttl_from=fng_ttl_seconds, is_valid=fng_is_valid, refresh_ahead=0.1)
+    # 뉴스/유동성 후보는 스케줄러 job이 주기마다 갱신, 캐시 TTL(2배)은 job이 밀렸을 때 대비
+    SOURCE_CACHE.register("news", lambda: utils.fetch_rss_news(feed_url=RSS_URL), ttl=2 * NEWS_TTL,
+                          afetch=lambda: afetch_rss_news(feed_url=RSS_URL))
+
+    async def akrw_markets():
+        return set(await aget_tickers(fiat="KRW"))
+
+    SOURCE_CACHE.register("krw_markets", lambda: set(pyupbit.get_tickers(fiat="KRW")), ttl=3600, is_valid=bool,
+                          afetch=akrw_markets)
+    if RUNS_LIQ_SCAN:
+        # 실패하면 이전 후보 유지 후 30분 뒤 재시도
+        SOURCE_CACHE.register("liquidity_candidates", scan_candidates, ttl=2 * SCAN_EVERY.total_seconds(),
+                              retry_after=30 * 60, is_valid=bool)
+    elif HAS_LIQ_SCAN:
+        # 0번 워커가 스캔한 후보(아직 없으면 이전 후보 유지)
+        SOURCE_CACHE.register("liquidity_candidates", lambda: shared.state.get("candidates"), ttl=60,
+                              retry_after=60, is_valid=bool)
+    if HAS_YOUTUBE:
+        SOURCE_CACHE.register("transcript", lambda: get_vid_script(BASE_URL, API_KEY, video_id),
+                              ttl=YOUTUBE_TTL, is_valid=bool)  # get_vid 디스크 캐시라 refresh_ahead 안 씀
+
+    # KRW 마켓 캐시
+    KRW_MARKETS = SOURCE_CACHE.get("krw_markets")
+
+    # 유튜브 트랜스크립트(가능할 때만, 이후엔 캐시 히트)
     youtube_transcript = ""
     if HAS_YOUTUBE:
         try:
-            youtube_transcript = get_vid_script(BASE_URL, API_KEY, video_id) or ""
-            youtube_transcript = youtube_transcript[:4000]
+            youtube_transcript = SOURCE_CACHE.get("transcript")
         except Exception as e:
             print("[YOUTUBE FAIL] -> continue without transcript:", repr(e))
             youtube_transcript = ""
@@ -304,43 +513,23 @@ def main():
         temperature=0.1,
         timeout_connect=float(os.getenv("LOCAL_OPENAI_TIMEOUT_CONNECT", "5")),
         timeout_read=float(os.getenv("LOCAL_OPENAI_TIMEOUT_READ", "180")),
+        prompt_budget_tokens=int(os.getenv("PROMPT_TOKEN_BUDGET", "0")) or None,
+        decision_cache=(
+            DecisionCache(ttl_seconds=DECISION_CACHE_TTL) if DECISION_CACHE_TTL > 0 else None
+        ),
+        guided=os.getenv("DECISION_GUIDED_JSON") or None,  # vllm | response_format
     )
     print("Agent initialized.")
 
     # =========================================================
-    # ✅ (5) 메인 루프
+    # ✅ (5) 매매 사이클(캔들 마감 직후 스케줄러가 실행)
+    #  - 동기(trade_cycle)/asyncio(atrade_cycle) 둘 다 아래 공용 단계 사용
     # =========================================================
-    while True:
-        now = datetime.now()
-
-        # ---------------------------------------------------------
-        # (A) 유동성 후보코인 스캔(모듈 있을 때만)
-        # ---------------------------------------------------------
-        if now >= next_scan_at:
-            try:
-                KRW_MARKETS = set(pyupbit.get_tickers(fiat="KRW"))
-
-                if HAS_LIQ_SCAN:
-                    top_k = top_liquid_coins(score_days=10, verbose=True)
-                    row_fn = make_liquidity_row()
-                    database.log_liquidity_scan(top_k, row_fn)
-                    coin_candidates = [t for t, _ in top_k] or coin_candidates
-                else:
-                    # 모듈이 없으면 기존 후보 유지(기본 KRW-BTC)
-                    pass
-
-                next_scan_at = now + SCAN_EVERY
-            except Exception as e:
-                print("[LIQUIDITY SCAN FAIL] keep previous candidates:", repr(e))
-                next_scan_at = now + timedelta(minutes=30)
-
-        # ---------------------------------------------------------
-        # (B) 코인별 실행
-        # ---------------------------------------------------------
-        for coin_name in coin_candidates:
-            try:
-                base_currency = coin_name.split("-")[1]  # KRW-BTC -> BTC
-            except Exception:
+    def build_informs(snapshot) -> Dict[str, Dict]:
+        """(B) 코인별 informs 구성(스냅샷에서 읽기만, 배치 가격이 없을 때만 단건 조회)"""
+        informs_by_coin: Dict[str, Dict] = {}
+        for coin_name in my_coins():
+            if "-" not in coin_name:  # KRW-BTC 형식만
                 print("[SKIP] invalid ticker:", coin_name)
                 continue
 
@@ -350,31 +539,18 @@ def main():
             # -----------------------------------------------------
             informs: Dict = {}
 
-            # fear & greed
-            try:
-                fng = utils.get_fear_greed_index()
-                # 첫 코드에선 fng["value"]만 넣었으니 동일하게
-                informs["fear_greed_index"] = fng.get("value", "")
-            except Exception as e:
-                print("[FNG FAIL] -> empty:", repr(e))
-                informs["fear_greed_index"] = ""
+            # fear & greed (스냅샷, 첫 코드에선 fng["value"]만 넣었으니 동일하게)
+            informs["fear_greed_index"] = snapshot.fng.get("value", "")
 
-            # price (원본 코드에선 utils.get_price(coin_name="KRW-BTC"))
+            # price (스냅샷 배치 결과 우선, 없으면 단건 조회 → 스냅샷 현재가)
             try:
-                informs["coin_price"] = utils.get_price(coin_name=coin_name)
+                informs["coin_price"] = snapshot.prices.get(coin_name) or utils.get_price(coin_name=coin_name)
             except Exception as e:
-                print("[PRICE INFO FAIL] -> fallback to orderbook:", repr(e))
-                try:
-                    informs["coin_price"] = safe_get_current_price(coin_name)
-                except Exception:
-                    informs["coin_price"] = ""
+                print("[PRICE INFO FAIL] -> fallback to snapshot quote:", repr(e))
+                informs["coin_price"] = snapshot.quotes.get(coin_name, "")
 
-            # news
-            try:
-                informs["news"] = utils.fetch_rss_news(feed_url=RSS_URL)
-            except Exception as e:
-                print("[NEWS FAIL] -> empty:", repr(e))
-                informs["news"] = ""
+            # news (스냅샷)
+            informs["news"] = list(snapshot.news) or ""
 
             # reflection(없으면 빈 문자열)
             informs["reflection"] = informs.get("reflection", "")
@@ -382,55 +558,153 @@ def main():
             # youtube transcript(캐시)
             informs["youtube_transcript"] = youtube_transcript
 
-            # -----------------------------------------------------
-            # (B-2) Agent 결정
-            # -----------------------------------------------------
+            # 결정 캐시 키에 코인 구분용
+            informs["coin_name"] = coin_name
+
+            informs_by_coin[coin_name] = informs
+        return informs_by_coin
+
+    def to_decision(coin_name: str, result) -> tuple[TradingDecision, int]:
+        """(C-1) 결정 결과(실패 시 hold)"""
+        if isinstance(result, json.JSONDecodeError):
+            print("[AGENT JSON FAIL] -> hold:", repr(result))
+            decision = TradingDecision(decision="hold", percentage=0, reason="LLM JSON parse failed")
+        elif isinstance(result, Exception):
+            print("[AGENT FAIL] -> hold:", repr(result))
+            decision = TradingDecision(decision="hold", percentage=0, reason=str(result) or type(result).__name__)
+        else:
+            decision = result
+
+        percent = clamp_percent(decision.decision, decision.percentage)
+
+        print("### AI Decision:", decision.decision.upper(), "###")
+        print(f"### Percentage: {percent}% ###")
+        print(f"### Reason: {decision.reason} ###")
+        print("### coin:", coin_name, "###")
+        return decision, percent
+
+    def log_result(coin_name, decision, percent, order_executed, current_price, krw_balance, total_equity, balances):
+        """(C-4) 수익 계산 + (C-5) DB 로그 저장"""
+        nonlocal equity_first
+        coin_balance, avg_buy_price = get_coin_balance(balances, coin_name.split("-")[1])
+
+        equity_now = float(total_equity)
+        with equity_lock:  # 코인별 실행이 동시에 돌아서
+            if equity_first is None:
+                equity_first = equity_now
+
+        profit = equity_now - equity_first
+        print(f"{datetime.now()}_profit: {profit}")
+
+        database.log_trade(
+            decision.decision,
+            percent if order_executed else 0,
+            decision.reason,
+            coin_name,
+            coin_balance,
+            krw_balance,
+            avg_buy_price,
+            float(current_price),
+            equity_now,
+            float(profit),
+        )
+
+    def print_stats():
+        print("[OHLCV CACHE]", OHLCV_CACHE.stats())
+        print("[SOURCE CACHE]", SOURCE_CACHE.stats())
+        print("[QUOTE CACHE]", QUOTE_CACHE.stats())
+        print("[LLM SCHED]", LLM_SCHEDULER.stats())
+        if agent.decision_cache is not None:
+            print("[DECISION CACHE]", agent.decision_cache.stats())
+        print("[LLM METRICS]", {
+            site: {k: v.get("p50") for k, v in m.items() if isinstance(v, dict) and "p50" in v}
+            for site, m in LLM_METRICS.to_json().items()
+        })
+        if LLM_METRICS_PATH:  # .json 또는 .prom
+            LLM_METRICS.dump(LLM_METRICS_PATH)
+
+    # 코인별 주문/로그 실행기(코인별 deadline + 이전 실행이 남아 있으면 그 코인만 skip)
+    coin_jobs = CoinFanOut("trade", max_workers=DECIDE_MAX_IN_FLIGHT)
+    krw_lock = threading.Lock()  # KRW 잔고 조회~매수 주문은 코인끼리 겹치지 않게
+    akrw_lock = asyncio.Lock()    # asyncio 모드용(회차를 넘겨 도는 코인과도 겹치지 않게 사이클 밖에서 1개)
+    coin_tasks: Dict[str, asyncio.Task] = {}  # asyncio 모드에서 아직 도는 코인별 task
+
+    def trade_cycle():
+        nonlocal KRW_MARKETS, coin_candidates, youtube_transcript
+
+        # ---------------------------------------------------------
+        # (A) 유동성 후보코인(모듈 있을 때만) — 스캔 자체는 별도 주기 job
+        # ---------------------------------------------------------
+        if HAS_LIQ_SCAN:
+            try:
+                # 첫 스캔이 아직이면 여기서 끝날 때까지 대기(같은 키는 한 번만 조회)
+                coin_candidates = SOURCE_CACHE.get("liquidity_candidates") or coin_candidates
+            except Exception as e:
+                print("[LIQUIDITY SCAN FAIL] keep previous candidates:", repr(e))
+
+        if HAS_YOUTUBE:
             try:
-                decision = agent.decide(informs)
-            except json.JSONDecodeError as e:
-                print("[AGENT JSON FAIL] -> hold:", repr(e))
-                decision = TradingDecision(decision="hold", percentage=0, reason="LLM JSON parse failed")
+                youtube_transcript = SOURCE_CACHE.get("transcript")
             except Exception as e:
-                print("[AGENT FAIL] -> hold:", repr(e))
-                decision = TradingDecision(decision="hold", percentage=0, reason=str(e))
+                print("[YOUTUBE FAIL] keep previous transcript:", repr(e))
 
-            percent = clamp_percent(decision.decision, decision.percentage)
+        # ---------------------------------------------------------
+        # (B-0) 사이클 공용 스냅샷: FNG/뉴스/마켓 목록/잔고/후보 가격·지표/현재가를 1번만 조회
+        #  - 코인별 단계는 읽기만 하고 코인별 데이터(호가)만 따로 조회
+        # ---------------------------------------------------------
+        snapshot = build_snapshot(my_coins(), upbit=upbit)
+        print("[SNAPSHOT]", snapshot.summary())
+        if snapshot.krw_markets:
+            KRW_MARKETS = snapshot.krw_markets
+        else:
+            print("[MARKET LIST FAIL] keep previous")
 
-            print("### AI Decision:", decision.decision.upper(), "###")
-            print(f"### Percentage: {percent}% ###")
-            print(f"### Reason: {decision.reason} ###")
-            print("### coin:", coin_name, "###")
+        informs_by_coin = build_informs(snapshot)
+
+        # ---------------------------------------------------------
+        # (C) Agent 결정: 전 코인 동시 제출 → 끝나는 순서대로 코인별 주문/로그를 따로 실행
+        #  - 코인마다 COIN_DEADLINE초까지만 기다림(느린 코인이 다른 코인/다음 회차를 막지 않음)
+        # ---------------------------------------------------------
+        def execute(coin_name: str, result):
+            base_currency = coin_name.split("-")[1]
+            decision, percent = to_decision(coin_name, result)
 
             # -----------------------------------------------------
-            # (B-3) 현재가
+            # (C-2) 현재가(코인별 호가, 실패 시 스냅샷 현재가)
             # -----------------------------------------------------
             try:
                 current_price = safe_get_current_price(coin_name)
             except Exception as e:
-                print("[PRICE FAIL] skip coin:", repr(e))
-                continue
+                current_price = snapshot.quotes.get(coin_name)
+                if current_price is None:
+                    print("[PRICE FAIL] skip coin:", repr(e))
+                    return
+                print("[PRICE FAIL] -> snapshot quote:", repr(e))
 
             # -----------------------------------------------------
-            # (B-4) 주문/체결
+            # (C-3) 주문/체결
             # -----------------------------------------------------
             order_executed = False
             order_resp = None
 
             try:
                 if decision.decision == "buy":
-                    my_krw = float(upbit.get_balance("KRW") or 0.0)
-                    spend = my_krw * (percent / 100.0) * SLIPPAGE_FEE_FACTOR
-
-                    if spend >= MIN_KRW_ORDER:
-                        order_resp = upbit.buy_market_order(coin_name, spend)
-                        print(order_resp)
-                        if isinstance(order_resp, dict) and order_resp.get("uuid"):
-                            order_executed = True
-                    else:
-                        print(f"[SKIP BUY] spend too small: {spend:.2f} KRW (min {MIN_KRW_ORDER})")
+                    # KRW는 같은 사이클의 앞선 매수로 바뀌므로 스냅샷 말고 실시간 조회(코인끼리/워커끼리는 잠금)
+                    with krw_lock, shared.krw_guard() if shared is not None else nullcontext():
+                        my_krw = float(upbit.get_balance("KRW") or 0.0)
+                        spend = my_krw * (percent / 100.0) * SLIPPAGE_FEE_FACTOR
+
+                        if spend >= MIN_KRW_ORDER:
+                            order_resp = upbit.buy_market_order(coin_name, spend)
+                            print(order_resp)
+                            if isinstance(order_resp, dict) and order_resp.get("uuid"):
+                                order_executed = True
+                        else:
+                            print(f"[SKIP BUY] spend too small: {spend:.2f} KRW (min {MIN_KRW_ORDER})")
 
                 elif decision.decision == "sell":
-                    my_coin = float(upbit.get_balance(base_currency) or 0.0)
+                    # 코인 수량은 이 코인 주문만 바꾸므로 스냅샷 잔고 사용
+                    my_coin = snapshot.available(base_currency)
                     sell_qty = my_coin * (percent / 100.0)
 
                     if sell_qty * current_price >= MIN_KRW_ORDER:
@@ -452,39 +726,153 @@ def main():
             time.sleep(1)
 
             # -----------------------------------------------------
-            # (B-5) 잔고/총자산/수익 계산
+            # (C-4) 잔고/총자산/수익 계산 + (C-5) DB 로그 저장
             # -----------------------------------------------------
             try:
-                krw_balance, total_equity, balances = calc_total_equity_krw(upbit, KRW_MARKETS)
-                coin_balance, avg_buy_price = get_coin_balance(balances, base_currency)
-
-                equity_now = float(total_equity)
-                if equity_first is None:
-                    equity_first = equity_now
-
-                profit = equity_now - equity_first
-                print(f"{datetime.now()}_profit: {profit}")
-
-                # -------------------------------------------------
-                # (B-6) DB 로그 저장
-                # -------------------------------------------------
-                database.log_trade(
-                    decision.decision,
-                    percent if order_executed else 0,
-                    decision.reason,
-                    coin_name,
-                    coin_balance,
-                    krw_balance,
-                    avg_buy_price,
-                    float(current_price),
-                    equity_now,
-                    float(profit),
-                )
+                valuation = valuate_account(upbit, KRW_MARKETS)
+                print("[EQUITY]", valuation.summary())
+                log_result(coin_name, decision, percent, order_executed, current_price, *valuation.as_tuple())
+            except Exception as e:
+                print("[EQUITY/LOG FAIL]", repr(e))
+
+        for coin_name, result in agent.decide_batch(informs_by_coin, max_in_flight=DECIDE_MAX_IN_FLIGHT):
+            coin_jobs.submit(coin_name, execute, coin_name, result)
+        coin_jobs.wait(COIN_DEADLINE)
+
+        print_stats()
+        print("[SCHEDULER]", scheduler.stats(), coin_jobs.stats())
+
+    async def atrade_cycle():
+        """
+        trade_cycle의 asyncio 버전(TRADE_ASYNC=1). 같은 단계/같은 로그, I/O만 한 스레드에서 동시에.
+        - 코인별 주문/로그는 결정이 끝나는 순서대로 각자 진행(1초 체결 대기가 다른 코인을 막지 않음)
+        """
+        nonlocal KRW_MARKETS, coin_candidates, youtube_transcript
+
+        if HAS_LIQ_SCAN:
+            try:
+                coin_candidates = await SOURCE_CACHE.aget("liquidity_candidates") or coin_candidates
+            except Exception as e:
+                print("[LIQUIDITY SCAN FAIL] keep previous candidates:", repr(e))
 
+        if HAS_YOUTUBE:
+            try:
+                youtube_transcript = await SOURCE_CACHE.aget("transcript")
+            except Exception as e:
+                print("[YOUTUBE FAIL] keep previous transcript:", repr(e))
+
+        snapshot = await abuild_snapshot(my_coins(), upbit=aupbit)
+        print("[SNAPSHOT]", snapshot.summary())
+        if snapshot.krw_markets:
+            KRW_MARKETS = snapshot.krw_markets
+        else:
+            print("[MARKET LIST FAIL] keep previous")
+
+        # 단건 get_price 폴백이 있을 수 있어서 스레드에서
+        informs_by_coin = await asyncio.to_thread(build_informs, snapshot)
+
+        async def execute(coin_name: str, result):
+            base_currency = coin_name.split("-")[1]
+            decision, percent = to_decision(coin_name, result)
+
+            try:
+                current_price = float((await aget_orderbook(coin_name))["orderbook_units"][0]["ask_price"])
+            except Exception as e:
+                current_price = snapshot.quotes.get(coin_name)
+                if current_price is None:
+                    print("[PRICE FAIL] skip coin:", repr(e))
+                    return
+                print("[PRICE FAIL] -> snapshot quote:", repr(e))
+
+            order_executed = False
+            try:
+                if decision.decision == "buy":
+                    async with akrw_lock, shared.akrw_lock() if shared is not None else nullcontext():
+                        my_krw = await aupbit.get_balance("KRW")
+                        spend = my_krw * (percent / 100.0) * SLIPPAGE_FEE_FACTOR
+                        if spend >= MIN_KRW_ORDER:
+                            order_resp = await aupbit.buy_market_order(coin_name, spend)
+                            print(order_resp)
+                            order_executed = isinstance(order_resp, dict) and bool(order_resp.get("uuid"))
+                        else:
+                            print(f"[SKIP BUY] spend too small: {spend:.2f} KRW (min {MIN_KRW_ORDER})")
+
+                elif decision.decision == "sell":
+                    sell_qty = snapshot.available(base_currency) * (percent / 100.0)
+                    if sell_qty * current_price >= MIN_KRW_ORDER:
+                        order_resp = await aupbit.sell_market_order(coin_name, sell_qty)
+                        print(order_resp)
+                        order_executed = isinstance(order_resp, dict) and bool(order_resp.get("uuid"))
+                    else:
+                        print(f"[SKIP SELL] value too small: {sell_qty * current_price:.2f} KRW (min {MIN_KRW_ORDER})")
+            except Exception as e:
+                print("[ORDER ERROR]", repr(e))
+                order_executed = False
+
+            await asyncio.sleep(1)
+
+            try:
+                valuation = await avaluate_account(aupbit, KRW_MARKETS)
+                print("[EQUITY]", valuation.summary())
+                log_result(coin_name, decision, percent, order_executed, current_price, *valuation.as_tuple())
             except Exception as e:
                 print("[EQUITY/LOG FAIL]", repr(e))
 
-        time.sleep(SLEEP_EVERY)
+        # 코인마다 COIN_DEADLINE초까지만 기다리고(주문 중 취소는 안 함), 아직 도는 코인은 다음 회차에서 skip
+        tasks = []
+        async for coin_name, result in agent.adecide_batch(informs_by_coin, max_in_flight=DECIDE_MAX_IN_FLIGHT,
+                                                           timeout=DECIDE_TIMEOUT):
+            if coin_name in coin_tasks:
+                print(f"[SCHED] trade:{coin_name}: previous run still going -> skipped")
+                continue
+            task = coin_tasks[coin_name] = asyncio.create_task(execute(coin_name, result))
+            task.add_done_callback(lambda _, c=coin_name: coin_tasks.pop(c, None))
+            tasks.append((coin_name, task, time.time()))
+
+        overran = []
+        for coin_name, task, submitted in tasks:
+            remaining = None if COIN_DEADLINE is None else max(0.0, submitted + COIN_DEADLINE - time.time())
+            done, _ = await asyncio.wait([task], timeout=remaining)
+            if not done:
+                overran.append(coin_name)
+        if overran:
+            print(f"[SCHED] trade: over {COIN_DEADLINE:.0f}s deadline -> left running: {overran}")
+
+        print_stats()
+
+    # =========================================================
+    # ✅ (6) 스케줄러: 매매는 캔들 마감 + offset, 유동성 스캔/뉴스는 별도 주기 job
+    #  - 이전 매매 사이클이 다음 마감까지 안 끝나면 그 회차는 건너뜀(쌓이지 않음)
+    # =========================================================
+    if TRADE_ASYNC:
+        async def run_async():
+            jobs = [
+                candle_loop("trade", atrade_cycle, interval=TRADE_INTERVAL, offset=TRADE_CLOSE_OFFSET,
+                            jitter=TRADE_JITTER, run_at_start=True),
+                periodic_loop("news", lambda: SOURCE_CACHE.aget("news", force=True),
+                              every=NEWS_TTL, jitter=30, run_at_start=False),
+            ]
+            if RUNS_LIQ_SCAN:
+                jobs.append(periodic_loop("liquidity_scan", lambda: SOURCE_CACHE.aget("liquidity_candidates", force=True),
+                                          every=SCAN_EVERY.total_seconds(), run_at_start=False))
+            try:
+                await asyncio.gather(*jobs)
+            finally:
+                await aio_close()
+                await llm_aclose()
+
+        asyncio.run(run_async())
+        return
+
+    scheduler = CandleScheduler(max_workers=4)
+    scheduler.add_candle_job("trade", trade_cycle, interval=TRADE_INTERVAL, offset=TRADE_CLOSE_OFFSET,
+                             jitter=TRADE_JITTER, overlap="skip", run_at_start=True)
+    if RUNS_LIQ_SCAN:
+        scheduler.add_periodic_job("liquidity_scan", lambda: SOURCE_CACHE.get("liquidity_candidates", force=True),
+                                   every=SCAN_EVERY.total_seconds(), overlap="skip", run_at_start=False)
+    scheduler.add_periodic_job("news", lambda: SOURCE_CACHE.get("news", force=True),
+                               every=NEWS_TTL, jitter=30, overlap="coalesce", run_at_start=False)
+    scheduler.run_forever()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+# bench/bench_decide_batch.py
+"""
+Agent_openai.decide(순차) vs decide_batch(동시) 사이클 시간 벤치마크 (로컬 mock OpenAI 호환 서버)
+
+- mock 서버는 요청당 --latency 초가 걸리고, 동시에 처리 중인 요청 1개당 --batch-penalty 비율만큼 느려짐
+  (vLLM continuous batching처럼 동시 요청이 거의 공짜에 가깝게 함께 디코딩되는 상황을 흉내)
+- 후보 코인 수별로 두 방식의 wall time 출력
+
+실행: python bench/bench_decide_batch.py --latency 1.0 --counts 1 5 10 20
+"""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from auto_trade_test import Agent_openai
+from utils.llm_metrics import LLM_METRICS
+
+
+def serve(latency: float, batch_penalty: float):
+    state = {"active": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with lock:
+                state["active"] += 1
+                active = state["active"]
+            time.sleep(latency * (1 + batch_penalty * (active - 1)))
+            with lock:
+                state["active"] -= 1
+
+            content = json.dumps({"decision": "hold", "percentage": 0, "reason": "mock"})
+            if req.get("stream"):
+                # SSE: 내용 청크 → usage 청크 → [DONE]
+                events = [
+                    {"id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": "mock",
+                     "choices": [{"index": 0, "delta": {"role": "assistant", "content": content}, "finish_reason": "stop"}]},
+                    {"id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": "mock",
+                     "choices": [], "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}},
+                ]
+                body = "".join(f"data: {json.dumps(e)}\n\n" for e in events).encode() + b"data: [DONE]\n\n"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            body = json.dumps({
+                "id": "mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "mock",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency", type=float, default=1.0)
+    ap.add_argument("--batch-penalty", type=float, default=0.05)
+    ap.add_argument("--max-in-flight", type=int, default=8)
+    ap.add_argument("--counts", type=int, nargs="+", default=[1, 5, 10, 20])
+    args = ap.parse_args()
+
+    server = serve(args.latency, args.batch_penalty)
+    agent = Agent_openai(
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        api_key="not-used",
+        model="mock",
+    )
+    informs = {"coin_price": [], "fear_greed_index": 50, "news": [], "reflection": "", "youtube_transcript": ""}
+
+    rows = []
+    for n in args.counts:
+        batch = {f"KRW-T{i:03d}": dict(informs) for i in range(n)}
+
+        t0 = time.perf_counter()
+        for inf in batch.values():
+            agent.decide(inf)
+        t_seq = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        results = dict(agent.decide_batch(batch, max_in_flight=args.max_in_flight))
+        t_batch = time.perf_counter() - t0
+        assert sorted(results) == sorted(batch)
+        assert not any(isinstance(r, Exception) for r in results.values()), results
+
+        rows.append((n, t_seq, t_batch))
+
+    server.shutdown()
+
+    print(f"\nlatency={args.latency}s batch_penalty={args.batch_penalty} max_in_flight={args.max_in_flight}")
+    print(f"{'coins':>6} {'sequential(s)':>14} {'batch(s)':>9} {'batch/coin(s)':>14}")
+    for n, t_seq, t_batch in rows:
+        print(f"{n:>6} {t_seq:>14.2f} {t_batch:>9.2f} {t_batch / n:>14.3f}")
+
+    print("\n[LLM METRICS] decision:", json.dumps(LLM_METRICS.to_json().get("decision", {}), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# bench/bench_indicators.py
+"""
+add_indicators(ta 전체 재계산) vs StreamingIndicators(캔들당 O(1) 갱신) 벤치마크
+
+- 티커 N개 × 캔들 M개를 한 개씩 닫으면서, 매 캔들마다
+  (a) 최근 window개 DataFrame에 add_indicators 재계산
+  (b) 스트리밍 엔진 update 1회
+- 마지막에 두 결과가 허용 오차 이내인지 확인
+
+실행: python bench/bench_indicators.py --tickers 20 --candles 300 --window 200
+"""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.get_price import add_indicators
+from utils.stream_ind import INDICATOR_COLUMNS, StreamingIndicators
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tickers", type=int, default=20)
+    ap.add_argument("--candles", type=int, default=300)
+    ap.add_argument("--window", type=int, default=200)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    total = args.window + args.candles
+    idx = pd.date_range("2024-01-01", periods=total, freq="min")
+    series = {
+        f"KRW-T{i:03d}": pd.DataFrame(
+            {"close": rng.uniform(100, 1e8) * np.cumprod(1 + rng.normal(0, 0.002, total))}, index=idx
+        )
+        for i in range(args.tickers)
+    }
+
+    # (a) 매 캔들마다 ta 재계산 (window 고정, 전체 이력이 아닌 최근 window개)
+    t0 = time.perf_counter()
+    for df in series.values():
+        for end in range(args.window, total):
+            add_indicators(df.iloc[end - args.window + 1:end + 1].copy())
+    t_ta = time.perf_counter() - t0
+
+    # (b) 스트리밍: window개로 예열 후 새 캔들만 update
+    streams = {}
+    for t, df in series.items():
+        st = StreamingIndicators(history=total)
+        for ts, c in zip(df.index[:args.window], df["close"].iloc[:args.window]):
+            st.update(ts, c)
+        streams[t] = st
+
+    t0 = time.perf_counter()
+    for t, df in series.items():
+        st = streams[t]
+        for ts, c in zip(df.index[args.window:], df["close"].iloc[args.window:]):
+            st.update(ts, c)
+    t_stream = time.perf_counter() - t0
+
+    # 정확도: 전체 이력에 대한 ta 결과와 비교
+    worst = 0.0
+    for t, df in series.items():
+        ref = add_indicators(df.copy())
+        got = pd.DataFrame([v for _, v in streams[t].history], index=df.index)
+        for col in INDICATOR_COLUMNS:
+            a, b = ref[col].to_numpy(), got[col].to_numpy()
+            assert (np.isnan(a) == np.isnan(b)).all(), col
+            m = ~np.isnan(a)
+            worst = max(worst, float(np.max(np.abs(a[m] - b[m]) / np.maximum(1.0, np.abs(a[m])))))
+
+    updates = args.tickers * args.candles
+    print(f"tickers={args.tickers} candles={args.candles} window={args.window}")
+    print(f"ta recompute : {t_ta:8.3f}s  ({t_ta / updates * 1e6:9.1f} us/candle)")
+    print(f"streaming    : {t_stream:8.3f}s  ({t_stream / updates * 1e6:9.1f} us/candle)")
+    print(f"speedup      : {t_ta / t_stream:8.1f}x")
+    print(f"max rel err  : {worst:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# bench/bench_liq_scan.py
+"""
+top_liquid_coins 직렬 vs 병렬 스캔 벤치마크 (로컬 가짜 캔들 서버 사용)
+
+- 업비트 대신 127.0.0.1에 캔들 서버를 띄우고, 요청마다 --latency 만큼 지연
+- 두 모드의 랭킹 결과가 완전히 같은지 확인 후, 티커 수별 wall time 출력
+
+실행: python bench/bench_liq_scan.py --latency 0.08 --rps 10 --workers 8 --counts 25 50 100 200
+"""
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+# 벤치 캔들이 실제 캔들 저장소에 섞이지 않게 임시 DB 사용
+os.environ.setdefault("CANDLE_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench_candles.db"))
+
+import coin_cand
+from utils.ohlcv_cache import OHLCV_CACHE
+from utils.rate_limit import TokenBucket
+
+
+def make_candles(ticker: str, days: int = 200) -> list[dict]:
+    """티커별로 결정적인(seed 고정) 일봉 생성"""
+    rnd = random.Random(ticker)
+    base_value = rnd.uniform(1e9, 5e10)
+    price = rnd.uniform(100, 100_000)
+    start = datetime(2024, 1, 1, 9, 0)
+    rows = []
+    for i in range(days):
+        price *= 1 + rnd.uniform(-0.05, 0.05)
+        rows.append({
+            "candle_date_time_kst": (start + timedelta(days=i)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "opening_price": price,
+            "high_price": price * 1.02,
+            "low_price": price * 0.98,
+            "trade_price": price,
+            "candle_acc_trade_volume": base_value / price,
+            "candle_acc_trade_price": base_value * rnd.uniform(0.5, 1.5),
+        })
+    return rows[::-1]  # 업비트처럼 최신순
+
+
+def serve(latency: float):
+    cache: dict[str, list[dict]] = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            q = parse_qs(urlparse(self.path).query)
+            market = q["market"][0]
+            count = int(q.get("count", ["200"])[0])
+            if market not in cache:
+                cache[market] = make_candles(market)
+            time.sleep(latency)
+            body = json.dumps(cache[market][:count]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_fetch(base: str):
+    def get_ohlcv(ticker, count=200, interval="day"):
+        with urllib.request.urlopen(f"{base}/v1/candles/days?market={ticker}&count={count}") as r:
+            rows = json.loads(r.read())[::-1]
+        df = pd.DataFrame({
+            "open": [x["opening_price"] for x in rows],
+            "high": [x["high_price"] for x in rows],
+            "low": [x["low_price"] for x in rows],
+            "close": [x["trade_price"] for x in rows],
+            "volume": [x["candle_acc_trade_volume"] for x in rows],
+            "value": [x["candle_acc_trade_price"] for x in rows],
+        }, index=pd.to_datetime([x["candle_date_time_kst"] for x in rows]))
+        return df
+    return get_ohlcv
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--latency", type=float, default=0.08)
+    ap.add_argument("--rps", type=float, default=10.0)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--counts", type=int, nargs="+", default=[25, 50, 100, 200])
+    args = ap.parse_args()
+
+    server = serve(args.latency)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # 업비트 대신 가짜 서버로 요청 보내기
+    coin_cand.pyupbit.get_ohlcv = make_fetch(base)  # candle_store도 같은 pyupbit 모듈을 사용
+
+    print(f"latency={args.latency}s rps={args.rps} workers={args.workers}")
+    print(f"{'tickers':>8} {'serial(s)':>10} {'parallel(s)':>12} {'speedup':>8}")
+    for n in args.counts:
+        tickers = [f"KRW-T{i:03d}" for i in range(n)]
+
+        OHLCV_CACHE.clear()  # 두 모드 모두 실제 요청으로 측정
+        t0 = time.perf_counter()
+        serial = coin_cand.top_liquid_coins(
+            verbose=False, workers=1, limiter=TokenBucket(args.rps), tickers=tickers
+        )
+        t_serial = time.perf_counter() - t0
+
+        OHLCV_CACHE.clear()
+        t0 = time.perf_counter()
+        parallel = coin_cand.top_liquid_coins(
+            verbose=False, workers=args.workers, limiter=TokenBucket(args.rps), tickers=tickers
+        )
+        t_parallel = time.perf_counter() - t0
+
+        assert serial == parallel, "ranking mismatch between serial and parallel scan"
+        print(f"{n:>8} {t_serial:>10.2f} {t_parallel:>12.2f} {t_serial / t_parallel:>7.2f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,26 @@
+import numpy as np
 import pyupbit
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import candle_store
+from utils.rate_limit import UPBIT_QUOTATION_LIMITER
 
 LISTING_DAYS   = 30
 PUMP_RATIO     = 8
 MIN_TURNOVER   = 5_000_000_000
 MAX_DAILY_RET  = 0.3
 
-def get_ohlcv_retry(ticker, count, interval="day", sleep_sec=0.2, backoff=1.6, max_sleep=5.0, max_tries=None, verbose=False):
+EXCLUDE = {"KRW-USDT", "KRW-USDC", "KRW-DAI", "KRW-TUSD", "KRW-USDP"}
+
+def get_ohlcv_retry(ticker, count, interval="day", sleep_sec=0.2, backoff=1.6, max_sleep=5.0, max_tries=None, verbose=False,
+                    limiter=UPBIT_QUOTATION_LIMITER):
     """
     - None/empty 반환: 재시도
     - 예외(429/네트워크 등): 재시도
     - max_tries=None이면 무한 재시도
+    - 로컬 캔들 저장소 경유: 저장된 마지막 캔들 이후 분량만 거래소에 요청
+    - limiter: 요청마다 토큰 1개 소비(스레드 간 공유 시 초당 쿼터 준수)
     """
     tries = 0
     wait = sleep_sec
@@ -18,7 +28,7 @@ def get_ohlcv_retry(ticker, count, interval="day", sleep_sec=0.2, backoff=1.6, m
     while True:
         tries += 1
         try:
-            df = pyupbit.get_ohlcv(ticker, count=count, interval=interval)
+            df = candle_store.get_ohlcv(ticker, interval=interval, count=count, limiter=limiter)
             if df is not None and not df.empty:
                 return df
             if verbose:
@@ -33,62 +43,105 @@ def get_ohlcv_retry(ticker, count, interval="day", sleep_sec=0.2, backoff=1.6, m
         time.sleep(wait)
         wait = min(max_sleep, wait * backoff)
 
-def filter_coin(ticker, verbose=True):
-    # 30일치 데이터가 '정상적으로' 존재하는지부터 재시도로 확보
-    df30 = get_ohlcv_retry(ticker, count=LISTING_DAYS, interval="day", verbose=verbose)
-    if df30 is None or len(df30) < LISTING_DAYS:
-        if verbose:
-            print("skip(new)")
-        return False, None
+def build_panel(frames, days):
+    """
+    [df or None, ...] → (value, close) 각각 (tickers × days) float 배열
+    - 티커별 최근 days개 일봉만 사용, 데이터가 모자라면 앞쪽을 NaN으로 채움(오른쪽 정렬)
+    """
+    value = np.full((len(frames), days), np.nan)
+    close = np.full((len(frames), days), np.nan)
+    for i, df in enumerate(frames):
+        if df is None or df.empty:
+            continue
+        tail = df.tail(days)
+        n = len(tail)
+        value[i, days - n:] = tail["value"].to_numpy(dtype=float)
+        close[i, days - n:] = tail["close"].to_numpy(dtype=float)
+    return value, close
 
-    v = df30["value"]
-    med = v.median()
+def filter_panel(value, close, score_days):
+    """
+    유니버스 전체에 대해 필터 4종 + 스코어를 배열 연산으로 한 번에 계산
+    반환: (reason, score)
+    - reason: 통과면 "", 아니면 "new" / "pump" / "thin" / "volatile" (우선순위 순)
+    - score: 최근 score_days 거래대금 중앙값
+    """
+    v = value[:, -LISTING_DAYS:]
+    c = close[:, -LISTING_DAYS:]
 
-    if v.max() / (med + 1e-9) > PUMP_RATIO:
-        if verbose:
-            print("skip(pump)")
-        return False, None
+    # 30일치가 안 채워진 티커(신규 상장/조회 실패)
+    new = np.isnan(v).any(axis=1) | np.isnan(c).any(axis=1)
 
-    if v.min() < MIN_TURNOVER:
-        if verbose:
-            print("skip(thin)")
-        return False, None
+    # 이후 계산에서 NaN 경고가 나지 않게 new 행은 더미값으로 채움(결과는 new로 이미 탈락)
+    v = np.where(new[:, None], 1.0, v)
+    c = np.where(new[:, None], 1.0, c)
 
-    if df30["close"].pct_change().abs().max() > MAX_DAILY_RET:
-        if verbose:
-            print("skip(volatile)")
-        return False, None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pump = v.max(axis=1) / (np.median(v, axis=1) + 1e-9) > PUMP_RATIO
+        thin = v.min(axis=1) < MIN_TURNOVER
 
-    return True, df30
+        # pandas pct_change().abs().max()와 동일: 0/0(NaN)은 무시, x/0(inf)은 탈락
+        ret = np.abs(c[:, 1:] / c[:, :-1] - 1.0)
+        volatile = np.where(np.isnan(ret), 0.0, ret).max(axis=1) > MAX_DAILY_RET
 
-def top_liquid_coins(score_days=10, verbose=True):
-    tickers = pyupbit.get_tickers(fiat="KRW")
+    reason = np.select([new, pump, thin, volatile], ["new", "pump", "thin", "volatile"], default="")
 
-    EXCLUDE = {"KRW-USDT", "KRW-USDC", "KRW-DAI", "KRW-TUSD", "KRW-USDP"}
-    tickers = [t for t in tickers if t not in EXCLUDE]
+    s = value[:, -score_days:]
+    s = np.where(np.isnan(s).all(axis=1)[:, None], 0.0, s)
+    score = np.nanmedian(s, axis=1)
 
-    scores, total = [], len(tickers)
+    return reason, score
 
-    for i, t in enumerate(tickers, 1):
-        if verbose:
-            print(f"[{i}/{total}] {t} ...", end=" ")
+def filter_coin(ticker, verbose=True, limiter=UPBIT_QUOTATION_LIMITER):
+    # 30일치 데이터가 '정상적으로' 존재하는지부터 재시도로 확보
+    df30 = get_ohlcv_retry(ticker, count=LISTING_DAYS, interval="day", verbose=verbose, limiter=limiter)
 
-        # 스코어용 df(최근 score_days)도 retry로 확보 (여기가 기존 크래시 포인트)
-        df_score = get_ohlcv_retry(t, count=score_days, interval="day", verbose=verbose)
-        if df_score is None:
-            if verbose:
-                print("skip(no_score)")
-            continue
+    value, close = build_panel([df30], LISTING_DAYS)
+    reason, _ = filter_panel(value, close, LISTING_DAYS)
+    if reason[0]:
+        if verbose:
+            print(f"skip({reason[0]})")
+        return False, None
 
-        ok, df30 = filter_coin(t, verbose=verbose)
-        if not ok:
-            continue
+    return True, df30
 
-        score = df_score["value"].median()
-        scores.append((t, score))
+def top_liquid_coins(score_days=10, verbose=True, workers=1, limiter=UPBIT_QUOTATION_LIMITER, tickers=None):
+    """
+    KRW 마켓 유동성 랭킹 [(ticker, score), ...] (score 내림차순)
+    - 티커당 일봉 1회 조회(max(LISTING_DAYS, score_days)개) → (tickers × days) 패널로 필터/스코어 일괄 계산
+    - workers > 1: 스레드 풀로 병렬 조회. limiter를 모든 워커가 공유하므로 초당 쿼터는 그대로
+    - 결과는 workers 값과 무관하게 동일(티커 순서대로 모은 뒤 stable sort)
+    """
+    if tickers is None:
+        tickers = pyupbit.get_tickers(fiat="KRW")
+    tickers = [t for t in tickers if t not in EXCLUDE]
 
+    days = max(LISTING_DAYS, score_days)
+    total = len(tickers)
+
+    if workers <= 1:
+        frames = [
+            get_ohlcv_retry(t, count=days, interval="day", verbose=verbose, limiter=limiter)
+            for t in tickers
+        ]
+    else:
+        # map은 입력 순서대로 결과를 돌려줌 → 직렬 모드와 같은 순서
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="liq-scan") as pool:
+            frames = list(pool.map(
+                lambda t: get_ohlcv_retry(t, count=days, interval="day", limiter=limiter),
+                tickers,
+            ))
+
+    value, close = build_panel(frames, days)
+    reason, score = filter_panel(value, close, score_days)
+
+    scores = []
+    for i, t in enumerate(tickers):
         if verbose:
-            print(int(score))
+            status = f"skip({reason[i]})" if reason[i] else str(int(score[i]))
+            print(f"[{i + 1}/{total}] {t} ... {status}")
+        if not reason[i]:
+            scores.append((t, float(score[i])))
 
     return sorted(scores, key=lambda x: x[1], reverse=True)
 
@@ -1,22 +1,24 @@
 from __future__ import annotations
 import json
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Callable, List
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Callable
 import utils
 import time
 import traceback
 import math
-
-###### data containers ######################################
-@dataclass
-class Cooltime:
-    scan_every: timedelta = timedelta(hours=25)
-    next_scan_at: datetime = field(default_factory=datetime.now)
-    news_every: timedelta = timedelta(hours=12)
-    next_news_at: datetime = field(default_factory=datetime.now)
-    cached_news: List[Dict[str, Any]] = field(default_factory=list)
-
+from utils.dag import Node, run_dag
+from utils.get_fear import fng_is_valid, fng_ttl_seconds
+from utils.ttl_cache import TTLCache
+
+# run_all 노드별 timeout(초). 넘으면 fallback 값으로 진행
+NODE_TIMEOUTS = {
+    "fear_greed_index": 15.0,
+    "recent_trades_df": 10.0,
+    "reflection": 90.0,
+    "youtube_transcript": 300.0,
+    "coin_price": 30.0,
+    "news": 30.0,
+}
 
 def _sanitize_json(x: Any) -> Any:
     """NaN/inf/DataFrame 등 json.dumps에서 문제나는 것들 방지"""
@@ -62,6 +64,11 @@ class Util_Funcs:
     video_id: str = ""
     coin_name: str = ""
 
+    # cache 사용 시 소스별 TTL(FNG는 응답의 time_until_update 우선)
+    news_ttl_seconds: float = 12 * 3600
+    fng_ttl_seconds: float = 3600
+    transcript_ttl_seconds: float = 24 * 3600
+
     _DEFAULTS = {
         "get_fear_greed_index": utils.get_fear_greed_index,
         "get_recent_trades": utils.get_recent_trades,
@@ -89,6 +96,25 @@ class Util_Funcs:
 
         return uf
 
+    def _fetch_news(self):
+        return self.fetch_rss_news(
+            self.rss_feed_url,
+            self.rss_limit,
+            self.rss_summary_len,
+            self.rss_content_len,
+        )
+
+    def _register_sources(self, cache: TTLCache):
+        """처음 쓸 때만 등록(이미 있으면 호출자 설정 유지)"""
+        if not cache.has_source("fng"):
+            cache.register("fng", lambda: self.get_fear_greed_index(limit=1, date_format="kr"),
+                           ttl=self.fng_ttl_seconds, ttl_from=fng_ttl_seconds, is_valid=fng_is_valid)
+        if not cache.has_source("news"):
+            cache.register("news", self._fetch_news, ttl=self.news_ttl_seconds)
+        if not cache.has_source("transcript"):
+            cache.register("transcript", lambda: self.get_vid_script(self.video_id),
+                           ttl=self.transcript_ttl_seconds, is_valid=bool)  # get_vid 디스크 캐시라 refresh_ahead 안 씀
+
     def run_all(
         self,
         *,
@@ -96,135 +122,104 @@ class Util_Funcs:
         pre_recent_trades_df=None,
         pre_reflection=None,
         pre_news=None,
-        cooltime=None,
+        pre_coin_price=None,
+        cache: Optional[TTLCache] = None,
+        timeouts: Optional[Dict[str, float]] = None,
     ) -> dict:
-        informs = {}
-
-        t0 = time.perf_counter()
-        def lap(name: str):
-            nonlocal t0
-            t1 = time.perf_counter()
-            print(f"[TIMING] {name}: {(t1 - t0):.3f}s")
-            t0 = t1
-
-        try:
-            # 1) FNG
-            try:
-                informs["fear_greed_index"] = (
-                    pre_fear_greed_index
-                    if pre_fear_greed_index is not None
-                    else self.get_fear_greed_index(limit=1, date_format="kr")
-                )
-            except Exception as e:
-                print("[WARN] fear_greed_index failed:", repr(e))
-                print(traceback.format_exc())
-                informs["fear_greed_index"] = None
-            lap("fear_greed_index")
-
-            # 2) recent trades
-            try:
-                df = pre_recent_trades_df if pre_recent_trades_df is not None else self.get_recent_trades(minutes=20)
-            except Exception as e:
-                print("[WARN] get_recent_trades failed:", repr(e))
-                print(traceback.format_exc())
-                df = None
-            lap("get_recent_trades")
-            print("[DEBUG] trades rows:", 0 if df is None else len(df))
-
-            # ✅ DF 넣지 말고 records로
-            try:
-                if self.trades_df_to_records is not None:
-                    informs["recent_trades"] = self.trades_df_to_records(df, tail=30)
-                else:
-                    informs["recent_trades"] = []
-            except Exception as e:
-                print("[WARN] trades_df_to_records failed:", repr(e))
-                print(traceback.format_exc())
-                informs["recent_trades"] = []
-            lap("trades_df_to_records")
-
-            # 3) reflection
+        """
+        informs 수집을 DAG로 실행: reflection만 FNG/trades를 기다리고 나머지는 동시에.
+        - 노드별 timeout(NODE_TIMEOUTS, timeouts로 덮어쓰기) 초과/실패 시 fallback 값
+        - 전체 지연 = 합계가 아니라 가장 긴 경로
+        - cache(TTLCache)를 주면 FNG/뉴스/트랜스크립트는 TTL 동안 재사용
+        """
+        timeouts = {**NODE_TIMEOUTS, **(timeouts or {})}
+        t_start = time.perf_counter()
+        if cache is not None:
+            self._register_sources(cache)
+
+        # 1) FNG
+        def fear_greed_index():
+            if pre_fear_greed_index is not None:
+                return pre_fear_greed_index
+            if cache is not None:
+                return cache.get("fng")
+            return self.get_fear_greed_index(limit=1, date_format="kr")
+
+        # 2) recent trades
+        def recent_trades_df():
+            if pre_recent_trades_df is not None:
+                return pre_recent_trades_df
+            return self.get_recent_trades(minutes=20)
+
+        # ✅ DF 넣지 말고 records로
+        def recent_trades(recent_trades_df):
+            if self.trades_df_to_records is None:
+                return []
+            return self.trades_df_to_records(recent_trades_df, tail=30)
+
+        # 3) reflection
+        # ✅ trades가 비면 LLM 호출 없이 고정 문구(REFLECTION_SKIP_EMPTY=0이면 기존처럼 생성), 같은 입력은 캐시 재사용
+        def reflection(fear_greed_index, recent_trades_df):
             if pre_reflection is not None:
-                informs["reflection"] = pre_reflection
-                lap("reflection (pre_reflection)")
-            else:
-                market_data = {"fear_greed_index": informs["fear_greed_index"]}
-
-                # ✅ trades가 비어도 reflection 생성 (rows=0이면 0% 성과 기반 코멘트가 나오게 됨)
-                try:
-                    informs["reflection"] = self.generate_reflection(df, market_data)
-                except Exception as e:
-                    print("[WARN] generate_reflection failed:", repr(e))
-                    print(traceback.format_exc())
-                    informs["reflection"] = ""   # 실패해도 계속 진행
-
-                lap("generate_reflection")
-                print("[DEBUG] reflection chars:", len(informs["reflection"] or ""))
-
-
-            # 4) youtube transcript
-            try:
-                t_vid0 = time.perf_counter()
-                informs["youtube_transcript"] = self.get_vid_script(self.video_id)
-                print(f"[TIMING] get_vid_script inner: {(time.perf_counter()-t_vid0):.3f}s")
-            except Exception as e:
-                print("[WARN] get_vid_script failed:", repr(e))
-                print(traceback.format_exc())
-                informs["youtube_transcript"] = ""
-            lap("get_vid_script")
-            print("[DEBUG] transcript chars:", len(informs["youtube_transcript"] or ""))
-
-            # 5) coin price
-            try:
-                t_px0 = time.perf_counter()
-                informs["coin_price"] = self.get_price(self.coin_name)
-                print(f"[TIMING] get_price inner: {(time.perf_counter()-t_px0):.3f}s")
-            except Exception as e:
-                print("[WARN] get_price failed:", repr(e))
-                print(traceback.format_exc())
-                informs["coin_price"] = None
-            lap("get_price")
-
-            # 6) news
+                return pre_reflection
+            return self.generate_reflection(recent_trades_df, {"fear_greed_index": fear_greed_index})
+
+        # 4) youtube transcript
+        def youtube_transcript():
+            if cache is not None:
+                return cache.get("transcript")
+            return self.get_vid_script(self.video_id)
+
+        # 5) coin price (여러 코인 돌릴 땐 utils.get_prices 결과를 pre_coin_price로 넘김)
+        def coin_price():
+            if pre_coin_price is not None:
+                return pre_coin_price
+            return self.get_price(self.coin_name)
+
+        # 6) news
+        def news():
             if pre_news is not None:
-                informs["news"] = pre_news
-                lap("news (skipped)")
-            else:
-                try:
-                    t_news0 = time.perf_counter()
-                    if cooltime is not None:
-                        now = datetime.now()
-                        if (now >= cooltime.next_news_at) or (not cooltime.cached_news):
-                            cooltime.cached_news = self.fetch_rss_news(
-                                self.rss_feed_url,
-                                self.rss_limit,
-                                self.rss_summary_len,
-                                self.rss_content_len,
-                            )
-                            cooltime.next_news_at = now + cooltime.news_every
-                        informs["news"] = cooltime.cached_news
-                    else:
-                        informs["news"] = self.fetch_rss_news(
-                            self.rss_feed_url,
-                            self.rss_limit,
-                            self.rss_summary_len,
-                            self.rss_content_len,
-                        )
-                    print(f"[TIMING] fetch_rss_news inner: {(time.perf_counter()-t_news0):.3f}s")
-                except Exception as e:
-                    print("[WARN] fetch_rss_news failed:", repr(e))
-                    print(traceback.format_exc())
-                    informs["news"] = []
-                lap("fetch_rss_news")
-                print("[DEBUG] news items:", len(informs["news"] or []))
-
-            return informs
+                return pre_news
+            if cache is not None:
+                return cache.get("news")
+            return self._fetch_news()
+
+        nodes = [
+            Node("fear_greed_index", fear_greed_index, timeout=timeouts.get("fear_greed_index"), fallback=None),
+            Node("recent_trades_df", recent_trades_df, timeout=timeouts.get("recent_trades_df"), fallback=None,
+                 label="get_recent_trades",
+                 after=lambda df: print("[DEBUG] trades rows:", 0 if df is None else len(df))),
+            Node("recent_trades", recent_trades, deps=("recent_trades_df",), fallback=[],
+                 label="trades_df_to_records"),
+            Node("reflection", reflection, deps=("fear_greed_index", "recent_trades_df"),
+                 timeout=timeouts.get("reflection"), fallback="",   # 실패해도 계속 진행
+                 label="reflection (pre_reflection)" if pre_reflection is not None else "generate_reflection",
+                 after=lambda r: print("[DEBUG] reflection chars:", len(r or ""))),
+            Node("youtube_transcript", youtube_transcript, timeout=timeouts.get("youtube_transcript"), fallback="",
+                 label="get_vid_script",
+                 after=lambda t: print("[DEBUG] transcript chars:", len(t or ""))),
+            Node("coin_price", coin_price, timeout=timeouts.get("coin_price"), fallback=None,
+                 label="get_price (pre_coin_price)" if pre_coin_price is not None else "get_price"),
+            Node("news", news, timeout=timeouts.get("news"), fallback=[],
+                 label="news (skipped)" if pre_news is not None else "fetch_rss_news",
+                 after=lambda n: print("[DEBUG] news items:", len(n or []))),
+        ]
 
+        try:
+            results, _ = run_dag(nodes)
         except Exception as e:
             print("[ERROR] run_all failed (unexpected):", repr(e))
             print(traceback.format_exc())
             raise
 
+        print(f"[TIMING] run_all total (critical path): {(time.perf_counter() - t_start):.3f}s")
+
+        # 기존과 같은 키/순서
+        return {
+            k: results[k]
+            for k in ("fear_greed_index", "recent_trades", "reflection", "youtube_transcript", "coin_price", "news")
+        }
+
 
 #############################################################
 if __name__ == "__main__":
@@ -244,10 +239,7 @@ if __name__ == "__main__":
 
     #util_funcs = Util_Funcs()
 
-    cooltime = Cooltime(
-        news_every=timedelta(hours=12),
-        next_news_at=datetime.now(),
-    )
+    cache = TTLCache()
 
     informs = {}
 
@@ -266,7 +258,7 @@ if __name__ == "__main__":
 
     
 
-    #informs = util_funcs.run_all(cooltime=cooltime)
+    #informs = util_funcs.run_all(cache=cache)
 
     # ✅ 출력 전에 sanitize (NaN/inf/DF 방지)
     #print(json.dumps(_sanitize_json(informs), ensure_ascii=False, indent=2))
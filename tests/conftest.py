@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소 루트에서 `pytest`로 돌려도 utils 패키지를 찾도록
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,60 @@
+import pytest
+
+import auto_trade_test
+from auto_trade_test import Agent_openai, TradingDecision
+from utils.decision_cache import DecisionCache, decision_fingerprint
+
+
+def _informs(coin="KRW-BTC", close=100.0):
+    return {
+        "coin_name": coin,
+        "fear_greed_index": 40,
+        "news": [{"title": "t", "link": "l"}],
+        "coin_price": [{"close": close, "rsi": 50.0}],
+    }
+
+
+@pytest.fixture
+def encodes(monkeypatch):
+    calls = []
+    real = auto_trade_test.encode_informs
+
+    def counting(informs, budget=None):
+        calls.append(informs.get("coin_name"))
+        return real(informs, budget)
+
+    monkeypatch.setattr(auto_trade_test, "encode_informs", counting)
+    return calls
+
+
+def _agent(**kw):
+    return Agent_openai(base_url="http://127.0.0.1:9/v1", api_key="x", model="m", **kw)
+
+
+def test_prepare_encodes_informs_once(encodes):
+    agent = _agent(prompt_budget_tokens=2000)
+    built = agent._build(_informs())
+
+    assert agent._prepare(built) == agent.build_messages(_informs())
+    assert encodes == ["KRW-BTC", "KRW-BTC"]     # _build 1번 + 비교용 build_messages 1번
+
+
+def test_decide_batch_encodes_each_coin_once_and_skips_cache_hits(encodes, monkeypatch, tmp_path):
+    cache = DecisionCache(db_path=str(tmp_path / "decision_cache.db"))
+    agent = _agent(decision_cache=cache)
+    informs = {"KRW-BTC": _informs("KRW-BTC"), "KRW-ETH": _informs("KRW-ETH", 5.0)}
+    cache.put(decision_fingerprint(informs["KRW-ETH"]), {"decision": "hold", "percentage": 0, "reason": "c"})
+
+    seen = []
+
+    def fake_decide(messages, cache_key):
+        seen.append(messages)
+        return TradingDecision("hold", 0, "llm")
+
+    monkeypatch.setattr(agent, "_decide", fake_decide)
+    results = dict(agent.decide_batch(informs))
+
+    assert results["KRW-ETH"].reason == "c"
+    assert results["KRW-BTC"].reason == "llm"
+    assert encodes == ["KRW-BTC"]                 # 캐시 적중 코인은 인코딩 안 함, 나머지는 1번
+    assert seen == [agent._build(informs["KRW-BTC"])[0]]
@@ -0,0 +1,115 @@
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from utils import candle_store
+from utils.candle_store import COLUMNS, CandleStore
+
+T0 = datetime(2024, 1, 1, 9, 0)
+STEP = timedelta(minutes=30)
+
+
+def _pyupbit_frame(opens, close=None):
+    """pyupbit.get_ohlcv와 같은 모양(naive KST datetime 인덱스, float 컬럼)"""
+    rows = [[1.0, 2.0, 0.5, close if close is not None else 1.5 + i, 10.0 + i, 100.0 + i]
+            for i, _ in enumerate(opens)]
+    return pd.DataFrame(rows, columns=COLUMNS, index=list(opens))
+
+
+class _Exchange:
+    """candle i가 T0 + i*STEP에 열리는 가짜 거래소. now 이전까지 열린 캔들 중 마지막 count개"""
+
+    def __init__(self):
+        self.now = T0
+        self.calls = []
+        self.last_close = None
+
+    def get_ohlcv(self, ticker, interval="day", count=200):
+        self.calls.append(count)
+        n = int((self.now - T0) / STEP) + 1
+        opens = [T0 + i * STEP for i in range(max(0, n - count), n)]
+        df = _pyupbit_frame(opens)
+        if self.last_close is not None:
+            df.iloc[-1, df.columns.get_loc("close")] = self.last_close
+        return df
+
+
+def _store(monkeypatch, tmp_path, keep_rows=2000):
+    ex = _Exchange()
+    monkeypatch.setattr(candle_store.pyupbit, "get_ohlcv", ex.get_ohlcv)
+    monkeypatch.setattr(candle_store, "now_kst", lambda: ex.now + timedelta(seconds=5))
+    return CandleStore(db_path=str(tmp_path / "candles.db"), keep_rows=keep_rows), ex
+
+
+def test_full_fetch_then_delta(monkeypatch, tmp_path):
+    store, ex = _store(monkeypatch, tmp_path)
+    ex.now = T0 + 9 * STEP
+
+    df = store.get_ohlcv("KRW-BTC", interval="minute30", count=5, limiter=None)
+    assert ex.calls == [5]                       # 저장분 없음 → count 전체
+    assert len(df) == 5 and df.index[-1] == ex.now
+
+    ex.now += 2 * STEP
+    df = store.get_ohlcv("KRW-BTC", interval="minute30", count=5, limiter=None)
+    assert ex.calls[-1] == 3                     # 새 캔들 2개 + 진행 중이던 마지막 캔들
+    assert list(df.index) == [ex.now - i * STEP for i in range(4, -1, -1)]
+
+    ex.now += 100 * STEP
+    store.get_ohlcv("KRW-BTC", interval="minute30", count=5, limiter=None)
+    assert ex.calls[-1] == 5                     # min(count, elapsed + 1)
+
+    store.get_ohlcv("KRW-BTC", interval="minute30", count=20, limiter=None)
+    assert ex.calls[-1] == 20                    # 저장분 < count → 전체 다시
+    assert store.requests == 4 and store.fetched_rows == 5 + 3 + 5 + 20
+
+
+def test_in_progress_candle_is_overwritten(monkeypatch, tmp_path):
+    store, ex = _store(monkeypatch, tmp_path)
+    ex.now = T0 + 4 * STEP
+    ex.last_close = 1.0
+    store.get_ohlcv("KRW-BTC", interval="minute30", count=5, limiter=None)
+
+    ex.last_close = 9.0                          # 같은 캔들이 진행되면서 종가 변경
+    df = store.get_ohlcv("KRW-BTC", interval="minute30", count=5, limiter=None)
+
+    assert ex.calls == [5, 1]
+    assert len(df) == 5
+    assert df["close"].iloc[-1] == 9.0
+
+
+def test_keep_rows_prunes_oldest(monkeypatch, tmp_path):
+    store, ex = _store(monkeypatch, tmp_path, keep_rows=3)
+    ex.now = T0 + 9 * STEP
+    store.get_ohlcv("KRW-BTC", interval="minute30", count=5, limiter=None)
+
+    kept = store.read("KRW-BTC", "minute30", 100)
+    assert list(kept.index) == [ex.now - 2 * STEP, ex.now - STEP, ex.now]
+
+
+def test_read_matches_pyupbit_shape(monkeypatch, tmp_path):
+    store, ex = _store(monkeypatch, tmp_path)
+    ex.now = T0 + 6 * STEP
+    expected = ex.get_ohlcv("KRW-BTC", count=7)
+
+    df = store.get_ohlcv("KRW-BTC", interval="minute30", count=7, limiter=None)
+
+    pd.testing.assert_frame_equal(df, expected, check_index_type=True, check_freq=False)
+    assert isinstance(df.index, pd.DatetimeIndex) and df.index.tz is None
+    assert list(df.dtypes) == [float] * len(COLUMNS)
+
+
+def test_unsupported_interval_and_counters_under_threads(monkeypatch, tmp_path):
+    store, ex = _store(monkeypatch, tmp_path)
+    ex.now = T0 + 9 * STEP
+
+    store.get_ohlcv("KRW-BTC", interval="month", count=3, limiter=None)
+    assert store.requests == 0                   # 저장소 안 거치고 그대로 조회
+
+    threads = [threading.Thread(target=store.get_ohlcv, args=(f"KRW-C{i}", "minute30", 2),
+                                kwargs={"limiter": None}) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.requests == 16 and store.fetched_rows == 32
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import coin_cand
+from coin_cand import LISTING_DAYS, MAX_DAILY_RET, MIN_TURNOVER, PUMP_RATIO, build_panel, filter_panel
+
+
+def _reference_reason(df30):
+    """기존 티커별 filter_coin 판정(벡터화 이전 로직 그대로)"""
+    if df30 is None or len(df30) < LISTING_DAYS:
+        return "new"
+    v = df30["value"]
+    if v.max() / (v.median() + 1e-9) > PUMP_RATIO:
+        return "pump"
+    if v.min() < MIN_TURNOVER:
+        return "thin"
+    if df30["close"].pct_change().abs().max() > MAX_DAILY_RET:
+        return "volatile"
+    return ""
+
+
+def _random_frame(rng, days):
+    n = int(rng.choice([0, 5, 29, 30, days, days]))
+    if n == 0:
+        return None if rng.random() < 0.5 else pd.DataFrame(columns=["close", "value"])
+
+    value = rng.uniform(5e9, 2e10, n) * (0.3 if rng.random() < 0.2 else 1.0)
+    if rng.random() < 0.2:
+        value[rng.integers(n)] *= rng.uniform(5, 30)                     # 펌핑
+    close = 1000 * np.cumprod(1 + rng.normal(0, 0.1 if rng.random() < 0.3 else 0.02, n))
+    if rng.random() < 0.15:
+        close[rng.integers(n):rng.integers(n) + 3] = 0.0                # 0/0(NaN), x/0(inf)
+    if rng.random() < 0.1:
+        close[rng.integers(1, n) if n > 1 else 0] *= 1.31               # 경계 근처 급등
+    idx = pd.date_range("2024-01-01 09:00", periods=n, freq="D")
+    return pd.DataFrame({"close": close, "value": value}, index=idx)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_filter_panel_matches_per_ticker_filter():
+    rng = np.random.default_rng(7)
+    score_days = 10
+    days = max(LISTING_DAYS, score_days)
+    frames = [_random_frame(rng, days) for _ in range(3000)]
+
+    value, close = build_panel(frames, days)
+    reason, score = filter_panel(value, close, score_days)
+
+    expected = [_reference_reason(None if f is None else f.tail(LISTING_DAYS)) for f in frames]
+    assert list(reason) == expected
+    assert {r for r in expected} >= {"", "new", "pump", "thin", "volatile"}     # 모든 분기 포함
+
+    for i, f in enumerate(frames):
+        if not expected[i]:
+            assert score[i] == pytest.approx(f["value"].tail(score_days).median())
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_top_liquid_coins_same_ranking_for_any_worker_count(monkeypatch):
+    rng = np.random.default_rng(11)
+    frames = {f"KRW-C{i:03d}": _random_frame(rng, LISTING_DAYS) for i in range(200)}
+    monkeypatch.setattr(coin_cand, "get_ohlcv_retry", lambda t, **kw: frames[t])
+
+    tickers = list(frames) + ["KRW-USDT"]
+    serial = coin_cand.top_liquid_coins(score_days=10, verbose=False, workers=1, tickers=tickers)
+    parallel = coin_cand.top_liquid_coins(score_days=10, verbose=False, workers=8, tickers=tickers)
+
+    assert serial == parallel
+    expected = sorted(((t, f["value"].tail(10).median()) for t, f in frames.items() if not _reference_reason(f)),
+                      key=lambda x: x[1], reverse=True)
+    assert [t for t, _ in serial] == [t for t, _ in expected]
+    assert "KRW-USDT" not in dict(serial)
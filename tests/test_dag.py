@@ -0,0 +1,45 @@
+import threading
+import time
+
+import pytest
+
+from utils.dag import Node, run_dag
+
+
+def test_deps_results_and_parallel_roots():
+    t0 = time.perf_counter()
+    results, timings = run_dag([
+        Node("a", lambda: time.sleep(0.1) or 1),
+        Node("b", lambda: time.sleep(0.1) or 2),
+        Node("sum", lambda a, b: a + b, deps=("a", "b")),
+    ])
+    assert results == {"a": 1, "b": 2, "sum": 3}
+    assert time.perf_counter() - t0 < 0.18         # a, b 동시에
+    assert set(timings) == {"a", "b", "sum"}
+
+
+def test_timeout_uses_fallback_without_waiting_for_thread():
+    release = threading.Event()
+    t0 = time.perf_counter()
+    results, _ = run_dag([
+        Node("slow", lambda: release.wait(5) and "late", timeout=0.1, fallback=[]),
+        Node("use", lambda slow: len(slow), deps=("slow",)),
+    ])
+    elapsed = time.perf_counter() - t0
+    release.set()
+
+    assert results == {"slow": [], "use": 0}
+    assert elapsed < 0.5
+
+
+def test_failure_uses_copied_fallback():
+    fallback = {"value": None}
+    results, _ = run_dag([Node("bad", lambda: 1 / 0, fallback=fallback)])
+    assert results["bad"] == fallback and results["bad"] is not fallback
+
+
+def test_unknown_dependency_and_cycle():
+    with pytest.raises(ValueError, match="unknown"):
+        run_dag([Node("a", lambda x: x, deps=("x",))])
+    with pytest.raises(ValueError, match="cycle"):
+        run_dag([Node("a", lambda b: b, deps=("b",)), Node("b", lambda a: a, deps=("a",))])
@@ -0,0 +1,32 @@
+import sqlite3
+import threading
+
+from utils.db_utils import DataBase
+from utils.scheduler import CandleScheduler
+
+
+def test_log_trade_from_scheduler_job(tmp_path):
+    db_path = str(tmp_path / "trades.db")
+    db = DataBase(db_path)     # 메인 스레드에서 생성, 기록은 스케줄러 스레드에서
+    sched = CandleScheduler(max_workers=1)
+    done = threading.Event()
+
+    def job():
+        try:
+            db.log_trade("hold", 0, "test", "BTC", 0.1, 1000.0, 100.0, 110.0, equity_now=1011.0)
+            db.log_liquidity_scan([("KRW-BTC", 1.0)], lambda ts, t, s: (ts, t, s, 100, 1.0, 1e9, 0.1))
+        finally:
+            done.set()
+            sched.stop()
+
+    job_obj = sched.add_periodic_job("log", job, every=60, run_at_start=True)
+    runner = threading.Thread(target=sched.run_forever)
+    runner.start()
+    assert done.wait(10)
+    runner.join(10)
+
+    assert job_obj.stats["errors"] == 0
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT coin_name, decision, equity_now FROM trades").fetchall()
+    assert rows == [("BTC", "hold", 1011.0)]
+    assert db.get_liq_cand() == ["KRW-BTC"]
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import auto_trade_test
+from auto_trade_test import Agent_openai
+
+# 코인별 (종가 → 응답 지연 초). 종가로 프롬프트 안의 코인을 구분
+COINS = {"KRW-SLOW": (111.0, 0.30), "KRW-MID": (222.0, 0.15), "KRW-FAST": (333.0, 0.0), "KRW-BAD": (444.0, 0.05)}
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+
+
+class _Client:
+    """코인별 지연 후 JSON 한 청크를 주는 가짜 OpenAI 클라이언트(동시 요청 수 기록)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _coin(self, messages):
+        user = messages[-1]["content"]
+        return next(c for c, (close, _) in COINS.items() if str(int(close)) in user)
+
+    def _enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def _reply(self, coin):
+        if coin == "KRW-BAD":
+            raise RuntimeError("server error")
+        return [_chunk(f'{{"decision": "hold", "percentage": 0, "reason": "{coin}"}}')]
+
+    def create(self, messages, **kw):
+        coin = self._coin(messages)
+        self._enter()
+        try:
+            time.sleep(COINS[coin][1])
+            return self._reply(coin)
+        finally:
+            self._exit()
+
+
+class _AsyncStream:
+    def __init__(self, items):
+        self.items = list(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.items:
+            raise StopAsyncIteration
+        return self.items.pop(0)
+
+    async def close(self):
+        pass
+
+
+class _AsyncClient(_Client):
+    async def create(self, messages, **kw):
+        coin = self._coin(messages)
+        self._enter()
+        try:
+            await asyncio.sleep(COINS[coin][1])
+            return _AsyncStream(self._reply(coin))
+        finally:
+            self._exit()
+
+
+def _informs():
+    return {coin: {"coin_name": coin, "fear_greed_index": 40, "news": [],
+                   "coin_price": [{"close": close, "rsi": 50.0}]}
+            for coin, (close, _) in COINS.items()}
+
+
+@pytest.fixture
+def agent():
+    return Agent_openai(base_url="http://127.0.0.1:9/v1", api_key="x", model="m")
+
+
+def _check(results, client, max_in_flight):
+    coins = [c for c, _ in results]
+    # 제출 순서(SLOW, MID, FAST, BAD)가 아니라 끝나는 순서
+    assert coins.index("KRW-FAST") < coins.index("KRW-MID") < coins.index("KRW-SLOW")
+    out = dict(results)
+    assert isinstance(out["KRW-BAD"], RuntimeError)          # 한 코인 실패가 나머지를 막지 않음
+    assert {c: out[c].reason for c in ("KRW-SLOW", "KRW-MID", "KRW-FAST")} == {
+        "KRW-SLOW": "KRW-SLOW", "KRW-MID": "KRW-MID", "KRW-FAST": "KRW-FAST"}
+    assert client.max_in_flight <= max_in_flight
+
+
+def test_decide_batch_completion_order_errors_and_bound(agent):
+    agent.client = _Client()
+    results = list(agent.decide_batch(_informs(), max_in_flight=4))
+    _check(results, agent.client, 4)
+    assert agent.client.max_in_flight >= 2                   # 실제로 동시에 나감
+
+    agent.client = _Client()
+    t0 = time.perf_counter()
+    list(agent.decide_batch(_informs(), max_in_flight=1))
+    assert agent.client.max_in_flight == 1
+    assert time.perf_counter() - t0 >= 0.45                  # 1개씩이면 지연 합만큼
+
+
+def test_adecide_batch_completion_order_errors_and_bound(agent, monkeypatch):
+    client = _AsyncClient()
+    monkeypatch.setattr(auto_trade_test, "async_client_for", lambda *a, **kw: client)
+
+    async def collect(max_in_flight):
+        return [r async for r in agent.adecide_batch(_informs(), max_in_flight=max_in_flight)]
+
+    _check(asyncio.run(collect(4)), client, 4)
+
+    client.max_in_flight = 0
+    asyncio.run(collect(2))
+    assert client.max_in_flight == 2
+
+
+def test_adecide_batch_timeout_is_per_coin(agent, monkeypatch):
+    client = _AsyncClient()
+    monkeypatch.setattr(auto_trade_test, "async_client_for", lambda *a, **kw: client)
+
+    async def collect():
+        return dict([r async for r in agent.adecide_batch(_informs(), max_in_flight=4, timeout=0.2)])
+
+    out = asyncio.run(collect())
+    assert isinstance(out["KRW-SLOW"], asyncio.TimeoutError)
+    assert out["KRW-FAST"].reason == "KRW-FAST"
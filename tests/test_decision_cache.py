@@ -0,0 +1,31 @@
+from utils.decision_cache import DecisionCache
+
+
+def test_only_hold_is_cached(tmp_path):
+    cache = DecisionCache(db_path=str(tmp_path / "decision_cache.db"))
+
+    cache.put("k-hold", {"decision": "hold", "percentage": 0, "reason": "r"})
+    cache.put("k-buy", {"decision": "buy", "percentage": 30, "reason": "r"})
+    cache.put("k-sell", {"decision": "Sell", "percentage": 50, "reason": "r"})
+
+    assert cache.get("k-hold") == {"decision": "hold", "percentage": 0, "reason": "r"}
+    assert cache.get("k-buy") is None
+    assert cache.get("k-sell") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_buy_replaces_cached_hold_and_old_rows_are_ignored(tmp_path):
+    cache = DecisionCache(db_path=str(tmp_path / "decision_cache.db"))
+
+    cache.put("k", {"decision": "hold", "percentage": 0, "reason": "r"})
+    cache.put("k", {"decision": "buy", "percentage": 10, "reason": "r"})
+    assert cache.get("k") is None
+
+    # 이전 버전이 저장해 둔 buy 행도 재사용하지 않음
+    cache.conn.execute(
+        "INSERT INTO decision_cache VALUES (?, ?, strftime('%s','now'), strftime('%s','now'))",
+        ("old", '{"decision": "buy", "percentage": 10, "reason": "r"}'),
+    )
+    cache.conn.commit()
+    assert cache.get("old") is None
+    assert cache.stats()["entries"] == 0
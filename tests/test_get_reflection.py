@@ -0,0 +1,19 @@
+from utils.get_reflection import ReflectionCache
+
+
+def test_stats_is_side_effect_free_and_delta_is_explicit():
+    cache = ReflectionCache()
+    cache.put("k", "text", llm_seconds=2.0)
+    cache.get("k")
+    cache.get("missing")
+
+    first = cache.stats()
+    assert cache.stats() == first
+    assert first["hits"] == 1 and first["misses"] == 1 and first["saved_seconds"] == 2.0
+
+    assert cache.snapshot_delta() == {"hits": 1, "misses": 1, "skipped_empty": 0, "saved_seconds": 2.0}
+    assert cache.snapshot_delta() == {"hits": 0, "misses": 0, "skipped_empty": 0, "saved_seconds": 0.0}
+
+    cache.get("k")
+    cache.stats()
+    assert cache.snapshot_delta()["hits"] == 1
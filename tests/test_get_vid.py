@@ -0,0 +1,103 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from utils import get_vid
+
+
+class _Stream:
+    """delay초마다 한 토큰, close()되면 멈추는 가짜 스트림"""
+
+    def __init__(self, delay, tokens):
+        self.delay, self.tokens = delay, tokens
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for _ in range(self.tokens):
+            if self.closed.wait(self.delay):
+                return
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="x"))], usage=None)
+
+    def close(self):
+        self.closed.set()
+
+
+class _Client:
+    def __init__(self, delays):
+        self.delays = delays      # 프롬프트(MAP/SYSTEM) → 토큰당 지연
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kw):
+        delay = self.delays[messages[0]["content"]]
+        if callable(delay):
+            delay = delay(messages[1]["content"])
+        s = _Stream(delay, tokens=10)
+        self.streams.append(s)
+        return s
+
+
+def test_map_reduce_enforces_latency_budget(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_vid, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("YOUTUBE_LATENCY_BUDGET_SECONDS", "1.0")
+    monkeypatch.setenv("YOUTUBE_REDUCE_RESERVE", "0.4")
+    monkeypatch.setenv("YOUTUBE_CHUNK_CHARS", "50")
+    client = _Client({get_vid.MAP_PROMPT: 1.0, get_vid.SYSTEM_PROMPT: 0.01})  # map 1개 = 10초
+
+    t0 = time.monotonic()
+    out = get_vid._map_reduce(client, "m", "word " * 40, max_out_tokens=10)
+    elapsed = time.monotonic() - t0
+
+    assert out == ("", False)          # map이 전부 예산 초과 → reduce 생략
+    assert elapsed < 1.0
+    time.sleep(0.1)
+    assert all(s.closed.is_set() for s in client.streams)   # 예산 뒤에 남은 스트림 없음
+
+
+def test_stream_chat_deadline_raises_and_closes(monkeypatch):
+    client = _Client({"sys": 0.2})
+    t0 = time.monotonic()
+    try:
+        get_vid._stream_chat(client, "m", "sys", "u", 10, "t", deadline=time.monotonic() + 0.3)
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("deadline not enforced")
+    assert time.monotonic() - t0 < 0.6
+    assert client.streams[0].closed.is_set()
+
+
+def test_map_reduce_partial_is_flagged_incomplete(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_vid, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("YOUTUBE_LATENCY_BUDGET_SECONDS", "1.0")
+    monkeypatch.setattr(get_vid, "chunk_text", lambda text, chunk_chars: ["fast part", "slow part"])
+    client = _Client({get_vid.MAP_PROMPT: lambda chunk: 1.0 if "slow" in chunk else 0.001,
+                      get_vid.SYSTEM_PROMPT: 0.001})
+
+    text, complete = get_vid._map_reduce(client, "m", "ignored", max_out_tokens=10)
+
+    assert text == "x" * 10            # 끝난 청크만으로 reduce
+    assert complete is False
+
+
+def test_partial_result_is_cached_only_briefly(monkeypatch, tmp_path):
+    monkeypatch.setattr(get_vid, "CACHE_DIR", str(tmp_path))
+    results = [("partial", False), ("full", True)]
+    calls = []
+
+    def fake_generate(*args):
+        calls.append(args)
+        return results[len(calls) - 1]
+
+    monkeypatch.setattr(get_vid, "_generate_script", fake_generate)
+
+    monkeypatch.setenv("YOUTUBE_PARTIAL_CACHE_SECONDS", "600")
+    assert get_vid.get_vid_script(None, None, "vid") == "partial"
+    assert get_vid.get_vid_script(None, None, "vid") == "partial"     # 짧게는 재사용
+    assert len(calls) == 1
+
+    monkeypatch.setenv("YOUTUBE_PARTIAL_CACHE_SECONDS", "0")
+    time.sleep(0.01)
+    assert get_vid.get_vid_script(None, None, "vid") == "full"        # 만료 → 다시 생성
+    assert get_vid.get_vid_script(None, None, "vid") == "full"        # 완전한 결과는 계속 캐시
+    assert len(calls) == 2
@@ -0,0 +1,41 @@
+import json
+from types import SimpleNamespace
+
+from utils.guided_json import (DECISION_SCHEMA, _STRICT_UNSUPPORTED, guided_kwargs, read_json_object,
+                               schema_max_tokens)
+
+
+def test_max_tokens_fits_full_length_korean_reason():
+    worst = json.dumps({"decision": "hold", "percentage": 100, "reason": "가" * 300}, ensure_ascii=False)
+    # 한글은 글자당 1토큰 이상일 수 있음 → 글자 수가 상한 안에 들어와야 함
+    assert len(worst) <= schema_max_tokens(DECISION_SCHEMA)
+
+
+def test_strict_response_format_drops_unsupported_keywords():
+    schema = guided_kwargs(DECISION_SCHEMA, "response_format")["response_format"]["json_schema"]["schema"]
+
+    def keys(s):
+        yield from s
+        for sub in s.get("properties", {}).values():
+            yield from keys(sub)
+
+    assert not set(keys(schema)) & set(_STRICT_UNSUPPORTED)
+    assert "maxLength=300" in schema["properties"]["reason"]["description"]
+    assert DECISION_SCHEMA["properties"]["reason"]["maxLength"] == 300          # 원본은 그대로
+    assert guided_kwargs(DECISION_SCHEMA, "vllm")["extra_body"]["guided_json"] is DECISION_SCHEMA
+
+
+def test_read_json_object_stops_at_closing_brace():
+    parts = ['{"reason": "a } {', ' b", "decision": "hold"}', " trailing", " never"]
+    closed = []
+
+    class Stream:
+        def __iter__(self):
+            for p in parts:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=p))])
+
+        def close(self):
+            closed.append(True)
+
+    assert json.loads(read_json_object(Stream())) == {"reason": "a } { b", "decision": "hold"}
+    assert closed
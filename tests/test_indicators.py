@@ -0,0 +1,117 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# utils.get_price는 패키지 __init__에서 같은 이름의 함수로 가려짐
+gp = importlib.import_module("utils.get_price")
+from utils.stream_ind import INDICATOR_COLUMNS, IndicatorEngine, StreamingIndicators, _Rolling
+
+
+def _ohlcv(n, seed=0, start="2024-01-01"):
+    rng = np.random.default_rng(seed)
+    close = 5e7 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    idx = pd.date_range(start, periods=n, freq="h")
+    return pd.DataFrame({"open": close, "high": close * 1.01, "low": close * 0.99,
+                         "close": close, "volume": rng.uniform(1, 10, n)}, index=idx)
+
+
+def _assert_frame_close(a: pd.DataFrame, b: pd.DataFrame):
+    for col in INDICATOR_COLUMNS:
+        np.testing.assert_allclose(a[col].to_numpy(float), b[col].to_numpy(float), rtol=1e-9, equal_nan=True,
+                                   err_msg=col)
+
+
+def _missing(v) -> bool:
+    return v is None or (isinstance(v, float) and np.isnan(v))
+
+
+def _assert_record_close(a: dict, b: dict):
+    assert a.keys() == b.keys()
+    for k in a:
+        if _missing(a[k]) or _missing(b[k]):
+            assert _missing(a[k]) and _missing(b[k]), k
+        elif isinstance(a[k], float):
+            assert b[k] == pytest.approx(a[k], rel=1e-9), k
+        else:
+            assert a[k] == b[k], k
+
+
+@pytest.mark.parametrize("n", [24, 60])
+def test_streaming_matches_ta_on_same_window(n):
+    df = _ohlcv(n)
+    expected = gp.add_indicators(df.copy())
+    got = IndicatorEngine().apply("KRW-BTC", "minute60", df)
+    _assert_frame_close(got, expected)
+
+
+def test_panel_matches_ta_with_ragged_lengths():
+    frames = {"KRW-A": _ohlcv(60, 1), "KRW-B": _ohlcv(24, 2), "KRW-C": _ohlcv(40, 3)}
+    n = 60
+    panel = np.full((n, len(frames)), np.nan)
+    for j, df in enumerate(frames.values()):
+        panel[n - len(df):, j] = df["close"].to_numpy()
+    ind = gp.add_indicators_panel(pd.DataFrame(panel, columns=list(frames)))
+
+    for t, df in frames.items():
+        got = df.copy()
+        for col, frame in ind.items():
+            got[col] = frame[t].to_numpy()[n - len(df):]
+        _assert_frame_close(got, gp.add_indicators(df.copy()))
+
+
+def test_in_progress_candle_reupdate_matches_final_values():
+    df = _ohlcv(80)
+    st = StreamingIndicators()
+    for ts, c in zip(df.index, df["close"]):
+        st.update(ts, c * 0.98)        # 진행 중 값
+        st.update(ts, c * 1.03)
+        last = st.update(ts, c)        # 마감 값
+    ref = StreamingIndicators()
+    for ts, c in zip(df.index, df["close"]):
+        expected = ref.update(ts, c)
+    for col in INDICATOR_COLUMNS:
+        assert last[col] == pytest.approx(expected[col], rel=1e-9, nan_ok=True)
+
+
+def test_rolling_undo_across_reanchor(monkeypatch):
+    monkeypatch.setattr(_Rolling, "REANCHOR_EVERY", 7)
+    xs = np.random.default_rng(5).uniform(1e8, 1.1e8, 50)
+    r = _Rolling(5)
+    for i, x in enumerate(xs):
+        r.push(x + 123.0)
+        r.undo()
+        r.push(x)
+        window = xs[max(0, i - 4):i + 1]
+        if len(window) == 5:
+            assert r.mean() == pytest.approx(window.mean(), rel=1e-12)
+            assert r.std() == pytest.approx(window.std(ddof=0), rel=1e-6)
+
+
+def test_get_price_default_is_baseline_and_matches_get_prices(monkeypatch):
+    data = {"KRW-A": _ohlcv(24, 7), "KRW-B": _ohlcv(20, 8)}
+    monkeypatch.setattr(gp.resample, "get_ohlcv", lambda t, interval, count: data[t].copy())
+    monkeypatch.setattr(gp.stream_ind, "STREAMING_ENABLED", False)
+
+    batch = gp.get_prices(list(data))
+    for t in data:
+        single = gp.get_price(t)
+        assert len(single) == len(batch[t]) == 10
+        for a, b in zip(single, batch[t]):
+            _assert_record_close(a, b)
+        # baseline ta: 24개 윈도우에선 MACD(slow=26)가 아직 없음
+        assert all(_missing(r["macd"]) for r in single)
+
+
+def test_streaming_flag_routes_both_paths_through_engine(monkeypatch):
+    data = {"KRW-A": _ohlcv(24, 9)}
+    monkeypatch.setattr(gp.resample, "get_ohlcv", lambda t, interval, count: data[t].copy())
+    engine = IndicatorEngine()
+    monkeypatch.setattr(gp.stream_ind, "INDICATOR_ENGINE", engine)
+    monkeypatch.setattr(gp.stream_ind, "STREAMING_ENABLED", True)
+
+    single = gp.get_price("KRW-A")
+    for a, b in zip(single, gp.get_prices(["KRW-A"])["KRW-A"]):
+        _assert_record_close(a, b)
+    assert ("KRW-A", "minute60") in engine._streams
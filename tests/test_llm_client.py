@@ -0,0 +1,31 @@
+import asyncio
+
+from utils import llm_client
+
+
+def test_env_is_read_at_call_time(monkeypatch):
+    monkeypatch.setenv("LOCAL_OPENAI_TIMEOUT_READ", "7")
+    assert llm_client.timeout_for("decision").read == 7.0
+    monkeypatch.setenv("LOCAL_OPENAI_BASE_URL", "http://10.0.0.1:9000/v1")
+    assert llm_client._resolve(None, None)[0] == "http://10.0.0.1:9000/v1"
+
+
+def test_local_token_is_not_sent_to_remote(monkeypatch):
+    monkeypatch.setenv("LOCAL_OPENAI_API_KEY", "secret-local")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert llm_client._resolve(None, None)[1] == "secret-local"
+    assert llm_client._resolve("https://api.openai.com/v1", None) == ("https://api.openai.com/v1", None)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-remote")
+    assert llm_client._resolve("https://api.openai.com/v1", None)[1] == "sk-remote"
+
+
+def test_async_clients_closed_with_loop():
+    async def use():
+        client = llm_client.get_async_client("http://127.0.0.1:1/v1", "k")
+        assert llm_client.get_async_client("http://127.0.0.1:1/v1", "k") is client
+        await llm_client.aclose()
+        return client
+
+    client = asyncio.run(use())
+    assert client.is_closed()
+    assert not llm_client._async_clients
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+from utils.llm_metrics import LLMMetrics
+from utils.llm_sched import LLM_SCHEDULER
+
+
+def test_prometheus_summary_counts_are_cumulative():
+    m = LLMMetrics(window=3)
+    for v in range(10):
+        m.observe("decision", "total_seconds", v)
+    text = m.to_prometheus()
+
+    assert "# TYPE llm_total_seconds summary" in text
+    assert "histogram" not in text
+    # 분위수는 최근 3개(7, 8, 9), count/sum은 전체 10개
+    assert 'llm_total_seconds{site="decision",quantile="0.5"} 8.0' in text
+    assert 'llm_total_seconds_count{site="decision"} 10' in text
+    assert 'llm_total_seconds_sum{site="decision"} 45.0' in text
+
+
+def test_queue_wait_comes_from_scheduler_only():
+    m = LLMMetrics()
+    with m.track("metrics_test") as call, LLM_SCHEDULER.slot(name="metrics_test"):
+        call.acquired()
+        call.done(SimpleNamespace(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=3)))
+
+    out = m.to_json()["metrics_test"]
+    assert out["queue_wait_seconds"] == LLM_SCHEDULER.stats()["calls"]["metrics_test"]["queue_wait"]
+    assert out["prompt_tokens"]["n"] == 1 and out["calls"] == 1
+    assert 'llm_queue_wait_seconds{site="metrics_test",stat="p95"}' in m.to_prometheus()
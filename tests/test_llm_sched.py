@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from utils.llm_sched import (PRIORITY_DECISION, PRIORITY_REFLECTION, PRIORITY_TRANSCRIPT, LLMQueueFull,
+                             LLMScheduler)
+
+
+def _wait_queued(sched, n):
+    deadline = time.time() + 2
+    while len(sched._heap) < n and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(sched._heap) == n
+
+
+def test_free_slot_goes_to_priority_then_arrival():
+    sched = LLMScheduler(max_in_flight=1)
+    order = []
+    sched._acquire(PRIORITY_DECISION, None)      # 슬롯을 막아 둠
+
+    def worker(priority, name):
+        with sched.slot(priority, name):
+            order.append(name)
+
+    threads = []
+    for priority, name in [(PRIORITY_TRANSCRIPT, "transcript"), (PRIORITY_REFLECTION, "reflection"),
+                           (PRIORITY_DECISION, "decision-1"), (PRIORITY_DECISION, "decision-2")]:
+        t = threading.Thread(target=worker, args=(priority, name))
+        t.start()
+        threads.append(t)
+        _wait_queued(sched, len(threads))
+
+    sched._release()
+    for t in threads:
+        t.join(2)
+    assert order == ["decision-1", "decision-2", "reflection", "transcript"]
+
+
+def test_full_queue_rejects_background_but_not_decisions():
+    sched = LLMScheduler(max_in_flight=1, max_queue=1)
+    sched._acquire(PRIORITY_DECISION, None)
+    t = threading.Thread(target=lambda: sched._acquire(PRIORITY_REFLECTION, 1.0))
+    t.start()
+    _wait_queued(sched, 1)
+
+    with pytest.raises(LLMQueueFull):
+        sched._acquire(PRIORITY_TRANSCRIPT, 0.1)
+    with pytest.raises(TimeoutError):
+        sched._acquire(PRIORITY_DECISION, 0.1)    # 결정은 거절 대신 대기(여기선 timeout)
+    assert sched.rejected == 1
+
+    sched._release()
+    t.join(2)
+
+
+def test_timeout_leaves_queue_clean():
+    sched = LLMScheduler(max_in_flight=1)
+    sched._acquire(PRIORITY_DECISION, None)
+    with pytest.raises(TimeoutError):
+        sched._acquire(PRIORITY_REFLECTION, 0.05)
+    assert sched._heap == []
+    sched._release()
+    sched._acquire(PRIORITY_REFLECTION, 0.1)
@@ -0,0 +1,90 @@
+import calendar
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from utils import ohlcv_cache
+from utils.ohlcv_cache import OHLCVCache, next_candle_boundary
+
+KST = timedelta(hours=9)
+
+
+def _kst(*args) -> float:
+    """KST 시각 → epoch 초"""
+    return float(calendar.timegm((datetime(*args) - KST).timetuple()))
+
+
+@pytest.mark.parametrize("interval, now, boundary", [
+    ("minute30", _kst(2024, 1, 1, 10, 12), _kst(2024, 1, 1, 10, 30)),
+    ("minute30", _kst(2024, 1, 1, 10, 30), _kst(2024, 1, 1, 11, 0)),      # 경계 정각은 다음 경계
+    ("minute60", _kst(2024, 1, 1, 10, 59, 59), _kst(2024, 1, 1, 11, 0)),
+    ("minute240", _kst(2024, 1, 1, 9, 30), _kst(2024, 1, 1, 13, 0)),      # 4시간봉: 01/05/09/13/17/21시 KST
+    ("minute240", _kst(2024, 1, 1, 23, 0), _kst(2024, 1, 2, 1, 0)),
+    ("day", _kst(2024, 1, 1, 8, 59), _kst(2024, 1, 1, 9, 0)),             # 일봉: 09:00 KST
+    ("day", _kst(2024, 1, 1, 9, 0), _kst(2024, 1, 2, 9, 0)),
+    ("week", _kst(2024, 1, 3, 12, 0), _kst(2024, 1, 8, 9, 0)),            # 주봉: 월요일 09:00 KST
+    ("month", _kst(2024, 1, 31, 10, 0), _kst(2024, 2, 1, 9, 0)),
+])
+def test_next_candle_boundary(interval, now, boundary):
+    assert next_candle_boundary(interval, now) == boundary
+
+
+def test_unknown_interval():
+    with pytest.raises(ValueError):
+        next_candle_boundary("minute7", 0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [_kst(2024, 1, 1, 10, 0)]
+    monkeypatch.setattr(ohlcv_cache, "time", SimpleNamespace(time=lambda: now[0], gmtime=time.gmtime))
+    return now
+
+
+def _fetcher(calls):
+    def fetch():
+        calls.append(1)
+        return pd.DataFrame({"close": [float(len(calls))]})
+    return fetch
+
+
+def test_expires_exactly_at_boundary(clock):
+    cache, calls = OHLCVCache(), []
+    fetch = _fetcher(calls)
+
+    assert cache.get("KRW-BTC", "minute30", 10, fetch)["close"].iloc[0] == 1.0
+    clock[0] = _kst(2024, 1, 1, 10, 29, 59)
+    assert cache.get("KRW-BTC", "minute30", 10, fetch)["close"].iloc[0] == 1.0
+    clock[0] = _kst(2024, 1, 1, 10, 30)                  # 새 캔들 시작 → 닫힌 캔들 재사용 안 함
+    assert cache.get("KRW-BTC", "minute30", 10, fetch)["close"].iloc[0] == 2.0
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_returns_copies(clock):
+    cache, calls = OHLCVCache(), []
+    df = cache.get("KRW-BTC", "day", 10, _fetcher(calls))
+    df["rsi"] = 1.0
+    df.loc[0, "close"] = -1.0
+
+    again = cache.get("KRW-BTC", "day", 10, _fetcher(calls))
+    assert list(again.columns) == ["close"] and again["close"].iloc[0] == 1.0
+    assert again is not cache.get("KRW-BTC", "day", 10, _fetcher(calls))
+
+
+def test_entries_per_count_and_empty_not_cached(clock):
+    cache, calls = OHLCVCache(), []
+    fetch = _fetcher(calls)
+    cache.get("KRW-BTC", "minute30", 10, fetch)
+    cache.get("KRW-BTC", "minute30", 200, fetch)
+    cache.get("KRW-BTC", "minute60", 10, fetch)
+    cache.get("KRW-BTC", "minute30", 10, fetch)
+    assert len(calls) == 3 and cache.stats()["entries"] == 3
+
+    empty = []
+    assert cache.get("KRW-ETH", "day", 10, lambda: empty.append(1) or pd.DataFrame()).empty
+    assert cache.get("KRW-ETH", "day", 10, lambda: empty.append(1)) is None
+    assert len(empty) == 2                               # 빈 응답/None은 캐시 안 함
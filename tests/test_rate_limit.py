@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.rate_limit import TokenBucket
+
+
+def test_burst_then_refill_rate():
+    bucket = TokenBucket(rate=20, capacity=5)
+    t0 = time.monotonic()
+    for _ in range(5):
+        assert bucket.acquire() == 0.0
+    assert time.monotonic() - t0 < 0.05
+
+    # 버스트를 다 쓰면 초당 20개(50ms 간격)
+    t0 = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - t0 == pytest.approx(0.2, abs=0.06)
+
+
+def test_take_reports_wait_without_consuming():
+    bucket = TokenBucket(rate=10, capacity=1)
+    assert bucket._take(1) == 0.0
+    assert bucket._take(1) == pytest.approx(0.1, abs=0.02)
+    assert bucket._take(1) == pytest.approx(0.1, abs=0.02)
+
+
+def test_async_acquire_shares_bucket():
+    bucket = TokenBucket(rate=20, capacity=1)
+
+    async def main():
+        t0 = time.monotonic()
+        await asyncio.gather(*(bucket.acquire_async() for _ in range(3)))
+        return time.monotonic() - t0
+
+    assert asyncio.run(main()) == pytest.approx(0.1, abs=0.06)
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import resample
+from utils.resample import AGG, MultiTimeframeFeed, resample_ohlcv
+
+
+def _minute30(n, start="2024-01-01 00:00", seed=0):
+    rng = np.random.default_rng(seed)
+    close = 5e7 * np.cumprod(1 + rng.normal(0, 0.005, n))
+    idx = pd.date_range(start, periods=n, freq="30min")   # KST(naive), 업비트 형식
+    return pd.DataFrame({"open": close * 0.999, "high": close * 1.01, "low": close * 0.99, "close": close,
+                         "volume": rng.uniform(1, 10, n), "value": rng.uniform(1e6, 1e7, n)}, index=idx)
+
+
+def test_day_buckets_start_at_0900_kst_and_match_pandas():
+    df = _minute30(48 * 5)                  # 00:00 KST 시작 → 첫 일봉(전날 09:00~)은 잘려서 버림
+    out = resample_ohlcv(df, "day")
+
+    expected = df.resample("24h", offset="9h").agg(AGG).iloc[1:]
+    expected.index.name = None
+    assert list(out.index.hour) == [9] * len(out)
+    pd.testing.assert_frame_equal(out, expected, check_freq=False)
+
+
+def test_minute240_and_week_boundaries():
+    df = _minute30(48 * 21, start="2024-01-01 09:00")    # 월요일 09:00 KST = 주봉 시작
+    h4 = resample_ohlcv(df, "minute240")
+    assert set(h4.index.hour) == {1, 5, 9, 13, 17, 21}
+    assert h4.index[0] == pd.Timestamp("2024-01-01 09:00")
+
+    week = resample_ohlcv(df, "week")
+    assert list(week.index) == [pd.Timestamp("2024-01-01 09:00"), pd.Timestamp("2024-01-08 09:00"),
+                                pd.Timestamp("2024-01-15 09:00")]
+    first = df.loc["2024-01-01 09:00":"2024-01-08 08:30"]
+    assert week.iloc[0]["high"] == first["high"].max()
+    assert week.iloc[0]["volume"] == pytest.approx(first["volume"].sum())
+
+
+def test_feed_resamples_from_base_only(monkeypatch):
+    base = _minute30(48 * 10)
+    calls = []
+
+    def fake_get_ohlcv(ticker, interval, count):
+        calls.append((interval, count))
+        return base.tail(count)
+
+    monkeypatch.setattr(resample.candle_store, "get_ohlcv", fake_get_ohlcv)
+    feed = MultiTimeframeFeed(base="minute30")
+
+    day = feed.get_ohlcv("KRW-BTC", interval="day", count=3)
+    assert calls == [("minute30", 48 * 3 + 48)]
+    pd.testing.assert_frame_equal(day, resample_ohlcv(base.tail(48 * 4), "day").tail(3))
+
+    feed.get_ohlcv("KRW-BTC", interval="minute15", count=10)  # base보다 짧으면 그대로
+    assert calls[-1] == ("minute15", 10)
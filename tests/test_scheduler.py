@@ -0,0 +1,119 @@
+import threading
+import time
+
+from utils.scheduler import CandleScheduler, CoinFanOut
+
+
+def test_fan_out_deadline_and_per_coin_skip():
+    fan = CoinFanOut("t", max_workers=4)
+    release = threading.Event()
+    done = []
+
+    def trade(coin, slow):
+        if slow:
+            release.wait(5)
+        done.append(coin)
+
+    fan.submit("KRW-SLOW", trade, "KRW-SLOW", True)
+    fan.submit("KRW-BTC", trade, "KRW-BTC", False)
+    t0 = time.time()
+    assert fan.wait(0.2) == ["KRW-SLOW"]
+    assert time.time() - t0 < 1.0
+    assert done == ["KRW-BTC"]
+
+    # 다음 회차: 아직 도는 코인만 skip, 나머지는 정상 실행
+    assert fan.submit("KRW-SLOW", trade, "KRW-SLOW", False) is False
+    assert fan.submit("KRW-BTC", trade, "KRW-BTC", False) is True
+    release.set()
+    assert fan.wait(5) == []
+
+    stats = fan.stats()
+    assert stats["skipped"] == 1 and stats["overran"] == 1 and stats["errors"] == 0
+    fan.shutdown()
+
+
+def test_run_async_inner_timeout_without_scheduler_timeout(capsys):
+    import asyncio
+
+    from utils.scheduler import _run_async
+
+    async def job():
+        raise asyncio.TimeoutError()   # fn 안의 timeout(스케줄러 timeout=None)
+
+    async def slow():
+        await asyncio.sleep(5)
+
+    async def main():
+        await _run_async("inner", job, None)
+        await _run_async("slow", slow, 0.05)
+
+    asyncio.run(main())
+    out = capsys.readouterr().out
+    assert "[SCHED] inner failed: TimeoutError()" in out
+    assert "[SCHED] slow timed out after 0.1s -> cancelled" in out
+
+
+def _wait_until(cond, timeout=2.0):
+    deadline = time.time() + timeout
+    while not cond() and time.time() < deadline:
+        time.sleep(0.01)
+    assert cond()
+
+
+def _blocking_job(sched, overlap):
+    release = threading.Event()
+    started = []
+
+    def fn():
+        started.append(time.time())
+        release.wait(5)
+
+    job = sched.add_periodic_job(overlap, fn, every=3600, overlap=overlap, run_at_start=False)
+    return job, release, started
+
+
+def test_overlap_skip_drops_fires_while_running():
+    sched = CandleScheduler(max_workers=2)
+    job, release, started = _blocking_job(sched, "skip")
+
+    sched._submit(job, time.time())
+    _wait_until(lambda: len(started) == 1)
+    sched._submit(job, time.time())
+    sched._submit(job, time.time())
+    release.set()
+    _wait_until(lambda: job.stats["runs"] == 1 and not job.running)
+
+    time.sleep(0.05)
+    assert len(started) == 1
+    assert job.stats["skipped"] == 2 and job.stats["coalesced"] == 0
+    sched._pool.shutdown(wait=True)
+
+
+def test_overlap_coalesce_runs_once_more_after_finish():
+    sched = CandleScheduler(max_workers=2)
+    job, release, started = _blocking_job(sched, "coalesce")
+
+    sched._submit(job, time.time())
+    _wait_until(lambda: len(started) == 1)
+    sched._submit(job, time.time())
+    sched._submit(job, time.time())    # 몇 번 밀려도 1번으로 합침
+    release.set()
+    _wait_until(lambda: job.stats["runs"] == 2 and not job.running)
+
+    assert len(started) == 2
+    assert job.stats["coalesced"] == 2 and job.stats["skipped"] == 0
+    sched._pool.shutdown(wait=True)
+
+
+def test_periodic_job_runs_and_stop_returns():
+    sched = CandleScheduler(max_workers=2)
+    runs = []
+    sched.add_periodic_job("tick", lambda: runs.append(1), every=0.05)
+    t = threading.Thread(target=sched.run_forever)
+    t.start()
+    _wait_until(lambda: len(runs) >= 3)
+    sched.stop()
+    t.join(2)
+
+    assert not t.is_alive()
+    assert sched.jobs["tick"].stats["errors"] == 0
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from utils.llm_sched import LLMScheduler
+from utils.shard import LeaseLock, shard_of
+
+
+def test_lease_lock_timeout_reclaim_and_expiry():
+    lock = LeaseLock(lease_seconds=0.3)
+    assert lock.acquire(111, timeout=0.1)
+    assert not lock.acquire(222, timeout=0.05)      # 잡기 대기 상한
+
+    assert lock.reclaim(111)                         # 죽은 워커 잠금 회수
+    assert lock.acquire(222, timeout=0.1)
+
+    t0 = time.monotonic()
+    assert lock.acquire(333, timeout=2)              # 222가 안 놓아도 lease가 지나면 넘어감
+    assert 0.2 < time.monotonic() - t0 < 1.5
+    lock.release(222)                                # 넘어간 잠금은 이전 주인이 못 풂
+    assert not lock.acquire(444, timeout=0.05)
+
+
+def test_llm_scheduler_reclaims_dead_owner():
+    sched = LLMScheduler(max_in_flight=1)
+    sched._acquire(0, None, owner=111)
+    errors = []
+
+    def dead_waiter():
+        try:
+            sched._acquire(0, None, owner=111)
+        except RuntimeError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=dead_waiter)
+    t.start()
+    time.sleep(0.05)
+
+    assert sched.reclaim(111) == 1
+    t.join(2)
+    assert errors and sched.stats()["in_flight"] == 0 and sched.stats()["queued"] == 0
+
+    with sched.slot(timeout=0.5):                    # 회수된 슬롯을 다른 워커가 바로 씀
+        pass
+    sched._release(111)                              # 회수 뒤 늦게 온 release는 무시
+    assert sched.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_shard_of_is_stable(workers):
+    assert shard_of("KRW-BTC", workers) == shard_of("KRW-BTC", workers)
+    assert {shard_of(f"KRW-C{i}", workers) for i in range(50)} == set(range(workers))
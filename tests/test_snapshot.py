@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils import snapshot as snap
+from utils import upbit_async
+from utils.ttl_cache import TTLCache
+
+DELAY = 0.2
+TICKERS = ["KRW-BTC", "KRW-ETH"]
+BALANCES = [
+    {"currency": "KRW", "balance": "1000", "locked": "0", "avg_buy_price": "0"},
+    {"currency": "BTC", "balance": "0.5", "locked": "0.25", "avg_buy_price": "90"},
+]
+
+
+class _Calls:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def source(self, name, value):
+        def fetch(*args, **kwargs):
+            with self.lock:
+                self.counts[name] = self.counts.get(name, 0) + 1
+            time.sleep(DELAY)
+            if isinstance(value, Exception):
+                raise value
+            return value
+        return fetch
+
+
+def _setup(monkeypatch, fng=None, news=None):
+    calls = _Calls()
+    cache = TTLCache()
+    cache.register("fng", calls.source("fng", fng if fng is not None else {"value": 40}), ttl=60)
+    cache.register("news", calls.source("news", news if news is not None else [{"title": "t"}]), ttl=60)
+    cache.register("krw_markets", calls.source("krw_markets", set(TICKERS)), ttl=60)
+    monkeypatch.setattr(snap, "get_prices", calls.source("prices", {t: [{"close": 1.0}] for t in TICKERS}))
+    monkeypatch.setattr(snap.pyupbit, "get_current_price", calls.source("quotes", {"KRW-BTC": 100.0, "KRW-ETH": 10.0}))
+    upbit = type("U", (), {"get_balances": staticmethod(calls.source("balances", BALANCES))})()
+    return calls, cache, upbit
+
+
+def test_sources_fetched_once_in_parallel(monkeypatch):
+    calls, cache, upbit = _setup(monkeypatch)
+
+    t0 = time.perf_counter()
+    s = snap.build_snapshot(TICKERS, upbit=upbit, cache=cache)
+    elapsed = time.perf_counter() - t0
+
+    assert calls.counts == {n: 1 for n in ("fng", "news", "krw_markets", "prices", "quotes", "balances")}
+    assert elapsed < DELAY * 3                   # 6개 소스가 순차(1.2초)가 아니라 동시에
+    assert s.errors == {}
+    assert s.quotes["KRW-BTC"] == 100.0 and s.fng["value"] == 40
+
+
+def test_fields_are_read_only(monkeypatch):
+    _, cache, upbit = _setup(monkeypatch)
+    s = snap.build_snapshot(TICKERS, upbit=upbit, cache=cache)
+
+    for mapping in (s.fng, s.prices, s.quotes, s.balances[0], s.timings, s.errors):
+        with pytest.raises(TypeError):
+            mapping["x"] = 1
+    with pytest.raises(AttributeError):
+        s.quotes = {}                            # frozen dataclass
+    assert isinstance(s.news, tuple) and isinstance(s.krw_markets, frozenset)
+
+
+def test_failed_sources_do_not_fail_snapshot(monkeypatch):
+    _, cache, upbit = _setup(monkeypatch, fng=RuntimeError("fng down"), news=ValueError("rss down"))
+    s = snap.build_snapshot(TICKERS, upbit=upbit, cache=cache)
+
+    assert set(s.errors) == {"fng", "news"}
+    assert dict(s.fng) == {} and s.news == ()
+    assert s.summary()["fng"] is None
+    # 코인별 조회는 그대로
+    assert s.available("BTC") == 0.5
+    assert s.balance("BTC") == (0.75, 90.0)
+    assert s.balance("XRP") == (0.0, 0.0) and s.available("XRP") == 0.0
+    assert s.quotes.get("KRW-ETH") == 10.0
+
+
+def test_async_snapshot_matches(monkeypatch):
+    calls, cache, _ = _setup(monkeypatch, news=ValueError("rss down"))
+
+    async def aget_current_price(tickers):
+        calls.counts["quotes"] = calls.counts.get("quotes", 0) + 1
+        await asyncio.sleep(DELAY)
+        return {"KRW-BTC": 100.0, "KRW-ETH": 10.0}
+
+    class AUpbit:
+        async def get_balances(self):
+            await asyncio.sleep(DELAY)
+            return BALANCES
+
+    monkeypatch.setattr(upbit_async, "aget_current_price", aget_current_price)
+
+    t0 = time.perf_counter()
+    s = asyncio.run(snap.abuild_snapshot(TICKERS, upbit=AUpbit(), cache=cache))
+
+    assert time.perf_counter() - t0 < DELAY * 3
+    assert calls.counts["quotes"] == 1 and calls.counts["prices"] == 1
+    assert set(s.errors) == {"news"} and s.news == ()
+    assert s.available("BTC") == 0.5
+    with pytest.raises(TypeError):
+        s.prices["KRW-BTC"] = None
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from utils.ttl_cache import TTLCache
+
+
+def test_hit_until_ttl_then_refetch():
+    calls = []
+    cache = TTLCache().register("k", lambda: calls.append(1) or len(calls), ttl=0.2)
+
+    assert cache.get("k") == 1
+    assert cache.get("k") == 1
+    time.sleep(0.25)
+    assert cache.get("k") == 2
+    assert cache.stats()["k"]["hits"] == 1 and cache.stats()["k"]["misses"] == 2
+
+
+def test_ttl_from_value_with_min_ttl():
+    cache = TTLCache().register("fng", lambda: {"ttl": 1}, ttl=3600, ttl_from=lambda v: v["ttl"], min_ttl=5)
+    cache.get("fng")
+    assert 4 < cache.stats()["fng"]["expires_in_s"] <= 5
+
+
+def test_failed_refresh_serves_stale_then_retries_after():
+    state = {"fail": False, "n": 0}
+
+    def fetch():
+        if state["fail"]:
+            raise RuntimeError("down")
+        state["n"] += 1
+        return state["n"]
+
+    cache = TTLCache().register("k", fetch, ttl=0.05, retry_after=0.2)
+    assert cache.get("k") == 1
+    time.sleep(0.1)
+
+    state["fail"] = True
+    assert cache.get("k") == 1          # stale
+    assert cache.get("k") == 1          # retry_after 동안은 소스 안 부름
+    assert cache.stats()["k"]["errors"] == 1 and cache.stats()["k"]["stale"] == 1
+
+    state["fail"] = False
+    time.sleep(0.25)
+    assert cache.get("k") == 2
+
+
+def test_failure_without_value_raises_and_invalid_values_are_rejected():
+    cache = TTLCache()
+    cache.register("down", lambda: 1 / 0, ttl=10)
+    cache.register("bad", lambda: {"error": "x"}, ttl=10, is_valid=lambda v: "error" not in v)
+
+    with pytest.raises(ZeroDivisionError):
+        cache.get("down")
+    with pytest.raises(ValueError):
+        cache.get("bad")
+
+
+def test_concurrent_misses_fetch_once():
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return "v"
+
+    cache = TTLCache().register("k", slow_fetch, ttl=10)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["v"] * 8
+    assert len(calls) == 1
+
+
+def test_refresh_ahead_serves_cached_and_refreshes_in_background():
+    calls = []
+    cache = TTLCache().register("k", lambda: calls.append(1) or len(calls), ttl=0.3, refresh_ahead=0.5)
+
+    assert cache.get("k") == 1
+    time.sleep(0.2)                     # 남은 시간 < ttl * 0.5
+    assert cache.get("k") == 1          # 기다리지 않고 현재 값
+    deadline = time.time() + 1
+    while cache.peek("k") != 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.peek("k") == 2
+    assert cache.stats()["k"]["refreshes"] == 1
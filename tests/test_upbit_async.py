@@ -0,0 +1,126 @@
+import asyncio
+
+import httpx
+
+from utils import upbit_async
+from utils.upbit_async import AsyncUpbit
+
+
+def _run(monkeypatch, post, orders):
+    calls = {"post": 0, "get": 0}
+
+    async def fake_request(method, url, **kw):
+        assert method == "POST" and kw["cancel"] is False
+        calls["post"] += 1
+        return await post(kw["json"])
+
+    async def fake_get_json(url, params=None, **kw):
+        calls["get"] += 1
+        order = orders.get(params["identifier"])
+        if order is None:
+            raise httpx.HTTPStatusError("not found", request=httpx.Request("GET", url),
+                                        response=httpx.Response(404))
+        return order
+
+    async def no_sleep(_):
+        pass
+
+    monkeypatch.setattr(upbit_async, "request", fake_request)
+    monkeypatch.setattr(upbit_async, "get_json", fake_get_json)
+    monkeypatch.setattr(upbit_async.asyncio, "sleep", no_sleep)
+    resp = asyncio.run(AsyncUpbit("access", "s" * 32).buy_market_order("KRW-BTC", 10000))
+    return resp, calls
+
+
+def test_order_timeout_reconciles_by_identifier_without_resending(monkeypatch):
+    orders = {}
+
+    async def post(data):
+        # 거래소는 접수했는데 응답이 끊긴 경우
+        orders[data["identifier"]] = {"uuid": "u-1", "identifier": data["identifier"]}
+        raise httpx.ReadTimeout("timed out")
+
+    resp, calls = _run(monkeypatch, post, orders)
+    assert resp["uuid"] == "u-1"
+    assert calls == {"post": 1, "get": 1}
+
+
+def test_order_not_found_after_timeout_is_not_placed(monkeypatch):
+    async def post(data):
+        raise httpx.ConnectError("refused")
+
+    resp, calls = _run(monkeypatch, post, {})
+    assert resp is None
+    assert calls == {"post": 1, "get": 3}
+
+
+def _cancel_waiter(monkeypatch, post, orders):
+    """주문을 기다리던 task를 POST 도중 취소하고, 남은 POST/확인이 끝날 때까지 루프를 돌림"""
+    calls = {"post": 0, "get": 0}
+
+    async def fake_request(method, url, **kw):
+        calls["post"] += 1
+        return await post(kw["json"])
+
+    async def fake_get_json(url, params=None, **kw):
+        calls["get"] += 1
+        order = orders.get(params["identifier"])
+        if order is None:
+            raise httpx.HTTPStatusError("not found", request=httpx.Request("GET", url),
+                                        response=httpx.Response(404))
+        return order
+
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(upbit_async, "request", fake_request)
+    monkeypatch.setattr(upbit_async, "get_json", fake_get_json)
+
+    async def main():
+        # _reconcile의 대기만 0으로(가짜 POST의 지연은 real_sleep)
+        monkeypatch.setattr(upbit_async.asyncio, "sleep", lambda _: real_sleep(0))
+        task = asyncio.ensure_future(AsyncUpbit("access", "s" * 32).sell_market_order("KRW-BTC", 0.1))
+        await real_sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            cancelled = True
+        else:
+            cancelled = False
+        await real_sleep(0.1)
+        while upbit_async._background:
+            await real_sleep(0.01)
+        return cancelled
+
+    return asyncio.run(main()), calls
+
+
+def test_cancelled_waiter_logs_late_order(monkeypatch, capsys):
+    real_sleep = asyncio.sleep
+
+    async def post(data):
+        await real_sleep(0.05)
+        return httpx.Response(201, json={"uuid": "u-late", "identifier": data["identifier"]},
+                              request=httpx.Request("POST", "https://api.upbit.com/v1/orders"))
+
+    cancelled, calls = _cancel_waiter(monkeypatch, post, {})
+    out = capsys.readouterr().out
+    assert cancelled                                   # 취소는 그대로 전파
+    assert calls == {"post": 1, "get": 0}              # POST는 끝까지, 재전송 없음
+    assert "[ORDER CANCELLED]" in out
+    assert "[ORDER AFTER CANCEL] placed: KRW-BTC ask u-late" in out
+
+
+def test_cancelled_waiter_reconciles_unknown_result(monkeypatch, capsys):
+    real_sleep = asyncio.sleep
+    orders = {}
+
+    async def post(data):
+        await real_sleep(0.05)
+        orders[data["identifier"]] = {"uuid": "u-2", "identifier": data["identifier"]}
+        raise httpx.ReadTimeout("timed out")
+
+    cancelled, calls = _cancel_waiter(monkeypatch, post, orders)
+    out = capsys.readouterr().out
+    assert cancelled
+    assert calls == {"post": 1, "get": 1}
+    assert "[ORDER RECONCILED]" in out and "u-2" in out
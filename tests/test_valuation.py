@@ -0,0 +1,74 @@
+import time
+
+import pyupbit
+
+from utils.valuation import QuoteCache, holdings, value_portfolio
+
+
+def test_batch_miss_falls_back_to_trade_price_and_ttl_reuses(monkeypatch):
+    calls = []
+
+    def fake_current_price(ticker):
+        calls.append(ticker)
+        if isinstance(ticker, list):
+            return {"KRW-BTC": 100.0}          # 일괄 조회에서 KRW-ETH가 빠짐
+        return {"KRW-ETH": 10.0}[ticker]
+
+    def no_orderbook(*args, **kwargs):
+        raise AssertionError("valuation must not mix in orderbook asks")
+
+    monkeypatch.setattr(pyupbit, "get_current_price", fake_current_price)
+    monkeypatch.setattr(pyupbit, "get_orderbook", no_orderbook)
+
+    cache = QuoteCache(ttl_seconds=60)
+    quotes = cache.get_many(["KRW-BTC", "KRW-ETH"])
+    assert {t: q[0] for t, q in quotes.items()} == {"KRW-BTC": 100.0, "KRW-ETH": 10.0}
+    assert calls == [["KRW-BTC", "KRW-ETH"], "KRW-ETH"]
+
+    cache.get_many(["KRW-BTC", "KRW-ETH"])
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 2
+
+
+def test_expired_quote_is_refetched(monkeypatch):
+    monkeypatch.setattr(pyupbit, "get_current_price", lambda t: 5.0)
+    cache = QuoteCache(ttl_seconds=5)
+    cache.put_many({"KRW-XRP": 1.0}, at=time.time() - 10)
+
+    assert cache.get_many(["KRW-XRP"])["KRW-XRP"][0] == 5.0
+    assert cache.stats()["batch_calls"] == 1
+
+
+def test_value_portfolio_reports_unpriced():
+    balances = [
+        {"currency": "KRW", "balance": "1000", "locked": "0"},
+        {"currency": "BTC", "balance": "0.5", "locked": "0.5"},
+        {"currency": "ETH", "balance": "2", "locked": "0"},
+    ]
+    krw, qty = holdings(balances)
+    v = value_portfolio(balances, {"KRW-BTC": (100.0, time.time())}, qty, krw)
+
+    assert v.total_equity == 1100.0
+    assert v.priced == 1
+    assert v.unpriced == ["KRW-ETH"]
+
+
+def test_valuate_skips_holdings_outside_krw_markets(monkeypatch):
+    from utils.valuation import valuate
+
+    asked = []
+
+    def fake_current_price(ticker):
+        asked.append(ticker)
+        return {"KRW-BTC": 100.0} if isinstance(ticker, list) else 100.0
+
+    monkeypatch.setattr(pyupbit, "get_current_price", fake_current_price)
+    balances = [
+        {"currency": "KRW", "balance": "1000", "locked": "0"},
+        {"currency": "BTC", "balance": "1", "locked": "0"},
+        {"currency": "DEAD", "balance": "5", "locked": "0"},     # 상장폐지
+    ]
+    v = valuate(balances, {"KRW-BTC", "KRW-ETH"}, cache=QuoteCache(ttl_seconds=60))
+
+    assert asked == ["KRW-BTC"]
+    assert v.total_equity == 1100.0 and v.unpriced == []
@@ -2,7 +2,7 @@ from .get_fear import get_fear_greed_index
 from .get_reflection import generate_reflection, get_recent_trades, trades_df_to_records
 from .get_vid import get_vid_script
 from .rss import fetch_rss_news
-from .get_price import get_price
+from .get_price import get_price, get_prices
 
 __all__ = [
     "get_fear_greed_index",
@@ -12,4 +12,5 @@ __all__ = [
     "get_vid_script",
     "fetch_rss_news",
     "get_price",
+    "get_prices",
 ]
@@ -0,0 +1,80 @@
+# utils/aio_http.py
+import asyncio
+import os
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+
+# 호스트별 동시 연결 수(업비트는 rate limiter로 한 번 더 제한)
+HOST_LIMITS = {
+    "api.upbit.com": int(os.getenv("AIO_LIMIT_UPBIT", "8")),
+    "api.alternative.me": int(os.getenv("AIO_LIMIT_FNG", "2")),
+}
+DEFAULT_HOST_LIMIT = int(os.getenv("AIO_HOST_LIMIT", "4"))
+DEFAULT_TIMEOUT = float(os.getenv("AIO_TIMEOUT_SECONDS", "10"))
+
+_lock = threading.Lock()
+_clients: dict[int, httpx.AsyncClient] = {}
+_sems: dict[tuple, asyncio.Semaphore] = {}
+
+
+def get_http() -> httpx.AsyncClient:
+    """이벤트 루프별 공용 httpx.AsyncClient(keep-alive 풀 공유)"""
+    loop_id = id(asyncio.get_running_loop())
+    with _lock:
+        client = _clients.get(loop_id)
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30),
+                timeout=DEFAULT_TIMEOUT,
+                follow_redirects=True,
+            )
+            _clients[loop_id] = client
+        return client
+
+
+def _host_sem(host: str) -> asyncio.Semaphore:
+    key = (id(asyncio.get_running_loop()), host)
+    with _lock:
+        sem = _sems.get(key)
+        if sem is None:
+            sem = asyncio.Semaphore(HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT))
+            _sems[key] = sem
+        return sem
+
+
+async def request(method: str, url: str, *, timeout: float | None = None, limiter=None, cancel: bool = True,
+                  **kwargs) -> httpx.Response:
+    """
+    호스트별 동시 연결 제한 + (선택) 토큰 버킷 + 전체 timeout.
+    - timeout 안에 안 끝나면 요청 코루틴을 취소하고 TimeoutError
+    - cancel=False면 전체 timeout으로 취소하지 않음(주문처럼 멱등이 아닌 요청, httpx 단계별 timeout만)
+    - 4xx/5xx는 httpx.HTTPStatusError
+    """
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    async with _host_sem(urlsplit(url).hostname or ""):
+        if limiter is not None:
+            await limiter.acquire_async()
+        if cancel:
+            resp = await asyncio.wait_for(get_http().request(method, url, **kwargs), timeout)
+        else:
+            resp = await get_http().request(method, url, **kwargs)
+    resp.raise_for_status()
+    return resp
+
+
+async def get_json(url: str, **kwargs):
+    return (await request("GET", url, **kwargs)).json()
+
+
+async def aclose():
+    """현재 루프의 클라이언트 닫기(루프 종료 전에 호출)"""
+    loop = asyncio.get_running_loop()
+    loop_id = id(loop)
+    with _lock:
+        client = _clients.pop(loop_id, None)
+        for key in [k for k in _sems if k[0] == loop_id]:
+            del _sems[key]
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,170 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyupbit
+
+from .ohlcv_cache import OHLCV_CACHE
+from .rate_limit import UPBIT_QUOTATION_LIMITER
+
+# pyupbit 캔들 인덱스는 KST(naive) 기준
+KST = timedelta(hours=9)
+
+# 고정 길이 캔들만 저장소 사용(month는 길이가 달라서 그대로 조회)
+INTERVAL_SECONDS = {
+    "minute1": 60,
+    "minute3": 3 * 60,
+    "minute5": 5 * 60,
+    "minute10": 10 * 60,
+    "minute15": 15 * 60,
+    "minute30": 30 * 60,
+    "minute60": 60 * 60,
+    "minute240": 240 * 60,
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+}
+
+COLUMNS = ["open", "high", "low", "close", "volume", "value"]
+
+
+def now_kst() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None) + KST
+
+
+class CandleStore:
+    """
+    (ticker, interval, candle_open) 키의 로컬 SQLite OHLCV 저장소.
+    - get_ohlcv()는 pyupbit.get_ohlcv와 같은 모양의 DataFrame 반환
+    - 마지막 저장 캔들 이후 분량만 거래소에 요청(마지막 캔들은 진행 중일 수 있어 다시 받음)
+    - 저장분이 count보다 적으면 전체 구간을 한 번 받아서 채움
+    """
+
+    def __init__(self, db_path: str | None = None, keep_rows: int = 2000):
+        self.db_path = db_path or os.getenv("CANDLE_DB_PATH", "candles.db")
+        self.keep_rows = keep_rows
+        self._lock = threading.Lock()
+
+        # 유동성 스캔이 스레드 풀에서 호출하므로 커넥션 하나를 락으로 보호
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS candles (
+                ticker TEXT,
+                interval TEXT,
+                candle_open TEXT,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL,
+                volume REAL,
+                value REAL,
+                PRIMARY KEY (ticker, interval, candle_open)
+            )
+        """)
+        self.conn.commit()
+
+        # 통계: 거래소 요청 수 / 받아온 캔들 수
+        self.requests = 0
+        self.fetched_rows = 0
+
+    def _last_open(self, ticker: str, interval: str):
+        with self._lock:
+            last, stored = self.conn.execute(
+                "SELECT MAX(candle_open), COUNT(*) FROM candles WHERE ticker = ? AND interval = ?",
+                (ticker, interval),
+            ).fetchone()
+        return (datetime.fromisoformat(last) if last else None), int(stored or 0)
+
+    def _upsert(self, ticker: str, interval: str, df: pd.DataFrame):
+        rows = [
+            (ticker, interval, ts.isoformat(sep=" "), *(float(r[c]) for c in COLUMNS))
+            for ts, r in df[COLUMNS].iterrows()
+        ]
+        with self._lock:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO candles
+                (ticker, interval, candle_open, open, high, low, close, volume, value)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+            # 오래된 캔들 정리(티커/인터벌당 keep_rows개 유지)
+            self.conn.execute("""
+                DELETE FROM candles
+                WHERE ticker = ? AND interval = ? AND candle_open < (
+                    SELECT candle_open FROM candles
+                    WHERE ticker = ? AND interval = ?
+                    ORDER BY candle_open DESC LIMIT 1 OFFSET ?
+                )
+            """, (ticker, interval, ticker, interval, self.keep_rows - 1))
+            self.conn.commit()
+
+    def read(self, ticker: str, interval: str, count: int) -> pd.DataFrame:
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT candle_open, open, high, low, close, volume, value
+                FROM candles
+                WHERE ticker = ? AND interval = ?
+                ORDER BY candle_open DESC
+                LIMIT ?
+            """, (ticker, interval, count)).fetchall()
+
+        rows.reverse()
+        index = pd.to_datetime([r[0] for r in rows])
+        return pd.DataFrame([r[1:] for r in rows], index=index, columns=COLUMNS)
+
+    def get_ohlcv(self, ticker: str, interval: str = "day", count: int = 200, limiter=UPBIT_QUOTATION_LIMITER):
+        """
+        pyupbit.get_ohlcv 대체. 조회 실패 시 pyupbit처럼 None/empty를 그대로 반환(재시도는 호출자 몫)
+        """
+        secs = INTERVAL_SECONDS.get(interval)
+        if secs is None:
+            if limiter is not None:
+                limiter.acquire()
+            return pyupbit.get_ohlcv(ticker, interval=interval, count=count)
+
+        last, stored = self._last_open(ticker, interval)
+        if last is None or stored < count:
+            need = count
+        else:
+            elapsed = int((now_kst() - last).total_seconds() // secs)
+            need = min(count, elapsed + 1)
+
+        if limiter is not None:
+            limiter.acquire()
+        df = pyupbit.get_ohlcv(ticker, interval=interval, count=need)
+        fetched = 0 if df is None else len(df)
+        with self._lock:
+            self.requests += 1
+            self.fetched_rows += fetched
+        if df is None or df.empty:
+            return df
+
+        self._upsert(ticker, interval, df)
+        return self.read(ticker, interval, count)
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> CandleStore:
+    """프로세스 기본 저장소(첫 호출 시 생성)"""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = CandleStore()
+        return _STORE
+
+
+def get_ohlcv(ticker: str, interval: str = "day", count: int = 200, limiter=UPBIT_QUOTATION_LIMITER, use_cache: bool = True):
+    """
+    기본 조회 경로: 캔들 경계 캐시 → 로컬 저장소(델타 동기화) → 거래소
+    - 같은 캔들 구간 안에서 같은 (ticker, interval, count) 재조회는 REST 호출 없이 반환
+    """
+    def fetch():
+        return get_store().get_ohlcv(ticker, interval=interval, count=count, limiter=limiter)
+
+    if not use_cache:
+        return fetch()
+    return OHLCV_CACHE.get(ticker, interval, count, fetch)
@@ -0,0 +1,91 @@
+import copy
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class Node:
+    """
+    DAG 노드 하나.
+    - fn은 deps 이름을 키워드 인자로 받음: fn(**{dep: result})
+    - 실패하거나 timeout 안에 안 끝나면 fallback 값(복사본)을 결과로 씀
+    """
+    name: str
+    fn: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    fallback: Any = None
+    label: str = ""
+    after: Optional[Callable[[Any], None]] = field(default=None, repr=False)  # 결과 나온 뒤 로그용 훅
+
+
+def run_dag(nodes: List[Node], max_workers: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    의존성이 풀린 노드부터 스레드풀에서 동시에 실행.
+    - 반환: (이름 → 결과, 이름 → 노드 실행 시간)
+    - timeout 난 노드의 스레드는 멈출 수 없으므로 결과만 버리고 기다리지 않음
+    """
+    by_name = {n.name: n for n in nodes}
+    for n in nodes:
+        missing = [d for d in n.deps if d not in by_name]
+        if missing:
+            raise ValueError(f"node {n.name!r} depends on unknown nodes: {missing}")
+
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    pending = dict(by_name)
+    running = {}  # future -> (node, started)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers or max(1, len(nodes)))
+
+    def finish(node: Node, value, started: float):
+        results[node.name] = value
+        timings[node.name] = time.perf_counter() - started
+        print(f"[TIMING] {node.label or node.name}: {timings[node.name]:.3f}s")
+        if node.after is not None:
+            node.after(value)
+
+    def submit_ready():
+        for name, node in list(pending.items()):
+            if all(d in results for d in node.deps):
+                del pending[name]
+                fut = pool.submit(node.fn, **{d: results[d] for d in node.deps})
+                running[fut] = (node, time.perf_counter())
+
+    try:
+        submit_ready()
+        while running:
+            now = time.perf_counter()
+            deadlines = [s + n.timeout for n, s in running.values() if n.timeout is not None]
+            wait_s = max(0.0, min(deadlines) - now) if deadlines else None
+
+            done, _ = wait(list(running), timeout=wait_s, return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                node, started = running.pop(fut)
+                try:
+                    value = fut.result()
+                except Exception as e:
+                    print(f"[WARN] {node.name} failed:", repr(e))
+                    print("".join(traceback.format_exception(type(e), e, e.__traceback__)))
+                    value = copy.copy(node.fallback)
+                finish(node, value, started)
+
+            now = time.perf_counter()
+            for fut, (node, started) in list(running.items()):
+                if node.timeout is not None and now - started >= node.timeout:
+                    running.pop(fut)
+                    print(f"[WARN] {node.name} timed out after {node.timeout:.1f}s -> fallback")
+                    finish(node, copy.copy(node.fallback), started)
+
+            submit_ready()
+
+        if pending:
+            raise ValueError(f"dependency cycle among nodes: {sorted(pending)}")
+        return results, timings
+
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -1,14 +1,30 @@
 import sqlite3
+from contextlib import closing, contextmanager
 from datetime import datetime
 
 class DataBase:
+    """
+    호출마다 연결을 새로 열고 닫음(스케줄러 스레드에서 불러도 됨).
+    sqlite3 연결은 만든 스레드에서만 쓸 수 있어서 연결을 들고 있지 않음
+    """
+
     def __init__(self, db_path='bitcoin_trades.db'):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn_cursor = self.conn.cursor()
 
+        with self._cursor() as cur:
+            self._create_tables(cur)
+            self._ensure_columns(cur)
+
+    @contextmanager
+    def _cursor(self):
+        """연결 1개 열고 cursor 반환, 끝나면 commit 후 닫기(예외면 rollback)"""
+        with closing(self.get_db_connection()) as conn:
+            with conn:
+                yield conn.cursor()
+
+    def _create_tables(self, cur):
         # 유동성 스캔 테이블
-        self.conn_cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS liquidity_scans (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp TEXT,
@@ -22,7 +38,7 @@ class DataBase:
         """)
 
         # 거래 로그 테이블 (범용 자산 구조)
-        self.conn_cursor.execute("""
+        cur.execute("""
             CREATE TABLE IF NOT EXISTS trades (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp TEXT,
@@ -39,15 +55,12 @@ class DataBase:
             )
         """)
 
-        self.conn.commit()
-        self._ensure_columns()
-
     def get_db_connection(self, db_path=None):
-        return sqlite3.connect(db_path or self.db_path)
+        return sqlite3.connect(db_path or self.db_path, timeout=30)
 
-    def _ensure_columns(self):
-        self.conn_cursor.execute("PRAGMA table_info(trades)")
-        cols = {row[1] for row in self.conn_cursor.fetchall()}
+    def _ensure_columns(self, cur):
+        cur.execute("PRAGMA table_info(trades)")
+        cols = {row[1] for row in cur.fetchall()}
 
         for col, sql in {
             "coin_name": "ALTER TABLE trades ADD COLUMN coin_name TEXT",
@@ -58,21 +71,19 @@ class DataBase:
             "profit": "ALTER TABLE trades ADD COLUMN profit REAL",
         }.items():
             if col not in cols:
-                self.conn_cursor.execute(sql)
-
-        self.conn.commit()
+                cur.execute(sql)
 
     def log_liquidity_scan(self, results, row_fn):
         ts = datetime.now().isoformat()
-        rows = [row_fn(ts, t, s) for t, s in results]
-
-        self.conn_cursor.executemany("""
-            INSERT INTO liquidity_scans
-            (timestamp, coin_name, score, listing_days, pump_ratio, min_turnover, max_daily_ret)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, rows)
+        self.insert_liquidity_rows([row_fn(ts, t, s) for t, s in results])
 
-        self.conn.commit()
+    def insert_liquidity_rows(self, rows):
+        with self._cursor() as cur:
+            cur.executemany("""
+                INSERT INTO liquidity_scans
+                (timestamp, coin_name, score, listing_days, pump_ratio, min_turnover, max_daily_ret)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
 
     def get_liq_cand(self, limit=20):
         sql = """
@@ -82,37 +93,35 @@ class DataBase:
         ORDER BY score DESC
         LIMIT ?
         """
-        rows = self.conn_cursor.execute(sql, (limit,)).fetchall()
+        with self._cursor() as cur:
+            rows = cur.execute(sql, (limit,)).fetchall()
         return [r[0] for r in rows] if rows else []
 
 
     def log_trade(self, decision, percentage, reason,
                 coin_name, asset_balance, krw_balance,
                 asset_avg_buy_price, asset_krw_price,
-                equity_now=None, profit=None):
-        timestamp = datetime.now().isoformat()
-
-        self.conn_cursor.execute("""
-            INSERT INTO trades
-            (timestamp, coin_name, decision, percentage, reason,
-            asset_balance, krw_balance,
-            asset_avg_buy_price, asset_krw_price,
-            equity_now, profit)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            timestamp,
-            coin_name,
-            decision,
-            int(percentage),
-            reason,
-            float(asset_balance),
-            float(krw_balance),
-            float(asset_avg_buy_price),
-            float(asset_krw_price),
-            float(equity_now) if equity_now is not None else None,
-            float(profit) if profit is not None else None
-        ))
-
-        self.conn.commit()
-
-
+                equity_now=None, profit=None, timestamp=None):
+        timestamp = timestamp or datetime.now().isoformat()
+
+        with self._cursor() as cur:
+            cur.execute("""
+                INSERT INTO trades
+                (timestamp, coin_name, decision, percentage, reason,
+                asset_balance, krw_balance,
+                asset_avg_buy_price, asset_krw_price,
+                equity_now, profit)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                timestamp,
+                coin_name,
+                decision,
+                int(percentage),
+                reason,
+                float(asset_balance),
+                float(krw_balance),
+                float(asset_avg_buy_price),
+                float(asset_krw_price),
+                float(equity_now) if equity_now is not None else None,
+                float(profit) if profit is not None else None
+            ))
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+
+from .prompt_encoder import num
+
+
+def _h(x) -> str:
+    return hashlib.sha1(str(x or "").encode("utf-8")).hexdigest()[:12]
+
+
+def _f(x):
+    try:
+        x = float(x)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(x) or math.isinf(x) else x
+
+
+def _price_state(coin_price) -> dict:
+    """
+    마지막 캔들 지표를 노이즈 수준으로 양자화.
+    - close: 유효숫자 3자리(≈0.1~1%)
+    - rsi: 5 단위, bb %b: 0.1 단위, macd_diff/ema-sma: 부호만
+    """
+    if not isinstance(coin_price, list) or not coin_price:
+        return {"raw": num(_f(coin_price), 3) if _f(coin_price) is not None else _h(coin_price)}
+
+    last = coin_price[-1]
+    close = _f(last.get("close"))
+    state = {"close": num(close, 3) if close is not None else None}
+
+    rsi = _f(last.get("rsi"))
+    state["rsi"] = None if rsi is None else int(rsi // 5) * 5
+
+    hi, lo = _f(last.get("bb_bbh")), _f(last.get("bb_bbl"))
+    if close is not None and hi is not None and lo is not None and hi > lo:
+        state["bb_pb"] = round((close - lo) / (hi - lo), 1)
+
+    diff = _f(last.get("macd_diff"))
+    state["macd"] = None if diff is None else (diff > 0) - (diff < 0)
+
+    ema, sma = _f(last.get("ema_12")), _f(last.get("sma_20"))
+    if ema is not None and sma is not None:
+        state["trend"] = (ema > sma) - (ema < sma)
+
+    return state
+
+
+def _news_ids(news) -> list:
+    if not isinstance(news, list):
+        return [_h(news)]
+    return sorted(_h(it.get("link") or it.get("title")) for it in news if isinstance(it, dict))
+
+
+# 재사용해도 되는 결정: fingerprint에는 보유 포지션/잔고가 없어서 buy/sell을 재사용하면
+# 같은 주문이 새로 다시 나감(이미 산 코인 추가 매수, 이미 판 코인 재매도). hold는 주문이 없어서 안전
+CACHEABLE_DECISIONS = frozenset({"hold"})
+
+
+def decision_fingerprint(informs: dict) -> str:
+    """양자화한 informs(지표/FNG 구간/뉴스 ID/reflection·transcript 해시)의 해시"""
+    fng = _f(informs.get("fear_greed_index"))
+    state = {
+        "coin": informs.get("coin_name", ""),
+        "price": _price_state(informs.get("coin_price")),
+        "fng": None if fng is None else int(fng // 10),
+        "news": _news_ids(informs.get("news")),
+        "reflection": _h(informs.get("reflection")),
+        "transcript": _h(informs.get("youtube_transcript")),
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """
+    시장 상태 fingerprint → 결정(dict) 캐시. SQLite에 저장해서 재시작 후에도 유지.
+    - ttl_seconds가 지난 항목은 미스 처리 후 삭제
+    - max_entries 초과 시 가장 오래 안 쓴 항목부터 삭제(LRU)
+    - hold만 저장/반환(CACHEABLE_DECISIONS). buy/sell은 매번 LLM이 다시 결정
+    """
+
+    def __init__(self, db_path: str = "decision_cache.db", ttl_seconds: float = 3600, max_entries: int = 1000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # decide_batch 워커 스레드에서 같이 씀
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS decision_cache (
+                key TEXT PRIMARY KEY,
+                decision TEXT,
+                created REAL,
+                last_used REAL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT decision, created FROM decision_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            decision = None if row is None else json.loads(row[0])
+            if row is None or now - row[1] > self.ttl_seconds or not self.cacheable(decision):
+                if row is not None:
+                    self.conn.execute("DELETE FROM decision_cache WHERE key = ?", (key,))
+                    self.conn.commit()
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE decision_cache SET last_used = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            return decision
+
+    @staticmethod
+    def cacheable(decision: dict) -> bool:
+        return str(decision.get("decision", "")).strip().lower() in CACHEABLE_DECISIONS
+
+    def put(self, key: str, decision: dict):
+        """hold가 아니면 저장하지 않음(이전에 저장된 같은 key도 지움)"""
+        now = time.time()
+        if not self.cacheable(decision):
+            with self._lock:
+                self.conn.execute("DELETE FROM decision_cache WHERE key = ?", (key,))
+                self.conn.commit()
+            return
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO decision_cache (key, decision, created, last_used)
+                VALUES (?, ?, ?, ?)
+            """, (key, json.dumps(decision, ensure_ascii=False), now, now))
+
+            self.conn.execute("""
+                DELETE FROM decision_cache WHERE key IN (
+                    SELECT key FROM decision_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            size = self.conn.execute("SELECT COUNT(*) FROM decision_cache").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "entries": size,
+            }
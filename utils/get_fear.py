@@ -3,6 +3,46 @@ import requests
 FNG_API_BASE = "https://api.alternative.me"
 FNG_ENDPOINT = "/fng/"
 
+FNG_SOURCE = "Alternative.me (https://alternative.me) / API: https://api.alternative.me/fng/"
+
+
+def _parse_fng(payload: dict) -> dict:
+    if payload.get("metadata", {}).get("error") is not None:
+        raise RuntimeError(f"Alternative.me API error: {payload['metadata']['error']}")
+
+    data = payload.get("data", [])
+    if not data:
+        raise RuntimeError("Alternative.me API returned empty data")
+
+    latest = data[0]
+
+    return {
+        "name": payload.get("name", "Fear and Greed Index"),
+        "value": latest.get("value"),
+        "value_classification": latest.get("value_classification"),
+        "timestamp": latest.get("timestamp"),
+        "time_until_update": latest.get("time_until_update", None),
+        "source": FNG_SOURCE,
+    }
+
+
+def _fng_error(e: Exception) -> dict:
+    error_result = {
+        "name": "Fear and Greed Index",
+        "value": None,
+        "value_classification": None,
+        "timestamp": None,
+        "time_until_update": None,
+        "source": FNG_SOURCE,
+        "error": str(e),
+    }
+
+    # ===== 에러 출력도 함수 내부에서 처리 =====
+    print(f"[FNG] (Source: {error_result['source']}) Fetch failed: {error_result['error']}")
+
+    return error_result
+
+
 def get_fear_greed_index(
     FNG_API_BASE=FNG_API_BASE,
     FNG_ENDPOINT=FNG_ENDPOINT,
@@ -19,43 +59,38 @@ def get_fear_greed_index(
     try:
         r = requests.get(url, params=params, timeout=10)
         r.raise_for_status()
-        payload = r.json()
+        return _parse_fng(r.json())
+    except Exception as e:
+        return _fng_error(e)
+
 
-        if payload.get("metadata", {}).get("error") is not None:
-            raise RuntimeError(f"Alternative.me API error: {payload['metadata']['error']}")
+async def aget_fear_greed_index(
+    FNG_API_BASE=FNG_API_BASE,
+    FNG_ENDPOINT=FNG_ENDPOINT,
+    limit: int = 1,
+    date_format: str = "kr",
+    timeout: float = 10.0,
+):
+    """get_fear_greed_index의 asyncio 버전(같은 반환 형태, 실패 시 에러 dict)"""
+    from .aio_http import get_json
 
-        data = payload.get("data", [])
-        if not data:
-            raise RuntimeError("Alternative.me API returned empty data")
+    try:
+        payload = await get_json(f"{FNG_API_BASE}{FNG_ENDPOINT}",
+                                 params={"limit": limit, "date_format": date_format}, timeout=timeout)
+        return _parse_fng(payload)
+    except Exception as e:
+        return _fng_error(e)
 
-        latest = data[0]
+def fng_ttl_seconds(result: dict):
+    """응답의 time_until_update(초) → 캐시 TTL(없으면 None → 기본 TTL)"""
+    t = (result or {}).get("time_until_update")
+    return None if t in (None, "") else float(t)
 
-        result = {
-            "name": payload.get("name", "Fear and Greed Index"),
-            "value": latest.get("value"),
-            "value_classification": latest.get("value_classification"),
-            "timestamp": latest.get("timestamp"),
-            "time_until_update": latest.get("time_until_update", None),
-            "source": "Alternative.me (https://alternative.me) / API: https://api.alternative.me/fng/",
-        }
 
-        return result
+def fng_is_valid(result: dict) -> bool:
+    # 실패 시에도 에러 dict를 돌려주므로 value로 판별
+    return bool(result) and result.get("value") is not None
 
-    except Exception as e:
-        error_result = {
-            "name": "Fear and Greed Index",
-            "value": None,
-            "value_classification": None,
-            "timestamp": None,
-            "time_until_update": None,
-            "source": "Alternative.me (https://alternative.me) / API: https://api.alternative.me/fng/",
-            "error": str(e),
-        }
-
-        # ===== 에러 출력도 함수 내부에서 처리 =====
-        print(f"[FNG] (Source: {error_result['source']}) Fetch failed: {error_result['error']}")
-
-        return error_result
 
 if __name__ == "__main__":
     get_fear_greed_index()
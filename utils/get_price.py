@@ -1,9 +1,13 @@
-import pyupbit
 from ta.utils import dropna
 import ta
 import os
 from dotenv import load_dotenv
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from . import resample
+from . import stream_ind
 
 def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
     indicator_bb = ta.volatility.BollingerBands(close=df['close'], window=20, window_dev=2)
@@ -23,15 +27,45 @@ def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
-def get_price(coin_name: str, *, tail: int = 10) -> list[dict]:
-    df_hourly = pyupbit.get_ohlcv(coin_name, interval="minute60", count=24)
-    if df_hourly is None or df_hourly.empty:
-        return []
+def add_indicators_panel(close: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    add_indicators와 같은 식을 (캔들 위치 × 티커) 종가 패널 전체에 한 번에 적용.
+    - 티커별 시계열은 오른쪽 정렬, 모자란 앞쪽은 NaN (rolling/ewm이 티커별로 독립 계산됨)
+    - 반환: {지표 컬럼명: 같은 모양의 DataFrame}
+    """
+    out = {}
 
-    df_hourly = dropna(df_hourly)
-    df_hourly = add_indicators(df_hourly)
+    mavg = close.rolling(20, min_periods=20).mean()
+    mstd = close.rolling(20, min_periods=20).std(ddof=0)
+    out["bb_bbm"] = mavg
+    out["bb_bbh"] = mavg + 2 * mstd
+    out["bb_bbl"] = mavg - 2 * mstd
+
+    # ta RSI: 첫 diff(NaN)는 0.0으로 들어가므로, 패딩 구간만 NaN으로 되돌려서 ewm 시작점을 맞춤
+    diff = close.diff(1)
+    up = diff.where(diff > 0, 0.0).where(close.notna())
+    dn = (-diff.where(diff < 0, 0.0)).where(close.notna())
+    emaup = up.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    emadn = dn.ewm(alpha=1 / 14, min_periods=14, adjust=False).mean()
+    rsi = 100 - (100 / (1 + emaup / emadn))
+    out["rsi"] = rsi.mask(emadn == 0, 100.0)
+
+    macd = (
+        close.ewm(span=12, min_periods=12, adjust=False).mean()
+        - close.ewm(span=26, min_periods=26, adjust=False).mean()
+    )
+    signal = macd.ewm(span=9, min_periods=9, adjust=False).mean()
+    out["macd"] = macd
+    out["macd_signal"] = signal
+    out["macd_diff"] = macd - signal
 
-    safe = df_hourly.tail(tail).copy()
+    out["sma_20"] = mavg
+    out["ema_12"] = close.ewm(span=12, min_periods=12, adjust=False).mean()
+
+    return out
+
+def _to_records(df: pd.DataFrame, tail: int) -> list[dict]:
+    safe = df.tail(tail).copy()
     safe = safe.where(pd.notnull(safe), None)
 
     safe = safe.reset_index().rename(columns={"index": "timestamp"})
@@ -42,6 +76,85 @@ def get_price(coin_name: str, *, tail: int = 10) -> list[dict]:
 
     return safe.to_dict(orient="records")
 
+def _engine(engine):
+    # 명시하지 않으면 INDICATOR_STREAMING=1일 때만 스트리밍 엔진
+    if engine is not None:
+        return engine
+    return stream_ind.INDICATOR_ENGINE if stream_ind.STREAMING_ENABLED else None
+
+def get_price(coin_name: str, *, tail: int = 10, engine=None) -> list[dict]:
+    """
+    - 기본: 24개 윈도우에 ta로 전체 재계산(baseline과 같은 값, 예: MACD slow=26은 NaN)
+    - engine(또는 INDICATOR_STREAMING=1): 스트리밍 지표 엔진(새 캔들만 O(1) 반영).
+      첫 호출 이후의 캔들 이력까지 이어서 계산하므로 EMA/MACD가 윈도우 재계산과 다름
+    """
+    interval = "minute60"
+    df_hourly = resample.get_ohlcv(coin_name, interval=interval, count=24)
+    if df_hourly is None or df_hourly.empty:
+        return []
+
+    df_hourly = dropna(df_hourly)
+    engine = _engine(engine)
+    if engine is None:
+        df_hourly = add_indicators(df_hourly)
+    else:
+        df_hourly = engine.apply(coin_name, interval, df_hourly)
+
+    return _to_records(df_hourly, tail)
+
+def get_prices(tickers: list[str], *, tail: int = 10, max_workers: int = 8, engine=None) -> dict[str, list[dict]]:
+    """
+    여러 티커 get_price를 한 번에(get_price와 같은 값).
+    - 캔들 조회는 스레드 풀로 동시에(base 봉 집계 → 캔들 저장소 + 공용 rate limiter 경유)
+    - 지표는 티커들을 쌓은 종가 패널에 한 번에 계산(add_indicators와 같은 값)
+    - 스트리밍 엔진을 쓰면(get_price와 같은 조건) 티커별로 엔진에 반영
+    - 반환: {ticker: get_price와 같은 records}. 조회 실패 티커는 []
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+
+    def fetch(t):
+        try:
+            df = resample.get_ohlcv(t, interval="minute60", count=24)
+        except Exception as e:
+            print(f"[WARN] get_prices fetch failed: {t} {e!r}")
+            return None
+        if df is None or df.empty:
+            return None
+        return dropna(df)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as pool:
+        frames = dict(zip(tickers, pool.map(fetch, tickers)))
+
+    ok = {t: df for t, df in frames.items() if df is not None and not df.empty}
+    result = {t: [] for t in tickers}
+    if not ok:
+        return result
+
+    engine = _engine(engine)
+    if engine is not None:
+        for t, df in ok.items():
+            result[t] = _to_records(engine.apply(t, "minute60", df), tail)
+        return result
+
+    # (캔들 위치 × 티커) 종가 패널, 오른쪽 정렬
+    n = max(len(df) for df in ok.values())
+    panel = np.full((n, len(ok)), np.nan)
+    for j, df in enumerate(ok.values()):
+        panel[n - len(df):, j] = df["close"].to_numpy(dtype=float)
+    close = pd.DataFrame(panel, columns=list(ok))
+
+    indicators = add_indicators_panel(close)
+
+    for t, df in ok.items():
+        df = df.copy()
+        for col, frame in indicators.items():
+            df[col] = frame[t].to_numpy()[n - len(df):]
+        result[t] = _to_records(df, tail)
+
+    return result
+
 
 if __name__ == "__main__":
     load_dotenv()
@@ -1,13 +1,23 @@
+import hashlib
+import json
 import os
+import threading
 import time
 import traceback
 from datetime import datetime, timedelta
 
 import pandas as pd
-from openai import OpenAI
 
 from .db_utils import DataBase
-from .llm_lock import LLM_CALL_LOCK  # ✅ 추가
+from .llm_client import client_for
+from .llm_metrics import LLM_METRICS
+from .llm_sched import LLM_SCHEDULER, PRIORITY_REFLECTION
+from .prompt_encoder import num
+
+EMPTY_WINDOW_REFLECTION = "No trades in the last window; reflection skipped."
+
+# 시장 상태 키에서 빼는 값(매 호출마다 바뀌지만 판단과 무관)
+_VOLATILE_KEYS = {"timestamp", "time_until_update"}
 
 
 def trades_df_to_records(trades_df: pd.DataFrame, tail: int = 30) -> list[dict]:
@@ -56,22 +66,110 @@ def calculate_performance(trades_df: pd.DataFrame) -> float:
     return (final_equity - initial_equity) / initial_equity * 100.0
 
 
-def generate_reflection(trades_df: pd.DataFrame, current_market_data) -> str:
-    base_url = os.getenv("LOCAL_OPENAI_BASE_URL", "http://127.0.0.1:9000/v1")
-    api_key = os.getenv("LOCAL_OPENAI_API_KEY", "local-token")
+def coarse_market_state(x, sig: int = 1):
+    """숫자는 유효숫자 sig자리로, dict/list는 재귀로 줄인 시장 상태(시각 관련 키 제외)"""
+    if isinstance(x, dict):
+        return {str(k): coarse_market_state(v, sig) for k, v in sorted(x.items()) if k not in _VOLATILE_KEYS}
+    if isinstance(x, (list, tuple)):
+        return [coarse_market_state(v, sig) for v in x]
+    if isinstance(x, bool) or x is None:
+        return x
+    try:
+        return num(float(x), sig)
+    except (TypeError, ValueError):
+        return str(x)
+
+
+class ReflectionCache:
+    """
+    (거래 기록 해시 + 거친 시장 상태 + 모델) → reflection 텍스트 캐시.
+    - 입력이 직전과 같으면 LLM 호출 없이 재사용
+    - 적중 시 그 결과를 만들 때 걸린 LLM 시간만큼 절약한 것으로 집계
+    """
+
+    def __init__(self, ttl_seconds: float = 1800, max_entries: int = 64):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data: dict[str, tuple[str, float, float]] = {}  # key -> (text, created, llm_seconds)
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.saved_seconds = 0.0
+        self._last = (0, 0, 0, 0.0)   # snapshot_delta() 기준점
+
+    @staticmethod
+    def key(records_json: str, market_state, model: str) -> str:
+        payload = json.dumps([records_json, market_state, model], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None or now - hit[1] > self.ttl_seconds:
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += hit[2]
+            return hit[0]
+
+    def put(self, key: str, text: str, llm_seconds: float):
+        with self._lock:
+            self._data[key] = (text, time.time(), llm_seconds)
+            while len(self._data) > self.max_entries:
+                self._data.pop(next(iter(self._data)))
+
+    def mark_skipped(self):
+        with self._lock:
+            self.skipped += 1
+            # 빈 구간 스킵은 평균 LLM 시간만큼 절약
+            if self._data:
+                self.saved_seconds += sum(v[2] for v in self._data.values()) / len(self._data)
+
+    def _counters(self) -> tuple:
+        return self.hits, self.misses, self.skipped, self.saved_seconds
+
+    def stats(self) -> dict:
+        """누적값(부작용 없음, 몇 번 불러도 같음)"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "skipped_empty": self.skipped,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+    def snapshot_delta(self) -> dict:
+        """직전 snapshot_delta() 호출 이후 증가분(사이클 집계용, 호출 기준점을 옮김)"""
+        with self._lock:
+            h, m, sk, sv = self._last
+            self._last = self._counters()
+            return {
+                "hits": self.hits - h,
+                "misses": self.misses - m,
+                "skipped_empty": self.skipped - sk,
+                "saved_seconds": round(self.saved_seconds - sv, 3),
+            }
+
+
+REFLECTION_CACHE = ReflectionCache(ttl_seconds=float(os.getenv("REFLECTION_CACHE_TTL_SECONDS", "1800")))
+
+
+def generate_reflection(trades_df: pd.DataFrame, current_market_data, cache: ReflectionCache | None = REFLECTION_CACHE) -> str:
     model = os.getenv("LOCAL_OPENAI_MODEL_REFLECTION", "stelterlab/Mistral-Small-24B-Instruct-2501-AWQ")
-    timeout_s = float(os.getenv("LOCAL_OPENAI_TIMEOUT", "60"))
 
-    # (선택) trades가 없으면 LLM 호출 스킵하고 짧게 반환
-    # if trades_df is None or trades_df.empty:
-    #     return "No trades in the last window; reflection skipped."
+    # ✅ trades가 없으면 LLM 호출 스킵하고 짧게 반환(REFLECTION_SKIP_EMPTY=0이면 기존처럼 호출)
+    if (trades_df is None or trades_df.empty) and os.getenv("REFLECTION_SKIP_EMPTY", "1") != "0":
+        if cache is not None:
+            cache.mark_skipped()
+        return EMPTY_WINDOW_REFLECTION
 
-    client = OpenAI(
-        base_url=base_url,
-        api_key=api_key,
-        max_retries=0,
-        timeout=timeout_s,
-    )
+    # 프로세스 공용 커넥션 풀(접속 설정/timeout은 utils.llm_client)
+    client = client_for("reflection")
 
     safe_df = trades_df.tail(30).copy() if trades_df is not None else pd.DataFrame()
 
@@ -88,6 +186,16 @@ def generate_reflection(trades_df: pd.DataFrame, current_market_data) -> str:
             safe_df["reason"] = safe_df["reason"].astype(str).str.slice(0, 200)
 
     performance = calculate_performance(safe_df)
+    records_json = safe_df.to_json(orient='records', force_ascii=False)
+
+    # ✅ 같은 거래 기록 + 비슷한 시장 상태면 직전 reflection 재사용
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.key(records_json, coarse_market_state(current_market_data), model)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print("[REFLECTION CACHE] hit")
+            return cached
 
     messages = [
         {
@@ -101,7 +209,7 @@ def generate_reflection(trades_df: pd.DataFrame, current_market_data) -> str:
             "role": "user",
             "content": f"""
 Recent trading data:
-{safe_df.to_json(orient='records', force_ascii=False)}
+{records_json}
 
 Current market data:
 {current_market_data}
@@ -121,16 +229,22 @@ Limit your response to 200 words or less.
 
     t0 = time.perf_counter()
     try:
-        # ✅ 핵심: 단일 GPU 큐 밀림 방지(직렬화)
-        with LLM_CALL_LOCK:
+        # ✅ 스케줄러 슬롯: 동시 요청 수 제한 + 매매 결정보다 후순위
+        #  - 짧은 응답이라 스트리밍 없이(TTFT 불필요), 지표는 전체 시간/usage만
+        with LLM_METRICS.track("reflection") as call, LLM_SCHEDULER.slot(PRIORITY_REFLECTION, "reflection"):
+            call.acquired()
             resp = client.chat.completions.create(
                 model=model,
                 messages=messages,
                 max_tokens=180,
                 temperature=0.2,
             )
+            call.done(resp)
 
         text = (resp.choices[0].message.content or "").strip()
+
+        if cache_key is not None and text:
+            cache.put(cache_key, text, time.perf_counter() - t0)
         return text
 
     except Exception as e:
@@ -152,3 +266,4 @@ if __name__ == "__main__":
     out = generate_reflection(df, market_data)
     print("[4] done")
     print(out)
+    print("[REFLECTION CACHE]", REFLECTION_CACHE.stats())
@@ -1,10 +1,16 @@
+import hashlib
+import json
 import os
+import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from youtube_transcript_api import YouTubeTranscriptApi
-from openai import OpenAI
 
-from .llm_lock import LLM_CALL_LOCK  # ✅ 단일 GPU 직렬화
+from .llm_client import client_for
+from .llm_metrics import LLM_METRICS
+from .llm_sched import LLM_SCHEDULER, PRIORITY_TRANSCRIPT  # ✅ 최저 우선순위
 
 SYSTEM_PROMPT = """You are an expert prompt engineer for trading systems.
 
@@ -20,19 +26,246 @@ Rules:
 - Output plain text only.
 """
 
+# map 단계(청크별 요약) 프롬프트
+MAP_PROMPT = """You are condensing one part of a longer YouTube transcript about trading.
+
+Extract only what matters for an investment strategy: philosophy, entry/exit logic,
+indicators used, risk management, position sizing, and time horizon.
+Write concise bullet notes. Omit greetings, ads, and repetition.
+Output plain text only.
+"""
+
 DEFAULT_MODEL = "unsloth/Mistral-Small-24B-Instruct-2501-bnb-4bit"
 
+# 변환 결과 디스크 캐시(재시작 시 transcript 다운로드 + LLM 변환 생략)
+CACHE_DIR = os.getenv("YOUTUBE_CACHE_DIR", os.path.join(".cache", "youtube"))
 
-def get_vid_script(base_url: str, api_key: str, video_id: str) -> str:
-    model = os.getenv("LOCAL_OPENAI_MODEL_YOUTUBE", DEFAULT_MODEL)
+_refreshing: set[str] = set()
+_refresh_lock = threading.Lock()
+
+
+def cache_key(video_id: str, model: str, max_chars: int, max_out_tokens: int) -> str:
+    """결과를 결정하는 입력(video_id, model, 프롬프트, 자르기/청크 설정)의 해시"""
+    condense = os.getenv("YOUTUBE_CONDENSE", "mapreduce")
+    if condense == "mapreduce":
+        condense += ":" + os.getenv("YOUTUBE_CHUNK_CHARS", "6000") + ":" + os.getenv("YOUTUBE_MAP_MAX_TOKENS", "200")
+    payload = json.dumps([video_id, model, SYSTEM_PROMPT, MAP_PROMPT, max_chars, max_out_tokens, condense])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _load_cached(key: str) -> dict | None:
+    try:
+        with open(_cache_path(key), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-    # ✅ youtube는 heavy 작업이라 timeout 별도 권장
-    timeout_s = float(os.getenv("LOCAL_OPENAI_TIMEOUT_YOUTUBE", "180"))
+
+def _save_cached(key: str, video_id: str, model: str, text: str, complete: bool = True):
+    """complete=False(지연 예산 초과로 일부 청크만 반영)면 YOUTUBE_PARTIAL_CACHE_SECONDS 뒤 만료"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = _cache_path(key) + f".{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"video_id": video_id, "model": model, "created": time.time(), "text": text,
+                   "complete": complete}, f, ensure_ascii=False)
+    # 다른 프로세스가 반쯤 쓴 파일을 읽지 않게 rename으로 교체
+    os.replace(tmp, _cache_path(key))
+
+
+def _partial_expired(cached: dict, age: float) -> bool:
+    """일부 청크만 반영된 결과는 짧게만 재사용(끝나지 못한 청크를 다시 돌려 전체 결과로 교체)"""
+    return not cached.get("complete", True) and age > float(os.getenv("YOUTUBE_PARTIAL_CACHE_SECONDS", "600"))
+
+
+def get_vid_script(base_url: str, api_key: str, video_id: str, use_cache: bool = True) -> str:
+    """
+    캐시 우선 조회. 캐시 파일이 YOUTUBE_CACHE_REFRESH_SECONDS(0이면 안 함)보다 오래됐으면
+    캐시 값을 바로 돌려주고 백그라운드 스레드에서 새로 만들어 덮어씀
+    - 지연 예산 초과로 일부 청크만 반영된 결과는 YOUTUBE_PARTIAL_CACHE_SECONDS 뒤 다시 생성
+      (끝난 청크는 청크 캐시에 있어서 남은 청크만 LLM 호출)
+    """
+    model = os.getenv("LOCAL_OPENAI_MODEL_YOUTUBE", DEFAULT_MODEL)
 
     # ✅ 입력/출력 축소(속도/안정성에 직결)
     max_chars = int(os.getenv("YOUTUBE_TRANSCRIPT_MAX_CHARS", "8000"))
     max_out_tokens = int(os.getenv("YOUTUBE_STRATEGY_MAX_TOKENS", "400"))
 
+    if not use_cache:
+        return _generate_script(base_url, api_key, video_id, model, max_chars, max_out_tokens)[0]
+
+    key = cache_key(video_id, model, max_chars, max_out_tokens)
+    cached = _load_cached(key)
+    age = time.time() - float(cached.get("created", 0)) if cached else 0.0
+    if cached and cached.get("text") and not _partial_expired(cached, age):
+        print(f"[YOUTUBE CACHE] hit {key[:12]} age={age:.0f}s" + ("" if cached.get("complete", True) else " (partial)"))
+
+        refresh_s = float(os.getenv("YOUTUBE_CACHE_REFRESH_SECONDS", "0"))
+        if refresh_s > 0 and age > refresh_s:
+            _refresh_in_background(key, base_url, api_key, video_id, model, max_chars, max_out_tokens)
+        return cached["text"]
+
+    text, complete = _generate_script(base_url, api_key, video_id, model, max_chars, max_out_tokens)
+    if text:  # 실패(빈 문자열)는 저장 안 함
+        _save_cached(key, video_id, model, text, complete)
+    return text
+
+
+def _refresh_in_background(key, base_url, api_key, video_id, model, max_chars, max_out_tokens):
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            text, complete = _generate_script(base_url, api_key, video_id, model, max_chars, max_out_tokens)
+            # 일부만 된 결과로 전체 결과를 덮어쓰지 않음
+            old = _load_cached(key)
+            if text and (complete or not old or not old.get("complete", True)):
+                _save_cached(key, video_id, model, text, complete)
+        except Exception as e:
+            print("[YOUTUBE CACHE] background refresh failed:", repr(e))
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name=f"youtube-refresh-{key[:8]}", daemon=True).start()
+
+
+def chunk_text(text: str, chunk_chars: int, overlap: int = 200) -> list[str]:
+    """공백 경계에서 chunk_chars 내외로 자르고, 문장이 끊기지 않게 overlap만큼 겹침"""
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(len(text), start + chunk_chars)
+        if end < len(text):
+            cut = text.rfind(" ", start + chunk_chars // 2, end)
+            end = cut if cut != -1 else end
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [c for c in chunks if c]
+
+
+def _stream_chat(client, model: str, system: str, user: str, max_tokens: int, name: str,
+                 deadline: float | None = None) -> str:
+    """
+    스케줄러 슬롯 + 스트리밍. 슬롯은 스트림을 다 읽을 때까지 유지.
+    - deadline(time.monotonic 기준)이 있으면 슬롯 대기/요청/스트림 읽기 전체를 그 시각까지로 제한
+      (읽는 도중 넘기면 타이머가 스트림을 닫아서 서버 디코딩도 중단) → 넘기면 TimeoutError
+    """
+    def remaining() -> float | None:
+        if deadline is None:
+            return None
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise TimeoutError(f"{name}: latency budget exceeded")
+        return left
+
+    with LLM_METRICS.track(name) as call, LLM_SCHEDULER.slot(PRIORITY_TRANSCRIPT, name, timeout=remaining()):
+        call.acquired()
+        left = remaining()
+        stream = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            temperature=0.1,
+            max_tokens=max_tokens,
+            stream=True,  # ✅ ReadTimeout(첫 바이트 지연) 방지에 매우 유효
+            stream_options={"include_usage": True},
+            **({"timeout": left} if left is not None else {}),
+        )
+        if deadline is None:
+            return call.read_text(stream).strip()
+
+        watchdog = threading.Timer(max(0.0, deadline - time.monotonic()), stream.close)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            text = call.read_text(stream)
+        except Exception:
+            remaining()  # 타이머가 닫아서 난 읽기 에러면 TimeoutError로
+            raise
+        finally:
+            watchdog.cancel()
+        remaining()      # 닫혀서 조용히 끝난 스트림(잘린 텍스트)도 실패로
+        return text.strip()
+
+
+def _condense_chunk(client, model: str, chunk: str, max_tokens: int, deadline: float | None = None) -> str:
+    """map 단계: 청크 하나 → 전략 메모. 청크 내용 기준 디스크 캐시(영상이 바뀌어도 같은 청크면 재사용)"""
+    key = hashlib.sha256(json.dumps([chunk, model, MAP_PROMPT, max_tokens]).encode("utf-8")).hexdigest()
+    path = os.path.join(CACHE_DIR, "chunks", f"{key}.txt")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    notes = _stream_chat(client, model, MAP_PROMPT, chunk, max_tokens, "youtube_map", deadline=deadline)
+    if notes:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(notes)
+        os.replace(tmp, path)
+    return notes
+
+
+def _map_reduce(client, model: str, full_text: str, max_out_tokens: int) -> tuple[str, bool]:
+    """
+    긴 transcript: 청크로 나눠 동시에 요약(map) → 메모를 모아 전략 설명 하나로 재작성(reduce).
+    - 반환: (전략 텍스트, 모든 청크 반영 여부)
+    - 전체 지연 예산(YOUTUBE_LATENCY_BUDGET_SECONDS) 안에 끝난 청크만 reduce에 사용
+    - 예산의 YOUTUBE_REDUCE_RESERVE 비율은 reduce 호출용으로 남겨 둠
+    - map/reduce 호출은 각자 마감 시각에 슬롯 대기를 포기하고 스트림을 닫음(예산 뒤에 남는 호출 없음)
+    """
+    chunk_chars = int(os.getenv("YOUTUBE_CHUNK_CHARS", "6000"))
+    workers = int(os.getenv("YOUTUBE_MAP_WORKERS", "4"))
+    map_tokens = int(os.getenv("YOUTUBE_MAP_MAX_TOKENS", "200"))
+    budget_s = float(os.getenv("YOUTUBE_LATENCY_BUDGET_SECONDS", "180"))
+    reserve = float(os.getenv("YOUTUBE_REDUCE_RESERVE", "0.4"))
+
+    t0 = time.perf_counter()
+    map_deadline = time.monotonic() + budget_s * (1 - reserve)
+    deadline = time.monotonic() + budget_s
+    chunks = chunk_text(full_text, chunk_chars)
+    print(f"[DEBUG] transcript map-reduce: chunks={len(chunks)} chunk_chars={chunk_chars}")
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks))))
+    futures = {pool.submit(_condense_chunk, client, model, c, map_tokens, map_deadline): i
+               for i, c in enumerate(chunks)}
+    done, pending = wait(futures, timeout=max(0.0, map_deadline - time.monotonic()))
+    # 예산 초과 청크는 버림(진행 중인 호출은 map 마감에 스트림이 닫히고, 시작 안 한 청크는 취소)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    notes = {}
+    for fut in done:
+        try:
+            if fut.result():
+                notes[futures[fut]] = fut.result()
+        except Exception as e:
+            print("[WARN] transcript chunk failed:", repr(e))
+    print(f"[TIMING] youtube map: {(time.perf_counter()-t0):.3f}s "
+          f"(ok={len(notes)}/{len(chunks)}, over_budget={len(pending)})")
+
+    if not notes:
+        return "", False
+
+    merged = "\n\n".join(f"[Part {i + 1}/{len(chunks)}]\n{notes[i]}" for i in sorted(notes))
+    text = _stream_chat(client, model, SYSTEM_PROMPT, merged, max_out_tokens, "youtube", deadline=deadline)
+    return text, len(notes) == len(chunks)
+
+
+def _generate_script(base_url: str, api_key: str, video_id: str, model: str, max_chars: int,
+                     max_out_tokens: int) -> tuple[str, bool]:
+    """(전략 텍스트, 완전한 결과인지). truncate 모드의 자르기는 설정이라 완전한 결과로 봄"""
     # 1) youtube transcript
     t0 = time.perf_counter()
     fetched_transcript = YouTubeTranscriptApi().fetch(video_id)
@@ -40,49 +273,25 @@ def get_vid_script(base_url: str, api_key: str, video_id: str) -> str:
     print(f"[TIMING] youtube transcript fetch: {(time.perf_counter()-t0):.3f}s")
     print("[DEBUG] transcript chars (raw):", len(full_text))
 
-    # 2) 입력 길이 제한
-    if len(full_text) > max_chars:
-        full_text = full_text[:max_chars]
-    print("[DEBUG] transcript chars (clipped):", len(full_text))
+    # 2) local LLM client (공용 풀, youtube는 heavy 작업이라 timeout 별도: LOCAL_OPENAI_TIMEOUT_YOUTUBE)
+    client = client_for("youtube", base_url=base_url, api_key=api_key)
 
-    # 3) local LLM client
-    client = OpenAI(
-        base_url=base_url,
-        api_key=api_key,
-        max_retries=0,
-        timeout=timeout_s,
-    )
-
-    # 4) 변환 (락 + 스트리밍)
+    # 3) 변환: max_chars 이하는 한 번에, 넘으면 map-reduce(YOUTUBE_CONDENSE=truncate면 기존처럼 잘라서 한 번에)
     t1 = time.perf_counter()
     try:
-        with LLM_CALL_LOCK:
-            stream = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": full_text},
-                ],
-                temperature=0.1,
-                max_tokens=max_out_tokens,
-                stream=True,  # ✅ ReadTimeout(첫 바이트 지연) 방지에 매우 유효
-            )
-
-        chunks = []
-        for ev in stream:
-            if not ev.choices:
-                continue
-            delta = ev.choices[0].delta.content
-            if delta:
-                chunks.append(delta)
-
-        return "".join(chunks).strip()
+        if len(full_text) > max_chars and os.getenv("YOUTUBE_CONDENSE", "mapreduce") == "mapreduce":
+            return _map_reduce(client, model, full_text, max_out_tokens)
+
+        if len(full_text) > max_chars:
+            full_text = full_text[:max_chars]
+        print("[DEBUG] transcript chars (clipped):", len(full_text))
+        return _stream_chat(client, model, SYSTEM_PROMPT, full_text, max_out_tokens, "youtube"), True
 
     except Exception as e:
         # ✅ 실패해도 전체 파이프라인이 죽지 않게: 빈 문자열 반환
         print("[ERROR] youtube LLM call failed:", repr(e))
         print(traceback.format_exc())
-        return ""
+        return "", False
 
     finally:
         print(f"[TIMING] youtube LLM call: {(time.perf_counter()-t1):.3f}s")
@@ -96,6 +305,9 @@ if __name__ == "__main__":
     # export LOCAL_OPENAI_TIMEOUT_YOUTUBE=180
     # export YOUTUBE_TRANSCRIPT_MAX_CHARS=8000
     # export YOUTUBE_STRATEGY_MAX_TOKENS=400
+    # export YOUTUBE_LATENCY_BUDGET_SECONDS=180    # 긴 영상 map-reduce 전체 예산
+    # export YOUTUBE_CACHE_REFRESH_SECONDS=86400  # (선택) 하루 지난 캐시는 백그라운드 갱신
+    # export YOUTUBE_PARTIAL_CACHE_SECONDS=600     # 예산 초과로 일부만 된 결과의 재사용 시간
 
     out = get_vid_script(base_url=BASE_URL, api_key=API_KEY, video_id="F_HVfz_IcgY")
     print(out)
@@ -0,0 +1,155 @@
+import json
+
+# 매매 결정 JSON 스키마(vLLM guided decoding / OpenAI structured output 공용)
+DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "decision": {"type": "string", "enum": ["buy", "sell", "hold"]},
+        "percentage": {"type": "integer", "minimum": 0, "maximum": 100},
+        "reason": {"type": "string", "maxLength": 300},
+    },
+    "required": ["decision", "percentage", "reason"],
+    "additionalProperties": False,
+}
+
+GUIDED_MODES = ("vllm", "response_format")
+
+
+def _max_chars(schema: dict) -> int:
+    """스키마가 허용하는 가장 긴 JSON 문자열 길이(대략, 공백 없이 직렬화 기준)"""
+    t = schema.get("type")
+    if "enum" in schema:
+        return max(len(json.dumps(v, ensure_ascii=False)) for v in schema["enum"])
+    if t == "string":
+        # 이스케이프 여유로 1.2배
+        return int(schema.get("maxLength", 200) * 1.2) + 2
+    if t == "integer" or t == "number":
+        return max(len(str(schema.get("minimum", -(10 ** 9)))), len(str(schema.get("maximum", 10 ** 9))))
+    if t == "boolean":
+        return 5
+    if t == "object":
+        props = schema.get("properties", {})
+        return 2 + sum(len(json.dumps(k)) + 1 + _max_chars(v) + 1 for k, v in props.items())
+    return 50
+
+
+def schema_max_tokens(schema: dict, chars_per_token: float = 1.0, slack: int = 16) -> int:
+    """
+    스키마 최대 길이로 잡은 max_tokens 상한(스키마를 다 채운 출력도 안 잘리게).
+    - 기본은 글자당 1토큰(한글 reason 최악의 경우). 토크나이저로 잰 값이 있으면 chars_per_token로
+    """
+    return int(_max_chars(schema) / chars_per_token) + slack
+
+
+# OpenAI strict structured output이 거절하는 키워드(vLLM guided_json은 그대로 지원)
+_STRICT_UNSUPPORTED = ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum", "multipleOf",
+                       "minLength", "maxLength", "pattern", "format", "minItems", "maxItems")
+
+
+def strict_schema(schema: dict) -> dict:
+    """
+    response_format strict용 스키마: 지원 안 하는 제약은 빼고 description 문구로 옮김.
+    (강제가 아니라 안내라서 percentage는 clamp_percent, 길이는 max_tokens로 한 번 더 막음)
+    """
+    out, notes = {}, []
+    for k, v in schema.items():
+        if k in _STRICT_UNSUPPORTED:
+            notes.append(f"{k}={v}")
+        elif k == "properties":
+            out[k] = {name: strict_schema(sub) for name, sub in v.items()}
+        elif k == "items" and isinstance(v, dict):
+            out[k] = strict_schema(v)
+        else:
+            out[k] = v
+    if notes:
+        out["description"] = " ".join(filter(None, [schema.get("description"), f"Constraints: {', '.join(notes)}."]))
+    return out
+
+
+def guided_kwargs(schema: dict, mode: str, name: str = "trading_decision") -> dict:
+    """
+    chat.completions.create(...)에 넘길 구조화 출력 인자.
+    - vllm: extra_body guided_json (vLLM OpenAI 호환 서버)
+    - response_format: OpenAI json_schema (auto_trade.ai_trading과 같은 형식, 최근 vLLM도 지원).
+      strict 모드가 거절하는 minimum/maximum/maxLength 등은 strict_schema로 description에 옮김
+    """
+    if mode == "vllm":
+        return {"extra_body": {"guided_json": schema}}
+    if mode == "response_format":
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": name, "strict": True, "schema": strict_schema(schema)},
+            }
+        }
+    raise ValueError(f"unknown guided mode: {mode} (expected one of {GUIDED_MODES})")
+
+
+class _JsonObjectScanner:
+    """첫 JSON 객체의 중괄호 균형 추적(문자열 안의 중괄호/이스케이프는 무시)"""
+
+    def __init__(self):
+        self.out = []
+        self.depth = 0
+        self.in_str = self.escape = False
+
+    def feed(self, text: str) -> bool:
+        """객체가 닫히면 True"""
+        for ch in text:
+            if not self.out and ch != "{":
+                continue
+            self.out.append(ch)
+
+            if self.in_str:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_str = False
+            elif ch == '"':
+                self.in_str = True
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
+    def text(self) -> str:
+        return "".join(self.out)
+
+
+def read_json_object(stream) -> str:
+    """
+    스트리밍 응답에서 첫 JSON 객체만 읽고 닫는 중괄호가 맞춰지면 바로 끊음.
+    - 문자열 안의 중괄호/이스케이프는 무시
+    - 끊을 때 stream.close()로 서버 쪽 디코딩도 중단
+    """
+    scanner = _JsonObjectScanner()
+    try:
+        for chunk in stream:
+            if chunk.choices and scanner.feed(chunk.choices[0].delta.content or ""):
+                break
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+    return scanner.text()
+
+
+async def aread_json_object(stream) -> str:
+    """read_json_object의 async 스트림 버전(끊을 때 aclose/close)"""
+    scanner = _JsonObjectScanner()
+    try:
+        async for chunk in stream:
+            if chunk.choices and scanner.feed(chunk.choices[0].delta.content or ""):
+                break
+    finally:
+        close = getattr(stream, "aclose", None) or getattr(stream, "close", None)
+        if close is not None:
+            await close()
+
+    return scanner.text()
\ No newline at end of file
@@ -0,0 +1,154 @@
+# utils/llm_client.py
+import asyncio
+import os
+import threading
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+# ✅ LLM 접속 설정은 여기 한 곳에서만(load_dotenv 뒤에 읽히도록 호출할 때 조회)
+def default_base_url() -> str:
+    return os.getenv("LOCAL_OPENAI_BASE_URL", "http://127.0.0.1:9000/v1")
+
+
+def _resolve(base_url: str | None, api_key: str | None) -> tuple[str, str | None]:
+    """
+    (base_url, api_key) 결정. 로컬 토큰(LOCAL_OPENAI_API_KEY)은 로컬 서버 주소에만 보냄
+    - 다른 주소인데 api_key가 없으면 OPENAI_API_KEY(없으면 None → OpenAI가 에러)
+    """
+    base_url = (base_url or default_base_url()).rstrip("/")
+    if api_key:
+        return base_url, api_key
+    if base_url == default_base_url().rstrip("/"):
+        return base_url, os.getenv("LOCAL_OPENAI_API_KEY", "local-token")
+    return base_url, os.getenv("OPENAI_API_KEY")
+
+# vllm_setup.sh --max-num-seqs(16)에 맞춘 keep-alive 풀 크기
+POOL_CONNECTIONS = int(os.getenv("LLM_POOL_CONNECTIONS", "16"))
+KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+
+# 호출 지점별 (connect, read) timeout / 재시도 횟수(기존 값 유지)
+def site_timeouts() -> dict[str, tuple[float, float]]:
+    return {
+        "decision": (float(os.getenv("LOCAL_OPENAI_TIMEOUT_CONNECT", "5")),
+                     float(os.getenv("LOCAL_OPENAI_TIMEOUT_READ", "180"))),
+        "reflection": (5.0, float(os.getenv("LOCAL_OPENAI_TIMEOUT", "60"))),
+        "youtube": (5.0, float(os.getenv("LOCAL_OPENAI_TIMEOUT_YOUTUBE", "180"))),
+    }
+
+
+SITE_RETRIES = {"decision": 2, "reflection": 0, "youtube": 0}
+
+_lock = threading.Lock()
+_sync_clients: dict[tuple, OpenAI] = {}
+_async_clients: dict[tuple, tuple[asyncio.AbstractEventLoop, AsyncOpenAI]] = {}
+
+
+def _http2() -> bool:
+    # LLM_HTTP2=1이어도 h2 패키지가 없으면 HTTP/1.1 keep-alive로
+    if os.getenv("LLM_HTTP2", "0") != "1":
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print("[LLM CLIENT] LLM_HTTP2=1 but 'h2' is not installed -> HTTP/1.1")
+        return False
+    return True
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=POOL_CONNECTIONS,
+        max_keepalive_connections=POOL_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def timeout_for(site: str, connect: float | None = None, read: float | None = None) -> httpx.Timeout:
+    timeouts = site_timeouts()
+    c, r = timeouts.get(site, timeouts["decision"])
+    return httpx.Timeout(connect=c if connect is None else connect, read=r if read is None else read, write=30.0, pool=5.0)
+
+
+def get_client(base_url: str | None = None, api_key: str | None = None) -> OpenAI:
+    """(base_url, api_key)별 프로세스 공용 동기 클라이언트(커넥션 풀 공유)"""
+    key = _resolve(base_url, api_key)
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            client = OpenAI(
+                base_url=key[0],
+                api_key=key[1],
+                max_retries=0,
+                http_client=httpx.Client(limits=_limits(), http2=_http2(), timeout=timeout_for("decision")),
+            )
+            _sync_clients[key] = client
+        return client
+
+
+def get_async_client(base_url: str | None = None, api_key: str | None = None) -> AsyncOpenAI:
+    """
+    asyncio용 공용 클라이언트. httpx.AsyncClient는 이벤트 루프에 묶이므로 루프별로 하나씩
+    - 루프 종료 전 aclose()로 닫기(닫힌 루프의 클라이언트는 다음 조회 때 버림)
+    """
+    loop = asyncio.get_running_loop()
+    key = (*_resolve(base_url, api_key), id(loop))
+    with _lock:
+        for k in [k for k, (lp, _) in _async_clients.items() if lp.is_closed()]:
+            del _async_clients[k]
+        entry = _async_clients.get(key)
+        if entry is None or entry[0] is not loop:
+            client = AsyncOpenAI(
+                base_url=key[0],
+                api_key=key[1],
+                max_retries=0,
+                http_client=httpx.AsyncClient(limits=_limits(), http2=_http2(), timeout=timeout_for("decision")),
+            )
+            entry = _async_clients[key] = (loop, client)
+        return entry[1]
+
+
+async def aclose():
+    """현재 루프의 async 클라이언트 닫기(utils.aio_http.aclose처럼 루프 종료 전에 호출)"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        keys = [k for k, (lp, _) in _async_clients.items() if lp is loop]
+        clients = [_async_clients.pop(k)[1] for k in keys]
+    for client in clients:
+        await client.close()
+
+
+def client_for(site: str, base_url: str | None = None, api_key: str | None = None,
+               timeout: httpx.Timeout | float | None = None, max_retries: int | None = None) -> OpenAI:
+    """
+    호출 지점용 동기 클라이언트. 공용 클라이언트의 with_options 사본이라 커넥션 풀은 그대로 공유
+    - client_for("reflection").chat.completions.create(...)
+    """
+    return get_client(base_url, api_key).with_options(
+        timeout=timeout if timeout is not None else timeout_for(site),
+        max_retries=max_retries if max_retries is not None else SITE_RETRIES.get(site, 0),
+    )
+
+
+def async_client_for(site: str, base_url: str | None = None, api_key: str | None = None,
+                     timeout: httpx.Timeout | float | None = None, max_retries: int | None = None) -> AsyncOpenAI:
+    return get_async_client(base_url, api_key).with_options(
+        timeout=timeout if timeout is not None else timeout_for(site),
+        max_retries=max_retries if max_retries is not None else SITE_RETRIES.get(site, 0),
+    )
+
+
+if __name__ == "__main__":
+    # 같은 설정이면 같은 풀을 쓰는지 확인
+    a = client_for("decision")
+    b = client_for("reflection")
+    print("shared pool:", a._client is b._client)
+    print("models:", [m.id for m in a.models.list().data])
+
+    async def main():
+        client = async_client_for("decision")
+        models = await client.models.list()
+        print("async models:", [m.id for m in models.data])
+        await aclose()
+
+    asyncio.run(main())
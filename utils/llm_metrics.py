@@ -0,0 +1,273 @@
+# utils/llm_metrics.py
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# 호출 1건마다 관측하는 지표(슬롯 대기 시간은 LLM_SCHEDULER가 이미 재므로 여기선 안 잼)
+METRICS = (
+    "ttft_seconds",               # 요청 → 첫 토큰(prefill)
+    "total_seconds",              # 요청 → 마지막 토큰
+    "decode_tokens_per_second",   # 첫 토큰 이후 생성 속도
+    "prompt_tokens",
+    "completion_tokens",
+)
+QUANTILES = (0.5, 0.95)
+
+
+class RollingSummary:
+    """
+    최근 window개 관측값의 분위수 + 처음부터의 누적 개수/합계.
+    - 분위수는 롤링(오래된 값은 빠짐), count/sum은 줄지 않음(Prometheus rate()용)
+    """
+
+    def __init__(self, window: int = 500):
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        value = float(value)
+        self.values.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        s = sorted(self.values)
+        return s[min(len(s) - 1, int(q * len(s)))] if s else float("nan")
+
+    def summary(self) -> dict:
+        s = sorted(self.values)
+        if not s:
+            return {"n": 0}
+        return {
+            "n": len(s),
+            "avg": sum(s) / len(s),
+            "p50": s[len(s) // 2],
+            "p95": s[min(len(s) - 1, int(0.95 * len(s)))],
+            "max": s[-1],
+        }
+
+
+class LLMCall:
+    """
+    호출 1건 측정. LLM_METRICS.track(site)로 만들고:
+    - 슬롯을 얻은 직후 acquired()(여기부터 total/ttft를 잼)
+    - 스트림이면 for ev in call.stream(stream): ... (첫 청크 시각/usage 기록, async면 call.astream)
+    - 스트림이 아니면 done(resp)
+    """
+
+    def __init__(self, metrics: "LLMMetrics", site: str):
+        self.metrics = metrics
+        self.site = site
+        self.t_start = time.perf_counter()
+        self.t_request = None
+        self.t_first = None
+        self.t_last = None
+        self.chunks = 0
+        self.usage = None
+
+    def acquired(self):
+        self.t_request = time.perf_counter()
+
+    def stream(self, stream):
+        if self.t_request is None:
+            self.acquired()
+        try:
+            for ev in stream:
+                self._observe(ev)
+                yield ev
+        finally:
+            # 소비 쪽에서 중간에 끊으면(close) 원본 스트림도 닫아서 서버 디코딩 중단
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+    async def astream(self, stream):
+        """stream()의 AsyncOpenAI 스트림 버전: async for ev in call.astream(stream)"""
+        if self.t_request is None:
+            self.acquired()
+        try:
+            async for ev in stream:
+                self._observe(ev)
+                yield ev
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                await close()
+
+    def _observe(self, ev):
+        if getattr(ev, "usage", None) is not None:
+            self.usage = ev.usage
+        if ev.choices and ev.choices[0].delta.content:
+            now = time.perf_counter()
+            if self.t_first is None:
+                self.t_first = now
+            self.t_last = now
+            self.chunks += 1
+
+    async def aread_text(self, stream) -> str:
+        parts = []
+        async for ev in self.astream(stream):
+            if ev.choices and ev.choices[0].delta.content:
+                parts.append(ev.choices[0].delta.content)
+        return "".join(parts)
+
+    def read_text(self, stream) -> str:
+        """스트림 전체를 읽어서 content만 이어붙임"""
+        parts = []
+        for ev in self.stream(stream):
+            if ev.choices and ev.choices[0].delta.content:
+                parts.append(ev.choices[0].delta.content)
+        return "".join(parts)
+
+    def done(self, resp):
+        if self.t_request is None:
+            self.acquired()
+        self.t_last = time.perf_counter()
+        self.usage = getattr(resp, "usage", None)
+
+    def _finish(self):
+        m = self.metrics
+        t_request = self.t_request if self.t_request is not None else self.t_start
+        t_last = self.t_last if self.t_last is not None else time.perf_counter()
+        m.observe(self.site, "total_seconds", t_last - t_request)
+
+        prompt = getattr(self.usage, "prompt_tokens", None)
+        # 스트림을 중간에 끊으면 usage가 안 오므로 청크 수(vLLM은 청크당 ~1토큰)로 대신
+        completion = getattr(self.usage, "completion_tokens", None) or self.chunks or None
+        if prompt is not None:
+            m.observe(self.site, "prompt_tokens", prompt)
+        if completion is not None:
+            m.observe(self.site, "completion_tokens", completion)
+
+        if self.t_first is not None:
+            m.observe(self.site, "ttft_seconds", self.t_first - t_request)
+            decode_s = t_last - self.t_first
+            if completion and completion > 1 and decode_s > 0:
+                m.observe(self.site, "decode_tokens_per_second", (completion - 1) / decode_s)
+
+
+class LLMMetrics:
+    """
+    호출 지점(site)별 롤링 분위수 + 호출/에러 카운터. JSON 또는 Prometheus 텍스트로 덤프.
+    - 슬롯 대기(queue_wait)/동시 요청 수는 LLM_SCHEDULER.stats() 값을 그대로 같이 내보냄
+    """
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._hists: dict[tuple[str, str], RollingSummary] = {}
+        self.calls: dict[str, int] = {}
+        self.errors: dict[tuple[str, str], int] = {}
+
+    def observe(self, site: str, metric: str, value: float):
+        with self._lock:
+            hist = self._hists.get((site, metric))
+            if hist is None:
+                hist = self._hists[(site, metric)] = RollingSummary(self.window)
+            hist.observe(value)
+
+    def track(self, site: str):
+        """with LLM_METRICS.track("reflection") as call: ..."""
+        return _Tracker(self, site)
+
+    def to_json(self) -> dict:
+        sched = _scheduler_stats()
+        with self._lock:
+            out = {}
+            for (site, metric), hist in sorted(self._hists.items()):
+                out.setdefault(site, {})[metric] = hist.summary()
+            for site, n in self.calls.items():
+                out.setdefault(site, {})["calls"] = n
+            for (site, err), n in self.errors.items():
+                out.setdefault(site, {}).setdefault("errors", {})[err] = n
+        for site, s in sched.get("calls", {}).items():
+            out.setdefault(site, {})["queue_wait_seconds"] = s["queue_wait"]
+        return out
+
+    def to_prometheus(self, prefix: str = "llm") -> str:
+        """
+        Prometheus text format.
+        - 호출별 지표는 summary: 분위수는 최근 window개 기준, _sum/_count는 누적(rate() 가능)
+        - 스케줄러 슬롯 대기는 스케줄러 롤링 값이라 gauge
+        """
+        lines = []
+        with self._lock:
+            for metric in METRICS:
+                name = f"{prefix}_{metric}"
+                rows = [(site, h) for (site, m), h in sorted(self._hists.items()) if m == metric]
+                if not rows:
+                    continue
+                lines.append(f"# TYPE {name} summary")
+                for site, hist in rows:
+                    for q in QUANTILES:
+                        lines.append(f'{name}{{site="{site}",quantile="{q}"}} {hist.quantile(q)}')
+                    lines.append(f'{name}_sum{{site="{site}"}} {hist.sum}')
+                    lines.append(f'{name}_count{{site="{site}"}} {hist.count}')
+
+            lines.append(f"# TYPE {prefix}_calls_total counter")
+            lines += [f'{prefix}_calls_total{{site="{site}"}} {n}' for site, n in sorted(self.calls.items())]
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            lines += [
+                f'{prefix}_errors_total{{site="{site}",type="{err}"}} {n}'
+                for (site, err), n in sorted(self.errors.items())
+            ]
+
+        sched = _scheduler_stats()
+        if sched:
+            lines.append(f"# TYPE {prefix}_queue_wait_seconds gauge")
+            for site, s in sorted(sched.get("calls", {}).items()):
+                for stat in ("avg", "p95", "max"):
+                    lines.append(f'{prefix}_queue_wait_seconds{{site="{site}",stat="{stat}"}} {s["queue_wait"][stat]}')
+            lines.append(f"# TYPE {prefix}_in_flight gauge")
+            lines.append(f"{prefix}_in_flight {sched['in_flight']}")
+            lines.append(f"# TYPE {prefix}_queued gauge")
+            lines.append(f"{prefix}_queued {sched['queued']}")
+            lines.append(f"# TYPE {prefix}_rejected_total counter")
+            lines.append(f"{prefix}_rejected_total {sched['rejected']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """확장자가 .prom이면 Prometheus 텍스트, 아니면 JSON"""
+        text = self.to_prometheus() if path.endswith(".prom") else json.dumps(self.to_json(), indent=2)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+
+class _Tracker:
+    def __init__(self, metrics: LLMMetrics, site: str):
+        self.metrics = metrics
+        self.site = site
+        self.call = None
+
+    def __enter__(self) -> LLMCall:
+        self.call = LLMCall(self.metrics, self.site)
+        return self.call
+
+    def __exit__(self, exc_type, exc, tb):
+        m = self.metrics
+        with m._lock:
+            m.calls[self.site] = m.calls.get(self.site, 0) + 1
+            if exc_type is not None:
+                key = (self.site, exc_type.__name__)
+                m.errors[key] = m.errors.get(key, 0) + 1
+        if exc_type is None:
+            self.call._finish()
+        return False
+
+
+def _scheduler_stats() -> dict:
+    from .llm_sched import LLM_SCHEDULER
+
+    try:
+        return LLM_SCHEDULER.stats()
+    except Exception as e:   # 워커에서 매니저 연결이 끊긴 경우 등
+        print("[LLM METRICS] scheduler stats unavailable:", repr(e))
+        return {}
+
+
+LLM_METRICS = LLMMetrics(window=int(os.getenv("LLM_METRICS_WINDOW", "500")))
@@ -0,0 +1,187 @@
+# utils/llm_sched.py
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+# 숫자가 작을수록 먼저 처리
+PRIORITY_DECISION = 0
+PRIORITY_REFLECTION = 1
+PRIORITY_TRANSCRIPT = 2
+
+
+class LLMQueueFull(RuntimeError):
+    """대기열이 가득 차서 (우선순위 낮은) 요청을 받지 않음"""
+
+
+class LLMScheduler:
+    """
+    로컬 vLLM(OpenAI 호환) 호출용 동시성 제한 + 우선순위 스케줄러.
+    - 최대 max_in_flight개까지 동시에 서버로 보냄(vLLM continuous batching 활용)
+    - 빈 슬롯은 우선순위 → 도착 순서대로 배정(매매 결정 > reflection > 유튜브 변환)
+    - 대기열이 max_queue 이상이면 결정이 아닌 요청은 LLMQueueFull로 즉시 거절(backpressure)
+    - 호출 이름별 대기 시간(queue wait)과 처리 시간(service time)을 기록
+    """
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 64, window: int = 500):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._window = window
+        self._waits: dict[str, deque] = {}
+        self._services: dict[str, deque] = {}
+        self.rejected = 0
+        self._owners: dict[int, int] = {}   # pid -> 잡고 있는 슬롯 수(죽은 워커 슬롯 회수용)
+        self._evicted: set = set()
+        self._remote = None
+
+    def attach(self, remote):
+        """
+        여러 프로세스가 슬롯/대기열 하나를 공유(utils.shard 워커용).
+        remote는 매니저 프로세스의 LLMScheduler 프록시 → max_in_flight가 프로세스 합계 기준이 됨
+        """
+        self._remote = remote
+
+    def _acquire(self, priority: int, timeout: float | None, owner: int = 0):
+        if self._remote is not None:
+            return self._remote._acquire(priority, timeout, owner)
+        with self._cond:
+            if priority > PRIORITY_DECISION and len(self._heap) >= self.max_queue:
+                self.rejected += 1
+                raise LLMQueueFull(f"LLM queue full ({len(self._heap)} waiting)")
+
+            entry = (priority, next(self._seq), owner)
+            heapq.heappush(self._heap, entry)
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                if entry in self._evicted:
+                    self._evicted.discard(entry)
+                    raise RuntimeError(f"LLM slot request of dead owner {owner} dropped")
+                if self._in_flight < self.max_in_flight and self._heap[0] == entry:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._heap.remove(entry)
+                    heapq.heapify(self._heap)
+                    self._cond.notify_all()
+                    raise TimeoutError("timed out waiting for an LLM slot")
+                self._cond.wait(remaining)
+
+            heapq.heappop(self._heap)
+            self._in_flight += 1
+            self._owners[owner] = self._owners.get(owner, 0) + 1
+            # 슬롯이 더 남아 있으면 다음 대기자도 깨움
+            self._cond.notify_all()
+
+    def _release(self, owner: int = 0):
+        if self._remote is not None:
+            return self._remote._release(owner)
+        with self._cond:
+            held = self._owners.get(owner, 0)
+            if held <= 0:
+                return  # reclaim으로 이미 회수됨
+            self._owners[owner] = held - 1
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def reclaim(self, owner: int) -> int:
+        """
+        죽은 프로세스(owner=pid)가 잡고 있던 슬롯 회수 + 대기 중이던 요청 제거(supervisor가 호출).
+        회수한 슬롯 수 반환
+        """
+        if self._remote is not None:
+            return self._remote.reclaim(owner)
+        with self._cond:
+            held = self._owners.pop(owner, 0)
+            self._in_flight -= held
+            waiting = [e for e in self._heap if e[2] == owner]
+            if waiting:
+                self._heap = [e for e in self._heap if e[2] != owner]
+                heapq.heapify(self._heap)
+                self._evicted.update(waiting)
+            self._cond.notify_all()
+            return held
+
+    def _record(self, name: str, wait: float, service: float):
+        if self._remote is not None:
+            return self._remote._record(name, wait, service)
+        with self._cond:
+            self._waits.setdefault(name, deque(maxlen=self._window)).append(wait)
+            self._services.setdefault(name, deque(maxlen=self._window)).append(service)
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_DECISION, name: str = "decision", timeout: float | None = None):
+        """with LLM_SCHEDULER.slot(PRIORITY_REFLECTION, "reflection"): client.chat.completions.create(...)"""
+        owner = os.getpid()
+        t0 = time.perf_counter()
+        self._acquire(priority, timeout, owner)
+        t1 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(owner)
+            self._record(name, t1 - t0, time.perf_counter() - t1)
+
+    @asynccontextmanager
+    async def aslot(self, priority: int = PRIORITY_DECISION, name: str = "decision", timeout: float | None = None):
+        """
+        slot()의 asyncio 버전. 동기 호출과 같은 슬롯/우선순위 큐를 공유
+        - 대기는 스레드에서(이벤트 루프를 막지 않음)
+        - 대기 중 취소되면 나중에 얻은 슬롯을 바로 반납
+        """
+        owner = os.getpid()
+        t0 = time.perf_counter()
+        fut = asyncio.ensure_future(asyncio.to_thread(self._acquire, priority, timeout, owner))
+        try:
+            await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            fut.add_done_callback(
+                lambda f: self._release(owner) if not f.cancelled() and f.exception() is None else None)
+            raise
+        t1 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(owner)
+            self._record(name, t1 - t0, time.perf_counter() - t1)
+
+    def stats(self) -> dict:
+        if self._remote is not None:
+            return self._remote.stats()
+
+        def summary(xs):
+            if not xs:
+                return {"n": 0, "avg": 0.0, "p95": 0.0, "max": 0.0}
+            s = sorted(xs)
+            return {
+                "n": len(s),
+                "avg": sum(s) / len(s),
+                "p95": s[min(len(s) - 1, int(0.95 * len(s)))],
+                "max": s[-1],
+            }
+
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._heap),
+                "rejected": self.rejected,
+                "calls": {
+                    name: {"queue_wait": summary(self._waits[name]), "service": summary(self._services[name])}
+                    for name in self._waits
+                },
+            }
+
+
+# vllm_setup.sh의 --max-num-seqs 16 이하로 유지
+LLM_SCHEDULER = LLMScheduler(
+    max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "8")),
+    max_queue=int(os.getenv("LLM_MAX_QUEUE", "64")),
+)
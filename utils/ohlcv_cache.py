@@ -0,0 +1,88 @@
+import calendar
+import threading
+import time
+
+# 업비트 캔들 경계(UTC epoch 기준)
+# - 분/시간봉: epoch의 interval 배수
+# - 일봉: 매일 09:00 KST = 00:00 UTC
+# - 주봉: 월요일 09:00 KST = 월요일 00:00 UTC (1970-01-05가 월요일)
+_MINUTE_SECONDS = {f"minute{m}": m * 60 for m in (1, 3, 5, 10, 15, 30, 60, 240)}
+_DAY = 24 * 60 * 60
+_WEEK_OFFSET = 4 * _DAY
+
+
+def next_candle_boundary(interval: str, now: float | None = None) -> float:
+    """now(epoch 초) 이후 처음 오는 interval 캔들 시작 시각(epoch 초)"""
+    now = time.time() if now is None else now
+
+    if interval in _MINUTE_SECONDS:
+        secs = _MINUTE_SECONDS[interval]
+        return (now // secs + 1) * secs
+
+    if interval in ("day", "days"):
+        return (now // _DAY + 1) * _DAY
+
+    if interval in ("week", "weeks"):
+        week = 7 * _DAY
+        return ((now - _WEEK_OFFSET) // week + 1) * week + _WEEK_OFFSET
+
+    if interval in ("month", "months"):
+        t = time.gmtime(now)
+        y, m = (t.tm_year + 1, 1) if t.tm_mon == 12 else (t.tm_year, t.tm_mon + 1)
+        return float(calendar.timegm((y, m, 1, 0, 0, 0)))
+
+    raise ValueError(f"unknown interval: {interval}")
+
+
+class OHLCVCache:
+    """
+    (ticker, interval, count) 키 OHLCV 응답 캐시.
+    - 해당 interval의 다음 캔들 경계에서 정확히 만료 → 닫힌 캔들이 stale 상태로 나가는 일 없음
+      (진행 중인 마지막 캔들은 경계 전까지 첫 조회 시점 값으로 고정)
+    - None/empty 응답은 캐시하지 않음(호출자 재시도 유지)
+    - 반환은 복사본(호출자가 컬럼을 추가해도 캐시 오염 없음)
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, ticker: str, interval: str, count: int, fetch):
+        key = (ticker, interval, count)
+        now = time.time()
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and now < entry[0]:
+                self.hits += 1
+                return entry[1].copy()
+            self.misses += 1
+
+        df = fetch()
+        if df is None or df.empty:
+            return df
+
+        with self._lock:
+            # 만료된 항목 정리(미스 때만, 항목 수는 티커×인터벌 수준)
+            self._data = {k: v for k, v in self._data.items() if now < v[0]}
+            self._data[key] = (next_candle_boundary(interval, now), df)
+        return df.copy()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "entries": len(self._data),
+            }
+
+
+OHLCV_CACHE = OHLCVCache()
@@ -0,0 +1,55 @@
+import os
+
+
+def section(title: str, body) -> str:
+    return f"[{title}]\n{body}\n\n"
+
+
+def build_decision_messages(
+    system_prompt: str,
+    transcript: str = "",
+    cycle: dict | None = None,
+    coin: dict | None = None,
+) -> list[dict]:
+    """
+    vLLM prefix caching이 잘 먹히도록 "덜 바뀌는 것 → 자주 바뀌는 것" 순서로 프롬프트 구성.
+    1) system_prompt: 역할/출력 계약/스키마 (코드가 바뀌기 전까지 고정)
+    2) transcript: 전략 트랜스크립트 (프로세스 단위로 고정)
+    3) cycle: 사이클마다 바뀌지만 코인끼리는 같은 것 (reflection, FNG, 뉴스)
+    4) coin: 코인마다 다른 것 (가격/지표)
+    → 같은 사이클의 코인 프롬프트들은 3)까지 토큰이 완전히 같아서 KV cache 재사용
+    """
+    system_content = system_prompt
+    if transcript:
+        system_content += "\n" + section("trading method transcript", transcript)
+
+    user_content = "".join(section(k, v) for k, v in (cycle or {}).items())
+    user_content += "".join(section(k, v) for k, v in (coin or {}).items())
+
+    return [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": user_content},
+    ]
+
+
+def render(messages: list[dict]) -> str:
+    return "\n".join(f"<{m['role']}>{m['content']}" for m in messages)
+
+
+def shared_prefix_len(batch: list[list[dict]]) -> int:
+    """배치 내 모든 프롬프트가 공유하는 앞부분 길이(문자)"""
+    if not batch:
+        return 0
+    return len(os.path.commonprefix([render(m) for m in batch]))
+
+
+def prefix_report(batch: list[list[dict]]) -> dict:
+    lens = [len(render(m)) for m in batch]
+    shared = shared_prefix_len(batch)
+    avg = sum(lens) / len(lens) if lens else 0
+    return {
+        "prompts": len(batch),
+        "shared_prefix_chars": shared,
+        "avg_prompt_chars": int(avg),
+        "shared_ratio": (shared / avg) if avg else 0.0,
+    }
@@ -0,0 +1,158 @@
+import math
+import re
+
+import pandas as pd
+
+# 토크나이저 없이 대략 추정: 영단어 1, 숫자 3자리당 1, 기호/한글 글자당 1
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+PRICE_COLUMNS = [
+    "timestamp", "open", "high", "low", "close", "volume",
+    "bb_bbm", "bb_bbh", "bb_bbl", "rsi", "macd", "macd_signal", "macd_diff", "sma_20", "ema_12",
+]
+TRADE_COLUMNS = ["timestamp", "coin_name", "decision", "percentage", "asset_krw_price", "krw_balance", "equity_now"]
+
+# 컬럼별 유효숫자(없으면 DEFAULT_SIG)
+SIG = {"rsi": 3, "volume": 4, "value": 4, "macd": 4, "macd_signal": 4, "macd_diff": 4, "percentage": 3}
+DEFAULT_SIG = 6
+
+# 토큰 예산 초과 시 위에서부터 차례로 축소
+LEVELS = [
+    {"price_rows": 10, "news_items": 5, "summary_len": 200, "trade_rows": 30},
+    {"price_rows": 6, "news_items": 5, "summary_len": 120, "trade_rows": 15},
+    {"price_rows": 4, "news_items": 3, "summary_len": 60, "trade_rows": 8},
+    {"price_rows": 2, "news_items": 3, "summary_len": 0, "trade_rows": 4},
+    {"price_rows": 1, "news_items": 1, "summary_len": 0, "trade_rows": 1},
+]
+
+
+def estimate_tokens(text) -> int:
+    return len(_TOKEN_RE.findall(str(text)))
+
+
+def num(x, sig: int = DEFAULT_SIG) -> str:
+    """유효숫자 sig개로 반올림한 짧은 숫자 문자열(NaN/None은 빈 문자열)"""
+    if x is None:
+        return ""
+    try:
+        x = float(x)
+    except (TypeError, ValueError):
+        return str(x)
+    if math.isnan(x) or math.isinf(x):
+        return ""
+    if x == 0:
+        return "0"
+
+    digits = int(math.floor(math.log10(abs(x)))) + 1
+    if digits >= sig:
+        return str(int(round(x, sig - digits)))
+    s = f"{x:.{sig - digits}f}"
+    return s.rstrip("0").rstrip(".") if "." in s else s
+
+
+def short_ts(ts) -> str:
+    """'2026-10-18 13:00:00' → '10-18 13:00'"""
+    if isinstance(ts, pd.Timestamp):
+        return ts.strftime("%m-%d %H:%M")
+    s = str(ts)
+    if re.match(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}", s):
+        return s[5:16].replace("T", " ")
+    return s
+
+
+def _cell(value, col: str) -> str:
+    if col == "timestamp":
+        return short_ts(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return num(value, SIG.get(col, DEFAULT_SIG))
+    return str(value if value is not None else "").replace("|", "/").replace("\n", " ")
+
+
+def encode_table(rows: list[dict], columns: list[str]) -> str:
+    """헤더 한 번 + '|' 구분 행. 값이 하나도 없는 컬럼은 생략"""
+    columns = [c for c in columns if any(r.get(c) is not None for r in rows)]
+    lines = ["|".join(columns)]
+    lines += ["|".join(_cell(r.get(c), c) for c in columns) for r in rows]
+    return "\n".join(lines)
+
+
+def _records(data) -> list[dict]:
+    if isinstance(data, pd.DataFrame):
+        df = data.reset_index().rename(columns={"index": "timestamp"})
+        return df.to_dict(orient="records")
+    return list(data or [])
+
+
+def encode_ohlcv(data, rows: int | None = None) -> str:
+    """
+    get_price records / OHLCV DataFrame → 요약 1줄 + 최근 rows개 표
+    - 요약은 전체 구간 기준(rows로 잘라도 추세 정보는 유지)
+    """
+    recs = _records(data)
+    if not recs:
+        return ""
+
+    closes = [r["close"] for r in recs if r.get("close") is not None]
+    highs = [r["high"] for r in recs if r.get("high") is not None]
+    lows = [r["low"] for r in recs if r.get("low") is not None]
+    vols = [r["volume"] for r in recs if r.get("volume") is not None]
+
+    summary = [f"n={len(recs)}", f"from={short_ts(recs[0].get('timestamp'))}", f"to={short_ts(recs[-1].get('timestamp'))}"]
+    if closes:
+        summary.append(f"last_close={num(closes[-1])}")
+        if closes[0]:
+            summary.append(f"chg={(closes[-1] / closes[0] - 1) * 100:+.2f}%")
+    if highs and lows:
+        summary.append(f"hi={num(max(highs))} lo={num(min(lows))}")
+    if vols:
+        summary.append(f"avg_vol={num(sum(vols) / len(vols), 4)}")
+
+    tail = recs if rows is None else recs[-rows:]
+    columns = [c for c in PRICE_COLUMNS if c in tail[0]]
+    return " ".join(summary) + "\n" + encode_table(tail, columns)
+
+
+def encode_news(items, max_items: int = 5, summary_len: int = 200) -> str:
+    """뉴스 dict 리스트 → '- [published] title: summary' 줄 목록(link/content/source는 생략)"""
+    lines = []
+    for it in list(items or [])[:max_items]:
+        line = f"- [{it.get('published', '')}] {it.get('title', '')}"
+        summary = (it.get("summary") or "")[:summary_len]
+        if summary:
+            line += f": {summary}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def encode_trades(records, rows: int | None = None) -> str:
+    recs = _records(records)
+    if not recs:
+        return ""
+    tail = recs if rows is None else recs[-rows:]
+    return encode_table(tail, [c for c in TRADE_COLUMNS if c in tail[0]])
+
+
+def encode_informs(informs: dict, budget_tokens: int | None = None) -> tuple[dict, dict]:
+    """
+    informs의 coin_price / news / recent_trades를 압축 텍스트로 바꾼 사본과 리포트 반환.
+    - budget_tokens를 넘으면 LEVELS 순서대로 행/뉴스 수를 줄임
+    - report: tokens_before(원래 str() 삽입 기준) / tokens_after / level
+    """
+    keys = [k for k in ("coin_price", "news", "recent_trades", "fear_greed_index", "reflection") if k in informs]
+    before = sum(estimate_tokens(informs[k]) for k in keys)
+
+    out, after, level = dict(informs), before, 0
+    for level, lv in enumerate(LEVELS):
+        out = dict(informs)
+        if isinstance(informs.get("coin_price"), (list, pd.DataFrame)):
+            out["coin_price"] = encode_ohlcv(informs["coin_price"], rows=lv["price_rows"])
+        if isinstance(informs.get("news"), list):
+            out["news"] = encode_news(informs["news"], lv["news_items"], lv["summary_len"])
+        if isinstance(informs.get("recent_trades"), (list, pd.DataFrame)):
+            out["recent_trades"] = encode_trades(informs["recent_trades"], rows=lv["trade_rows"])
+
+        after = sum(estimate_tokens(out[k]) for k in keys)
+        if budget_tokens is None or after <= budget_tokens:
+            break
+
+    return out, {"tokens_before": before, "tokens_after": after, "level": level}
@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    스레드 세이프 토큰 버킷.
+    - rate: 초당 보충 토큰 수
+    - capacity: 버스트 허용량(기본 = rate)
+    - acquire()는 토큰이 생길 때까지 블로킹
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self._remote = None
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """토큰을 소비하고, 대기한 시간(초)을 반환"""
+        waited = 0.0
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def attach(self, remote):
+        """
+        다른 프로세스와 버킷 공유(utils.shard 워커용). remote는 매니저 프로세스의 TokenBucket 프록시
+        - 이후 토큰 계산은 remote에서, 대기(sleep)는 이 프로세스에서
+        """
+        self._remote = remote
+
+    def _take(self, tokens: float) -> float:
+        """토큰이 있으면 소비하고 0, 없으면 기다릴 시간(초)"""
+        if self._remote is not None:
+            return self._remote._take(tokens)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """acquire()의 asyncio 버전(이벤트 루프를 막지 않음). 같은 버킷을 스레드와 공유"""
+        import asyncio
+
+        waited = 0.0
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+# 업비트 시세(quotation) API 제한: IP당 초당 10회 → 프로세스 전체가 하나의 버킷 공유
+UPBIT_QUOTATION_LIMITER = TokenBucket(rate=float(os.getenv("UPBIT_QUOTATION_RPS", "10")))
+# 업비트 거래(exchange) API(잔고/주문) 제한: 주문 초당 8회 기준
+UPBIT_EXCHANGE_LIMITER = TokenBucket(rate=float(os.getenv("UPBIT_EXCHANGE_RPS", "8")))
@@ -0,0 +1,92 @@
+import math
+import os
+
+import pandas as pd
+
+from . import candle_store
+from .candle_store import INTERVAL_SECONDS, KST
+
+AGG = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+    "value": "sum",
+}
+
+
+def _bucket_start(index: pd.DatetimeIndex, interval: str) -> pd.DatetimeIndex:
+    """
+    KST(naive) 캔들 시각 → 해당 interval 캔들 시작 시각(KST).
+    업비트 캔들 경계는 UTC 기준이라(일봉 09:00 KST, 4시간봉 01/05/09… KST) UTC로 내렸다가 되돌림
+    """
+    utc = index - KST
+    if interval == "week":
+        start = (utc - pd.to_timedelta(utc.dayofweek, unit="D")).normalize()
+    else:
+        start = utc.floor(pd.Timedelta(seconds=INTERVAL_SECONDS[interval]))
+    return start + KST
+
+
+def resample_ohlcv(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    더 짧은 봉 df(pyupbit 형식) → interval 봉으로 집계.
+    - open=first, high=max, low=min, close=last, volume/value=sum
+    - 맨 앞 버킷이 구간 시작부터 채워져 있지 않으면(윈도우가 중간에서 시작) 버림
+    - 마지막 버킷은 거래소 진행 중 캔들과 같은 의미로 유지
+    """
+    if df is None or df.empty:
+        return df
+
+    buckets = _bucket_start(df.index, interval)
+    out = df.groupby(buckets).agg(AGG)
+    out.index.name = None
+
+    if df.index[0] != buckets[0]:
+        out = out.iloc[1:]
+    return out
+
+
+class MultiTimeframeFeed:
+    """
+    base 봉 하나만 거래소(캔들 저장소/캐시 경유)에서 받고, 더 긴 봉은 로컬에서 집계.
+    - 같은 base에서 나오므로 타임프레임 간 값이 서로 어긋나지 않음
+    - base로 나눠떨어지지 않는 interval(month 등)이나 base보다 짧은 interval은 그대로 조회
+    - max_base_rows를 넘는 요청(예: 분봉으로 수십 일치 일봉)도 그대로 조회해서 base 트래픽 폭증 방지
+    """
+
+    def __init__(self, base: str = "minute30", max_base_rows: int = 2000):
+        if base not in INTERVAL_SECONDS:
+            raise ValueError(f"unsupported base interval: {base}")
+        self.base = base
+        self.max_base_rows = max_base_rows
+
+    def ratio(self, interval: str) -> int | None:
+        secs = INTERVAL_SECONDS.get(interval)
+        base_secs = INTERVAL_SECONDS[self.base]
+        if secs is None or secs < base_secs or secs % base_secs:
+            return None
+        return secs // base_secs
+
+    def get_ohlcv(self, ticker: str, interval: str = "day", count: int = 200):
+        ratio = self.ratio(interval)
+        if ratio is None or ratio == 1:
+            return candle_store.get_ohlcv(ticker, interval=interval, count=count)
+
+        # 앞쪽 잘린 버킷 1개 여유
+        base_count = math.ceil(count * ratio) + ratio
+        if base_count > self.max_base_rows:
+            return candle_store.get_ohlcv(ticker, interval=interval, count=count)
+
+        base_df = candle_store.get_ohlcv(ticker, interval=self.base, count=base_count)
+        if base_df is None or base_df.empty:
+            return base_df
+        return resample_ohlcv(base_df, interval).tail(count)
+
+
+FEED = MultiTimeframeFeed(base=os.getenv("CANDLE_BASE_INTERVAL", "minute30"))
+
+
+def get_ohlcv(ticker: str, interval: str = "day", count: int = 200):
+    return FEED.get_ohlcv(ticker, interval=interval, count=count)
@@ -8,13 +8,8 @@ def shorten(text: str, n: int = 300) -> str:
     text = text or ""
     return text if len(text) <= n else text[:n] + "..."
 
-def fetch_rss_news(feed_url: str, limit: int=10, summary_len: int=300, content_len: int=600,):
-    """
-    RSS에서 최신 뉴스들을 가져와 LLM 입력에 적합한 dict 리스트로 반환.
-    - title, summary, content, link, published 필드를 포함
-    """
-    feed = feedparser.parse(feed_url)
-
+def parse_rss_news(feed, feed_url: str, limit: int=10, summary_len: int=300, content_len: int=600,):
+    """feedparser 결과 → LLM 입력용 dict 리스트"""
     news_items = []
     entries = getattr(feed, "entries", []) or []
     for e in entries[:limit]:
@@ -35,6 +30,21 @@ def fetch_rss_news(feed_url: str, limit: int=10, summary_len: int=300, content_l
 
     return news_items
 
+def fetch_rss_news(feed_url: str, limit: int=10, summary_len: int=300, content_len: int=600,):
+    """
+    RSS에서 최신 뉴스들을 가져와 LLM 입력에 적합한 dict 리스트로 반환.
+    - title, summary, content, link, published 필드를 포함
+    """
+    feed = feedparser.parse(feed_url)
+    return parse_rss_news(feed, feed_url, limit, summary_len, content_len)
+
+async def afetch_rss_news(feed_url: str, limit: int=10, summary_len: int=300, content_len: int=600, timeout: float=15.0):
+    """fetch_rss_news의 asyncio 버전: 다운로드만 비동기, 파싱은 같은 함수"""
+    from .aio_http import request
+
+    resp = await request("GET", feed_url, timeout=timeout)
+    return parse_rss_news(feedparser.parse(resp.content), feed_url, limit, summary_len, content_len)
+
 if __name__ == "__main__":
     FEED_URL = "https://www.cryptobreaking.com/feed/"
 
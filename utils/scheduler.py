@@ -0,0 +1,300 @@
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from .ohlcv_cache import next_candle_boundary
+
+OVERLAP_POLICIES = ("skip", "coalesce")
+
+
+@dataclass
+class Job:
+    name: str
+    fn: Callable[[], None]
+    interval: Optional[str] = None      # 캔들 job: minute30 등(캔들 마감 + offset에 실행)
+    every: Optional[float] = None       # 주기 job: 초
+    offset: float = 0.0
+    jitter: float = 0.0
+    overlap: str = "skip"               # 이전 실행이 안 끝났으면 skip(버림) / coalesce(끝나고 1번만 더)
+    run_at_start: bool = False
+
+    running: bool = False
+    pending: bool = False
+    boundary: float = 0.0               # 마지막으로 예약한 캔들 경계 / 주기 기준 시각
+    stats: dict = field(default_factory=lambda: {
+        "runs": 0, "skipped": 0, "coalesced": 0, "errors": 0,
+        "last_duration_s": None, "last_lateness_s": None,
+    })
+
+
+class CandleScheduler:
+    """
+    고정 sleep 대신 캔들 마감 시각에 맞춰 job 실행.
+    - add_candle_job: interval 캔들 경계 + offset + [0, jitter) 초에 실행(거래소 캔들 확정 대기 + 요청 몰림 방지)
+    - add_periodic_job: every초마다(유동성 스캔/뉴스 갱신 같은 느린 작업을 매매 루프 밖으로)
+    - job끼리는 스레드풀에서 따로 돌아서 느린 job이 다른 job을 밀지 않음
+    - 이전 실행이 아직 돌고 있으면 overlap 정책대로 skip/coalesce(실행이 쌓이지 않음)
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sched")
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._heap = []
+        self._seq = itertools.count()
+        self.jobs: dict[str, Job] = {}
+
+    def add_candle_job(self, name: str, fn: Callable[[], None], interval: str = "minute30",
+                       offset: float = 5.0, jitter: float = 2.0, overlap: str = "skip",
+                       run_at_start: bool = False) -> Job:
+        return self._add(Job(name, fn, interval=interval, offset=offset, jitter=jitter,
+                             overlap=overlap, run_at_start=run_at_start))
+
+    def add_periodic_job(self, name: str, fn: Callable[[], None], every: float, jitter: float = 0.0,
+                         overlap: str = "skip", run_at_start: bool = True) -> Job:
+        return self._add(Job(name, fn, every=every, jitter=jitter, overlap=overlap, run_at_start=run_at_start))
+
+    def _add(self, job: Job) -> Job:
+        if job.overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"unknown overlap policy: {job.overlap}")
+        if job.name in self.jobs:
+            raise ValueError(f"duplicate job name: {job.name}")
+
+        now = time.time()
+        self.jobs[job.name] = job
+        if job.run_at_start:
+            job.boundary = now
+            self._push(now, job)
+        else:
+            self._push(self._next_fire(job, now), job)
+        return job
+
+    def _next_fire(self, job: Job, now: float) -> float:
+        if job.interval is not None:
+            # now 이후 처음 오는 "경계 + offset"
+            job.boundary = next_candle_boundary(job.interval, max(job.boundary, now - job.offset))
+            return job.boundary + job.offset + random.uniform(0, job.jitter)
+
+        job.boundary = max(job.boundary + job.every, now) if job.boundary else now + job.every
+        return job.boundary + random.uniform(0, job.jitter)
+
+    def _push(self, at: float, job: Job):
+        with self._lock:
+            heapq.heappush(self._heap, (at, next(self._seq), job))
+        self._wake.set()
+
+    def _submit(self, job: Job, scheduled: float):
+        with self._lock:
+            if job.running:
+                if job.overlap == "coalesce":
+                    job.stats["coalesced"] += 1
+                    job.pending = True
+                else:
+                    job.stats["skipped"] += 1
+                    print(f"[SCHED] {job.name}: previous run still going -> skipped")
+                return
+            job.running = True
+        self._pool.submit(self._run, job, scheduled)
+
+    def _run(self, job: Job, scheduled: float):
+        t0 = time.time()
+        try:
+            job.fn()
+        except Exception as e:
+            with self._lock:
+                job.stats["errors"] += 1
+            print(f"[SCHED] {job.name} failed:", repr(e))
+            print(traceback.format_exc())
+        finally:
+            with self._lock:
+                job.stats["runs"] += 1
+                job.stats["last_duration_s"] = round(time.time() - t0, 3)
+                job.stats["last_lateness_s"] = round(t0 - scheduled, 3)
+                job.running = False
+                rerun = job.pending and not self._stop.is_set()
+                job.pending = False
+            if rerun:
+                self._submit(job, time.time())
+
+    def run_forever(self):
+        """stop()이 불릴 때까지 블록"""
+        try:
+            while not self._stop.is_set():
+                # 힙을 보기 전에 clear해야 그 사이 들어온 push의 wake를 놓치지 않음
+                self._wake.clear()
+                with self._lock:
+                    at, _, job = self._heap[0] if self._heap else (None, None, None)
+                    if at is not None and at <= time.time():
+                        heapq.heappop(self._heap)
+                    else:
+                        job = None
+
+                if job is None:
+                    self._wake.wait(None if at is None else max(0.0, at - time.time()))
+                    continue
+
+                self._submit(job, at)
+                self._push(self._next_fire(job, time.time()), job)
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            next_at = {job.name: at for at, _, job in self._heap}
+            now = time.time()
+            return {
+                name: {**job.stats, "running": job.running,
+                       "next_in_s": round(next_at[name] - now, 1) if name in next_at else None}
+                for name, job in self.jobs.items()
+            }
+
+
+class CoinFanOut:
+    """
+    캔들 job 안에서 코인별로 나눠 실행(코인별 job과 같은 효과, 사이클 공용 스냅샷은 job이 1번만 만듦).
+    - submit: 코인마다 스레드풀에 제출, 그 코인의 이전 실행이 아직 돌고 있으면 skip
+    - wait: 코인마다 제출 시각 + deadline초까지만 기다리고, 넘긴 코인은 overran으로 남겨 둠
+      (스레드는 취소할 수 없어서 계속 돌지만 job은 반환하고, 끝날 때까지 그 코인은 다음 회차에서 skip)
+    """
+
+    def __init__(self, name: str, max_workers: int = 4):
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._running: set[str] = set()
+        self._futures: dict[str, tuple[float, Future]] = {}
+        self._stats = {"runs": 0, "skipped": 0, "overran": 0, "errors": 0}
+
+    def submit(self, key: str, fn: Callable[..., None], *args) -> bool:
+        with self._lock:
+            if key in self._running:
+                self._stats["skipped"] += 1
+                print(f"[SCHED] {self.name}:{key}: previous run still going -> skipped")
+                return False
+            self._running.add(key)
+        self._futures[key] = (time.time(), self._pool.submit(self._run, key, fn, *args))
+        return True
+
+    def _run(self, key: str, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            print(f"[SCHED] {self.name}:{key} failed:", repr(e))
+            print(traceback.format_exc())
+        finally:
+            with self._lock:
+                self._stats["runs"] += 1
+                self._running.discard(key)
+
+    def wait(self, deadline: Optional[float]) -> list[str]:
+        """이번 회차에 제출한 코인을 기다림. deadline을 넘긴 코인 목록 반환"""
+        futures, self._futures = self._futures, {}
+        overran = []
+        for key, (submitted, fut) in futures.items():
+            remaining = None if deadline is None else max(0.0, submitted + deadline - time.time())
+            try:
+                fut.result(timeout=remaining)
+            except FutureTimeoutError:
+                overran.append(key)
+        if overran:
+            with self._lock:
+                self._stats["overran"] += len(overran)
+            print(f"[SCHED] {self.name}: over {deadline:.0f}s deadline -> left running: {overran}")
+        return overran
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "running": sorted(self._running)}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+async def candle_loop(name: str, fn: Callable[[], Awaitable[None]], interval: str = "minute30",
+                      offset: float = 5.0, jitter: float = 2.0, run_at_start: bool = False,
+                      timeout: Optional[float] = None, stop: Optional[asyncio.Event] = None):
+    """
+    add_candle_job의 asyncio 버전(단일 이벤트 루프에서 매매 사이클 실행).
+    - 한 회차가 다음 경계를 넘기면 그 사이 경계는 건너뜀(skip과 같음)
+    - timeout을 넘기면 회차를 취소하고 다음 경계로
+    """
+    stop = stop or asyncio.Event()
+    boundary = 0.0
+    first = run_at_start
+    while not stop.is_set():
+        now = time.time()
+        if first:
+            first, at = False, now
+        else:
+            boundary = next_candle_boundary(interval, max(boundary, now - offset))
+            at = boundary + offset + random.uniform(0, jitter)
+        try:
+            await asyncio.wait_for(stop.wait(), max(0.0, at - time.time()))
+            break
+        except asyncio.TimeoutError:
+            pass
+        await _run_async(name, fn, timeout)
+
+
+async def periodic_loop(name: str, fn: Callable[[], Awaitable[None]], every: float, jitter: float = 0.0,
+                        run_at_start: bool = True, timeout: Optional[float] = None,
+                        stop: Optional[asyncio.Event] = None):
+    """add_periodic_job의 asyncio 버전"""
+    stop = stop or asyncio.Event()
+    at = time.time() if run_at_start else time.time() + every
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), max(0.0, at + random.uniform(0, jitter) - time.time()))
+            break
+        except asyncio.TimeoutError:
+            pass
+        await _run_async(name, fn, timeout)
+        at = max(at + every, time.time())
+
+
+async def _run_async(name: str, fn, timeout: Optional[float]):
+    """
+    한 회차 실행. timeout은 스케줄러 자신의 timeout만 취소로 처리하고,
+    fn 안에서 난 예외(TimeoutError 포함)는 전부 로그만 남기고 루프는 계속
+    """
+    task = asyncio.ensure_future(fn())
+    try:
+        done, _ = await asyncio.wait([task], timeout=timeout)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+    if not done:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        print(f"[SCHED] {name} timed out after {timeout:.1f}s -> cancelled")
+        return
+    try:
+        task.result()
+    except Exception as e:
+        print(f"[SCHED] {name} failed:", repr(e))
+        print("".join(traceback.format_exception(e)))
+
+if __name__ == "__main__":
+    sched = CandleScheduler()
+    sched.add_candle_job("tick", lambda: print(time.strftime("%H:%M:%S"), "minute1 close"),
+                         interval="minute1", offset=2, jitter=1, run_at_start=True)
+    sched.add_periodic_job("slow", lambda: time.sleep(12), every=5, overlap="coalesce")
+    threading.Timer(130, sched.stop).start()
+    sched.run_forever()
+    print(sched.stats())
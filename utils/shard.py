@@ -0,0 +1,242 @@
+# utils/shard.py
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+import traceback
+import zlib
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing.managers import BaseManager, DictProxy
+from typing import Any, Callable
+
+from .db_utils import DataBase
+from .llm_sched import LLM_SCHEDULER, LLMScheduler
+from .rate_limit import UPBIT_EXCHANGE_LIMITER, UPBIT_QUOTATION_LIMITER, TokenBucket
+
+# KRW 잠금: 잡기 대기 상한 / 잡은 뒤 최대 보유 시간(멈춘 워커 대비)
+KRW_LOCK_TIMEOUT = float(os.getenv("KRW_LOCK_TIMEOUT_SECONDS", "30"))
+KRW_LOCK_LEASE = float(os.getenv("KRW_LOCK_LEASE_SECONDS", "60"))
+
+
+class LeaseLock:
+    """
+    워커끼리 쓰는 잠금(매니저 프로세스에 1개). 주인(pid)을 기록해서
+    - 주인이 죽으면 supervisor가 reclaim(pid)으로 회수
+    - lease_seconds 넘게 안 놓으면(멈춘 워커) 다음 워커가 가져감
+    """
+
+    def __init__(self, lease_seconds: float = 60.0):
+        self.lease_seconds = lease_seconds
+        self._cond = threading.Condition()
+        self._owner = None
+        self._expires = 0.0
+
+    def acquire(self, owner: int, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._owner is not None and time.monotonic() < self._expires:
+                wait = self._expires - time.monotonic()
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return False
+                self._cond.wait(wait)
+            if self._owner is not None:
+                print(f"[LEASE] lease of pid {self._owner} expired -> taken over by {owner}")
+            self._owner = owner
+            self._expires = time.monotonic() + self.lease_seconds
+            return True
+
+    def release(self, owner: int):
+        with self._cond:
+            if self._owner == owner:   # lease가 넘어갔으면 남의 잠금을 풀지 않음
+                self._owner = None
+                self._cond.notify_all()
+
+    def reclaim(self, owner: int) -> bool:
+        """owner가 잡고 있었으면 풀고 True"""
+        with self._cond:
+            if self._owner != owner:
+                return False
+            self._owner = None
+            self._cond.notify_all()
+            return True
+
+
+class _SharedManager(BaseManager):
+    """공유 객체를 들고 있는 매니저 프로세스(요청마다 스레드라 _acquire처럼 블로킹 호출도 가능)"""
+
+
+_SharedManager.register("LLMScheduler", LLMScheduler,
+                        exposed=("_acquire", "_release", "_record", "reclaim", "stats"))
+_SharedManager.register("TokenBucket", TokenBucket, exposed=("_take",))
+_SharedManager.register("LeaseLock", LeaseLock, exposed=("acquire", "release", "reclaim"))
+_SharedManager.register("dict", dict, DictProxy)
+
+
+def shard_of(ticker: str, workers: int) -> int:
+    """티커 → 워커 번호(후보 목록이 바뀌어도 같은 코인은 같은 워커)"""
+    return zlib.crc32(ticker.encode()) % workers
+
+
+@dataclass
+class SharedHandles:
+    """워커 프로세스에 넘기는 공유 객체 묶음(전부 pickle 가능: 매니저 프록시 + 큐)"""
+    index: int
+    workers: int
+    llm_scheduler: Any
+    quotation_limiter: Any
+    exchange_limiter: Any
+    krw_lock: Any            # KRW 잔고 조회~매수 주문을 워커끼리 겹치지 않게(LeaseLock)
+    state: Any               # 워커 공용 dict(유동성 후보 등)
+    db_queue: Any            # 단일 SQLite writer로 가는 큐
+
+    def attach(self):
+        """워커에서 1번: 프로세스 싱글톤(LLM 스케줄러/업비트 rate limiter)을 공유 객체로 연결"""
+        LLM_SCHEDULER.attach(self.llm_scheduler)
+        UPBIT_QUOTATION_LIMITER.attach(self.quotation_limiter)
+        UPBIT_EXCHANGE_LIMITER.attach(self.exchange_limiter)
+
+    def owns(self, ticker: str) -> bool:
+        return shard_of(ticker, self.workers) == self.index
+
+    @contextmanager
+    def krw_guard(self, timeout: float = KRW_LOCK_TIMEOUT):
+        """with shared.krw_guard(): ... (timeout 안에 못 잡으면 TimeoutError → 이번 매수는 건너뜀)"""
+        owner = os.getpid()
+        if not self.krw_lock.acquire(owner, timeout):
+            raise TimeoutError(f"KRW lock busy for {timeout:.0f}s")
+        try:
+            yield
+        finally:
+            self.krw_lock.release(owner)
+
+    @asynccontextmanager
+    async def akrw_lock(self, timeout: float = KRW_LOCK_TIMEOUT):
+        import asyncio
+
+        owner = os.getpid()
+        if not await asyncio.to_thread(self.krw_lock.acquire, owner, timeout):
+            raise TimeoutError(f"KRW lock busy for {timeout:.0f}s")
+        try:
+            yield
+        finally:
+            self.krw_lock.release(owner)
+
+
+class QueuedDataBase:
+    """
+    워커용 DataBase 대역: 쓰기는 writer 프로세스 큐로 보내고(시각은 워커에서 찍음), 읽기는 직접.
+    - SQLite 쓰기를 한 프로세스로 모아서 database is locked 방지
+    """
+
+    def __init__(self, queue, db_path: str = "bitcoin_trades.db"):
+        self.queue = queue
+        self.db_path = db_path
+        self._reader = None
+
+    def log_trade(self, *args, **kwargs):
+        kwargs.setdefault("timestamp", datetime.now().isoformat())
+        self.queue.put(("log_trade", args, kwargs))
+
+    def log_liquidity_scan(self, results, row_fn):
+        ts = datetime.now().isoformat()
+        self.queue.put(("insert_liquidity_rows", ([row_fn(ts, t, s) for t, s in results],), {}))
+
+    def get_liq_cand(self, limit=20):
+        if self._reader is None:
+            self._reader = DataBase(self.db_path)
+        return self._reader.get_liq_cand(limit)
+
+
+def db_writer(queue, db_path: str):
+    """
+    단일 writer 프로세스: None이 올 때까지 큐 순서대로 기록.
+    - Ctrl+C(SIGINT)는 무시: supervisor가 워커 정리 후 None을 보낼 때까지 남은 로그를 다 기록
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    db = DataBase(db_path)
+    while True:
+        msg = queue.get()
+        if msg is None:
+            break
+        name, args, kwargs = msg
+        try:
+            getattr(db, name)(*args, **kwargs)
+        except Exception as e:
+            print(f"[DB WRITER] {name} failed:", repr(e))
+
+
+def run_supervisor(worker: Callable[[SharedHandles], None], workers: int,
+                   db_path: str = "bitcoin_trades.db", restart_delay: float = 10.0):
+    """
+    코인 후보를 workers개 프로세스로 나눠 실행(worker(handles)).
+    - LLM 스케줄러 / 업비트 rate limiter / KRW 잠금은 매니저 프로세스 하나를 공유
+    - 거래 로그는 writer 프로세스 하나가 기록
+    - 죽은 워커가 잡고 있던 LLM 슬롯/KRW 잠금은 바로 회수, 워커는 restart_delay 뒤 다시 띄움
+    - Ctrl+C면 전부 정리
+    """
+    ctx = mp.get_context("spawn")
+    manager = _SharedManager(ctx=ctx)
+    manager.start()
+
+    llm = manager.LLMScheduler(max_in_flight=LLM_SCHEDULER.max_in_flight, max_queue=LLM_SCHEDULER.max_queue)
+    quotation = manager.TokenBucket(UPBIT_QUOTATION_LIMITER.rate, UPBIT_QUOTATION_LIMITER.capacity)
+    exchange = manager.TokenBucket(UPBIT_EXCHANGE_LIMITER.rate, UPBIT_EXCHANGE_LIMITER.capacity)
+    krw_lock = manager.LeaseLock(KRW_LOCK_LEASE)
+    state = manager.dict()
+
+    db_queue = ctx.Queue()
+    writer = ctx.Process(target=db_writer, args=(db_queue, db_path), name="db-writer", daemon=True)
+    writer.start()
+
+    handles = [SharedHandles(i, workers, llm, quotation, exchange, krw_lock, state, db_queue) for i in range(workers)]
+
+    def spawn(h: SharedHandles):
+        p = ctx.Process(target=worker, args=(h,), name=f"worker-{h.index}")
+        p.start()
+        print(f"[SUPERVISOR] started worker {h.index}/{workers} pid={p.pid}")
+        return p
+
+    def reclaim(pid: int):
+        try:
+            slots = llm.reclaim(pid)
+            held = krw_lock.reclaim(pid)
+        except Exception as e:
+            print(f"[SUPERVISOR] reclaim for pid={pid} failed:", repr(e))
+            return
+        if slots or held:
+            print(f"[SUPERVISOR] reclaimed from pid={pid}: llm_slots={slots} krw_lock={held}")
+
+    procs = {h.index: spawn(h) for h in handles}
+    died_at: dict[int, float] = {}
+    try:
+        while True:
+            time.sleep(1.0)
+            for i, p in procs.items():
+                if p.is_alive():
+                    continue
+                if i not in died_at:
+                    print(f"[SUPERVISOR] worker {i} exited (code {p.exitcode}) -> restart in {restart_delay:.0f}s")
+                    died_at[i] = time.time()
+                    reclaim(p.pid)
+                elif time.time() - died_at[i] >= restart_delay:
+                    del died_at[i]
+                    procs[i] = spawn(handles[i])
+    except KeyboardInterrupt:
+        print("[SUPERVISOR] stopping")
+    except Exception:
+        print(traceback.format_exc())
+        raise
+    finally:
+        for p in procs.values():
+            if p.is_alive():
+                p.terminate()
+        for p in procs.values():
+            p.join(timeout=10)
+        db_queue.put(None)
+        writer.join(timeout=30)
+        manager.shutdown()
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+import pyupbit
+
+from .get_price import get_prices
+from .ttl_cache import SOURCE_CACHE, TTLCache
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    한 사이클 동안 모든 코인이 같이 보는 읽기 전용 시장 상태.
+    - 코인별 결정/주문 단계는 여기서 읽기만 하고, 코인별 데이터(호가 등)만 따로 조회
+    - dict 필드는 MappingProxyType(수정 불가)
+    """
+    built_at: float
+    build_seconds: float
+    fng: Mapping[str, Any]
+    news: tuple
+    krw_markets: frozenset
+    balances: tuple                          # upbit.get_balances() 행들
+    prices: Mapping[str, Any]                # ticker -> get_price records(지표 포함)
+    quotes: Mapping[str, float]              # ticker -> 현재가(일괄 조회 1회)
+    timings: Mapping[str, float] = field(default_factory=dict)
+    errors: Mapping[str, str] = field(default_factory=dict)
+
+    def balance(self, currency: str) -> tuple[float, float]:
+        """(보유+주문중 수량, 평균 매수가). 없으면 (0, 0)"""
+        row = next((b for b in self.balances if b.get("currency") == currency), None)
+        if row is None:
+            return 0.0, 0.0
+        qty = float(row.get("balance") or 0.0) + float(row.get("locked") or 0.0)
+        return qty, float(row.get("avg_buy_price") or 0.0)
+
+    def available(self, currency: str) -> float:
+        """주문 가능 수량(locked 제외, upbit.get_balance와 같은 값)"""
+        row = next((b for b in self.balances if b.get("currency") == currency), None)
+        return 0.0 if row is None else float(row.get("balance") or 0.0)
+
+    def age(self) -> float:
+        return time.time() - self.built_at
+
+    def summary(self) -> dict:
+        return {
+            "build_seconds": round(self.build_seconds, 3),
+            "fng": self.fng.get("value"),
+            "news": len(self.news),
+            "markets": len(self.krw_markets),
+            "balances": len(self.balances),
+            "prices": len(self.prices),
+            "quotes": len(self.quotes),
+            "timings": dict(self.timings),
+            "errors": dict(self.errors),
+        }
+
+
+_EMPTY = {"fng": {}, "news": [], "krw_markets": set(), "balances": [], "prices": {}, "quotes": {}}
+
+
+def _quotes(tickers: list[str]) -> dict:
+    # pyupbit은 1개면 float, 여러 개면 dict
+    if not tickers:
+        return {}
+    res = pyupbit.get_current_price(tickers)
+    if isinstance(res, dict):
+        return {t: float(p) for t, p in res.items() if p is not None}
+    return {} if res is None else {tickers[0]: float(res)}
+
+
+def build_snapshot(
+    tickers: list[str],
+    *,
+    upbit: Optional[pyupbit.Upbit] = None,
+    cache: TTLCache = SOURCE_CACHE,
+    max_workers: int = 6,
+) -> MarketSnapshot:
+    """
+    사이클 시작 시 1번: FNG / 뉴스 / 마켓 목록(캐시 경유), 잔고, 후보 전체 가격·지표, 현재가를 동시에 조회.
+    - 하나가 실패해도 빈 값으로 채우고 errors에 기록(사이클은 계속)
+    - cache에 fng/news/krw_markets 소스가 등록돼 있어야 함
+    """
+    t0 = time.perf_counter()
+    tasks = {
+        "fng": lambda: cache.get("fng"),
+        "news": lambda: cache.get("news"),
+        "krw_markets": lambda: cache.get("krw_markets"),
+        "balances": lambda: (upbit.get_balances() or []) if upbit is not None else [],
+        "prices": lambda: get_prices(tickers),
+        "quotes": lambda: _quotes(tickers),
+    }
+    results, timings, errors = {}, {}, {}
+
+    def run(name):
+        t = time.perf_counter()
+        try:
+            return tasks[name]()
+        finally:
+            timings[name] = round(time.perf_counter() - t, 3)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {name: pool.submit(run, name) for name in tasks}
+        for name, fut in futures.items():
+            try:
+                results[name] = fut.result()
+            except Exception as e:
+                print(f"[SNAPSHOT] {name} failed:", repr(e))
+                errors[name] = repr(e)
+                results[name] = _EMPTY[name]
+
+    return _make_snapshot(results, timings, errors, t0)
+
+
+async def abuild_snapshot(
+    tickers: list[str],
+    *,
+    upbit=None,
+    cache: TTLCache = SOURCE_CACHE,
+) -> MarketSnapshot:
+    """
+    build_snapshot의 asyncio 버전(같은 결과 형태).
+    - upbit: utils.upbit_async.AsyncUpbit
+    - 캔들/지표(get_prices)는 캔들 저장소(SQLite)를 쓰므로 스레드에서
+    """
+    from .upbit_async import aget_current_price
+
+    async def quotes():
+        if not tickers:
+            return {}
+        res = await aget_current_price(list(tickers))
+        return res if isinstance(res, dict) else {tickers[0]: float(res)}
+
+    async def balances():
+        return (await upbit.get_balances() or []) if upbit is not None else []
+
+    t0 = time.perf_counter()
+    tasks = {
+        "fng": lambda: cache.aget("fng"),
+        "news": lambda: cache.aget("news"),
+        "krw_markets": lambda: cache.aget("krw_markets"),
+        "balances": balances,
+        "prices": lambda: asyncio.to_thread(get_prices, tickers),
+        "quotes": quotes,
+    }
+    timings, errors = {}, {}
+
+    async def run(name):
+        t = time.perf_counter()
+        try:
+            return await tasks[name]()
+        except Exception as e:
+            print(f"[SNAPSHOT] {name} failed:", repr(e))
+            errors[name] = repr(e)
+            return _EMPTY[name]
+        finally:
+            timings[name] = round(time.perf_counter() - t, 3)
+
+    values = await asyncio.gather(*(run(name) for name in tasks))
+    return _make_snapshot(dict(zip(tasks, values)), timings, errors, t0)
+
+
+def _make_snapshot(results: dict, timings: dict, errors: dict, t0: float) -> MarketSnapshot:
+    return MarketSnapshot(
+        built_at=time.time(),
+        build_seconds=time.perf_counter() - t0,
+        fng=MappingProxyType(dict(results["fng"] or {})),
+        news=tuple(results["news"] or ()),
+        krw_markets=frozenset(results["krw_markets"] or ()),
+        balances=tuple(MappingProxyType(dict(b)) for b in results["balances"]),
+        prices=MappingProxyType(dict(results["prices"] or {})),
+        quotes=MappingProxyType(dict(results["quotes"] or {})),
+        timings=MappingProxyType(timings),
+        errors=MappingProxyType(errors),
+    )
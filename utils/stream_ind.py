@@ -0,0 +1,263 @@
+import math
+import os
+import threading
+from collections import deque
+
+import pandas as pd
+
+NAN = float("nan")
+
+INDICATOR_COLUMNS = [
+    "bb_bbm", "bb_bbh", "bb_bbl",
+    "rsi",
+    "macd", "macd_signal", "macd_diff",
+    "sma_20", "ema_12",
+]
+
+
+class _EWM:
+    """pandas ewm(adjust=False, min_periods=...) 점화식 그대로: y = (1 - a) * y + a * x"""
+
+    __slots__ = ("alpha", "min_periods", "value", "n")
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = NAN
+        self.n = 0
+
+    def update(self, x: float) -> float:
+        self.value = x if self.n == 0 else (1.0 - self.alpha) * self.value + self.alpha * x
+        self.n += 1
+        return self.value if self.n >= self.min_periods else NAN
+
+    def save(self) -> tuple:
+        return self.value, self.n
+
+    def restore(self, saved: tuple):
+        self.value, self.n = saved
+
+
+class _Rolling:
+    """
+    고정 윈도우 합/제곱합(rolling mean, std(ddof=0)).
+    - 값은 shift 기준 편차로 저장해서 큰 가격(BTC 1억원대)에서도 분산 정밀도 유지
+    - REANCHOR_EVERY번마다 윈도우 기준으로 합계를 다시 계산해 누적 오차 제거(상각 O(1))
+    - undo(): 마지막 push 1개 되돌리기(O(1), 진행 중 캔들 재계산용)
+    """
+
+    REANCHOR_EVERY = 1000
+
+    __slots__ = ("window", "q", "shift", "s", "ss", "updates", "_last")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.q = deque()
+        self.shift = None
+        self.s = 0.0
+        self.ss = 0.0
+        self.updates = 0
+        self._last = None   # (넣은 값, 밀려난 값 또는 None)
+
+    def push(self, x: float):
+        if self.shift is None:
+            self.shift = x
+        elif self.updates % self.REANCHOR_EVERY == 0:
+            # 새 값을 넣기 전에 재기준(직후 undo도 같은 기준에서 되돌림)
+            self.q = deque(d + self.shift - x for d in self.q)
+            self.shift = x
+            self.s = sum(self.q)
+            self.ss = sum(d * d for d in self.q)
+
+        d = x - self.shift
+        self.q.append(d)
+        self.s += d
+        self.ss += d * d
+        o = None
+        if len(self.q) > self.window:
+            o = self.q.popleft()
+            self.s -= o
+            self.ss -= o * o
+        self.updates += 1
+        self._last = (d, o)
+
+    def undo(self):
+        d, o = self._last
+        self._last = None
+        self.q.pop()
+        self.s -= d
+        self.ss -= d * d
+        if o is not None:
+            self.q.appendleft(o)
+            self.s += o
+            self.ss += o * o
+        self.updates -= 1
+
+    def mean(self) -> float:
+        n = len(self.q)
+        if n < self.window:
+            return NAN
+        return self.shift + self.s / n
+
+    def std(self) -> float:
+        n = len(self.q)
+        if n < self.window:
+            return NAN
+        m = self.s / n
+        return math.sqrt(max(self.ss / n - m * m, 0.0))
+
+
+
+class _State:
+    """캔들 1개 반영에 필요한 모든 누적 상태"""
+
+    def __init__(self, p: dict):
+        self.bb = _Rolling(p["bb_window"])
+        self.sma = _Rolling(p["sma_window"])
+        self.ema = _EWM(2.0 / (p["ema_window"] + 1), p["ema_window"])
+        self.macd_fast = _EWM(2.0 / (p["macd_fast"] + 1), p["macd_fast"])
+        self.macd_slow = _EWM(2.0 / (p["macd_slow"] + 1), p["macd_slow"])
+        self.macd_sign = _EWM(2.0 / (p["macd_sign"] + 1), p["macd_sign"])
+        self.rsi_up = _EWM(1.0 / p["rsi_window"], p["rsi_window"])
+        self.rsi_dn = _EWM(1.0 / p["rsi_window"], p["rsi_window"])
+        self.prev_close = None
+
+    def _ewms(self) -> tuple:
+        return self.ema, self.macd_fast, self.macd_slow, self.macd_sign, self.rsi_up, self.rsi_dn
+
+    def checkpoint(self) -> tuple:
+        """캔들 1개 반영 전 상태(스칼라만, O(1))"""
+        return tuple(e.save() for e in self._ewms()), self.prev_close
+
+    def rollback(self, cp: tuple):
+        """checkpoint 이후 반영한 캔들 1개 되돌리기"""
+        saved, self.prev_close = cp
+        for e, v in zip(self._ewms(), saved):
+            e.restore(v)
+        self.bb.undo()
+        self.sma.undo()
+
+
+class StreamingIndicators:
+    """
+    add_indicators()와 같은 지표(BB/RSI/MACD/SMA-20/EMA-12)를 캔들 1개당 O(1)로 갱신.
+    - 같은 캔들 시퀀스에 대해 ta 결과와 부동소수점 오차 이내로 일치
+    - 마지막 캔들(진행 중)은 같은 ts로 다시 update하면 그 캔들만 되돌리고 재계산(상태 복사 없음)
+    """
+
+    DEFAULTS = dict(
+        bb_window=20, bb_dev=2.0,
+        rsi_window=14,
+        macd_fast=12, macd_slow=26, macd_sign=9,
+        sma_window=20, ema_window=12,
+    )
+
+    def __init__(self, history: int = 500, **params):
+        self.params = {**self.DEFAULTS, **params}
+        self._state = _State(self.params)
+        self._before_last = None  # 마지막 캔들 반영 전 checkpoint(재계산용)
+        self.last_ts = None
+        self.history = deque(maxlen=history)  # [(ts, values), ...]
+
+    def update(self, ts, close: float) -> dict:
+        close = float(close)
+        if self.last_ts is not None and ts == self.last_ts:
+            self._state.rollback(self._before_last)
+            self.history.pop()
+        elif self.last_ts is not None and ts < self.last_ts:
+            raise ValueError(f"out-of-order candle: {ts} < {self.last_ts}")
+        self._before_last = self._state.checkpoint()
+
+        values = self._apply(close)
+        self.last_ts = ts
+        self.history.append((ts, values))
+        return values
+
+    def _apply(self, close: float) -> dict:
+        s, p = self._state, self.params
+
+        s.bb.push(close)
+        mavg, mstd = s.bb.mean(), s.bb.std()
+
+        # ta RSI: 첫 diff(NaN)는 up/down 모두 0.0으로 들어감
+        diff = 0.0 if s.prev_close is None else close - s.prev_close
+        s.prev_close = close
+        up = s.rsi_up.update(diff if diff > 0 else 0.0)
+        dn = s.rsi_dn.update(-diff if diff < 0 else 0.0)
+        if math.isnan(dn):
+            rsi = NAN
+        elif dn == 0:
+            rsi = 100.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + up / dn)
+
+        fast = s.macd_fast.update(close)
+        slow = s.macd_slow.update(close)
+        macd = fast - slow
+        # signal EMA는 macd가 처음 유효해진 시점부터 시작(pandas ewm의 leading NaN 처리와 동일)
+        signal = s.macd_sign.update(macd) if not math.isnan(macd) else NAN
+
+        s.sma.push(close)
+
+        return {
+            "bb_bbm": mavg,
+            "bb_bbh": mavg + p["bb_dev"] * mstd,
+            "bb_bbl": mavg - p["bb_dev"] * mstd,
+            "rsi": rsi,
+            "macd": macd,
+            "macd_signal": signal,
+            "macd_diff": macd - signal,
+            "sma_20": s.sma.mean(),
+            "ema_12": s.ema.update(close),
+        }
+
+
+class IndicatorEngine:
+    """
+    (ticker, interval)별 StreamingIndicators 레지스트리.
+    - apply(df): 직전 호출 이후 새로 닫힌/갱신된 캔들만 반영하고, add_indicators와 같은 컬럼을 붙여 반환
+    - 윈도우가 직전 상태와 겹치지 않으면(오래 호출 안 함) 해당 윈도우로 다시 시작
+    - 첫 호출 이후의 캔들 이력까지 이어서 계산하므로 EMA/MACD/RSI 값은 df 윈도우만으로 계산한
+      add_indicators(ta)와 다름(더 길게 수렴). 그래서 get_price/get_prices는 INDICATOR_STREAMING=1일 때만 사용
+    """
+
+    def __init__(self, **params):
+        self.params = params
+        self._streams: dict[tuple[str, str], StreamingIndicators] = {}
+        self._lock = threading.Lock()
+
+    def stream(self, ticker: str, interval: str) -> StreamingIndicators:
+        with self._lock:
+            key = (ticker, interval)
+            if key not in self._streams:
+                self._streams[key] = StreamingIndicators(**self.params)
+            return self._streams[key]
+
+    def reset(self, ticker: str, interval: str):
+        with self._lock:
+            self._streams.pop((ticker, interval), None)
+
+    def apply(self, ticker: str, interval: str, df: pd.DataFrame) -> pd.DataFrame:
+        st = self.stream(ticker, interval)
+
+        if st.last_ts is None or st.last_ts not in df.index:
+            self.reset(ticker, interval)
+            st = self.stream(ticker, interval)
+            new = df
+        else:
+            new = df.loc[df.index >= st.last_ts]
+
+        for ts, close in zip(new.index, new["close"]):
+            st.update(ts, close)
+
+        by_ts = dict(st.history)
+        out = df.copy()
+        for col in INDICATOR_COLUMNS:
+            out[col] = [by_ts.get(ts, {}).get(col, NAN) for ts in df.index]
+        return out
+
+
+INDICATOR_ENGINE = IndicatorEngine()
+
+# 1이면 get_price/get_prices가 스트리밍 엔진 사용(기본은 baseline과 같은 ta 윈도우 재계산)
+STREAMING_ENABLED = os.getenv("INDICATOR_STREAMING", "0") == "1"
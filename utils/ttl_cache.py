@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+@dataclass
+class _Source:
+    fetch: Callable[[], Any]
+    ttl: float
+    ttl_from: Optional[Callable[[Any], Optional[float]]] = None   # 값에서 TTL 꺼내기(FNG time_until_update 등)
+    refresh_ahead: float = 0.0                                      # 만료 전 이 비율(0~1)만큼 남으면 백그라운드 갱신
+    retry_after: float = 60.0                                       # 갱신 실패 시 stale 값 유지 후 재시도 간격
+    is_valid: Optional[Callable[[Any], bool]] = None                # False면 실패로 취급(에러 dict 반환형 API용)
+    min_ttl: float = 5.0
+    afetch: Optional[Callable[[], Awaitable[Any]]] = None           # aget()용 async 소스(없으면 fetch를 스레드에서)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fetched_at: float
+    expires_at: float
+    ttl: float
+
+
+class TTLCache:
+    """
+    소스별 TTL 캐시(Cooltime / next_*_at 변수 대체).
+    - register(key, fetch, ttl=...)로 소스 등록 후 get(key)
+    - ttl_from: 응답 값에서 TTL을 가져옴(없으면 ttl)
+    - refresh_ahead: 만료 직전에는 캐시 값을 바로 주고 백그라운드 스레드에서 미리 갱신
+    - stale-while-revalidate: 갱신이 실패하면 예전 값을 주고 retry_after 뒤 재시도(값이 아예 없으면 예외)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources: Dict[str, _Source] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._refreshing: set = set()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._async_locks: Dict[tuple, asyncio.Lock] = {}
+
+    def register(self, key: str, fetch: Callable[[], Any], ttl: float, **opts) -> "TTLCache":
+        with self._lock:
+            self._sources[key] = _Source(fetch=fetch, ttl=ttl, **opts)
+            self._key_locks.setdefault(key, threading.Lock())
+            self._stats.setdefault(key, {"hits": 0, "misses": 0, "stale": 0, "refreshes": 0, "errors": 0})
+        return self
+
+    def has_source(self, key: str) -> bool:
+        with self._lock:
+            return key in self._sources
+
+    def _count(self, key: str, name: str):
+        with self._lock:
+            self._stats[key][name] += 1
+
+    def _fetch(self, key: str) -> _Entry:
+        """소스 호출 → 새 entry 저장. 실패하면 예외"""
+        return self._store(key, self._sources[key].fetch())
+
+    def _store(self, key: str, value: Any) -> _Entry:
+        src = self._sources[key]
+        if src.is_valid is not None and not src.is_valid(value):
+            raise ValueError(f"invalid value from source {key!r}")
+
+        ttl = src.ttl
+        if src.ttl_from is not None:
+            try:
+                from_value = src.ttl_from(value)
+            except Exception:
+                from_value = None
+            if from_value is not None:
+                ttl = max(src.min_ttl, float(from_value))
+
+        now = time.time()
+        entry = _Entry(value=value, fetched_at=now, expires_at=now + ttl, ttl=ttl)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _refresh_in_background(self, key: str):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                with self._key_locks[key]:
+                    self._fetch(key)
+                self._count(key, "refreshes")
+            except Exception as e:
+                self._count(key, "errors")
+                print(f"[CACHE] background refresh failed ({key}):", repr(e))
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"cache-refresh-{key}", daemon=True).start()
+
+    def get(self, key: str, force: bool = False) -> Any:
+        src = self._sources[key]
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and not force and now < entry.expires_at:
+            self._count(key, "hits")
+            if src.refresh_ahead > 0 and entry.expires_at - now <= src.refresh_ahead * entry.ttl:
+                self._refresh_in_background(key)
+            return entry.value
+
+        # 같은 키를 여러 스레드가 동시에 갱신하지 않게
+        with self._key_locks[key]:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and not force and time.time() < entry.expires_at:
+                self._count(key, "hits")
+                return entry.value
+
+            self._count(key, "misses")
+            try:
+                return self._fetch(key).value
+            except Exception as e:
+                self._count(key, "errors")
+                if entry is None:
+                    raise
+                # ✅ stale-while-revalidate: 예전 값 유지, retry_after 뒤에 다시 시도
+                print(f"[CACHE] refresh failed ({key}) -> serve stale:", repr(e))
+                self._count(key, "stale")
+                with self._lock:
+                    entry.expires_at = time.time() + src.retry_after
+                return entry.value
+
+    async def aget(self, key: str, force: bool = False) -> Any:
+        """
+        get()의 asyncio 버전(같은 entry/통계 공유). 이벤트 루프를 막지 않음
+        - afetch가 있으면 await, 없으면 fetch를 스레드에서
+        - 같은 키는 루프 안에서 한 번만 갱신, 실패 시 stale 값
+        """
+        src = self._sources[key]
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and not force and time.time() < entry.expires_at:
+            self._count(key, "hits")
+            return entry.value
+
+        lock_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            alock = self._async_locks.setdefault(lock_key, asyncio.Lock())
+
+        async with alock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and not force and time.time() < entry.expires_at:
+                self._count(key, "hits")
+                return entry.value
+
+            self._count(key, "misses")
+            try:
+                value = await src.afetch() if src.afetch is not None else await asyncio.to_thread(src.fetch)
+                return self._store(key, value).value
+            except Exception as e:
+                self._count(key, "errors")
+                if entry is None:
+                    raise
+                print(f"[CACHE] refresh failed ({key}) -> serve stale:", repr(e))
+                self._count(key, "stale")
+                with self._lock:
+                    entry.expires_at = time.time() + src.retry_after
+                return entry.value
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None):
+        """외부에서 값 넣기(예: 시작 시 DB에 저장된 후보로 채워서 바로 재스캔 안 하게)"""
+        src = self._sources[key]
+        ttl = src.ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            self._entries[key] = _Entry(value=value, fetched_at=now, expires_at=now + ttl, ttl=ttl)
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        """갱신 없이 현재 값만(없으면 default)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return default if entry is None else entry.value
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            out = {}
+            for key, s in self._stats.items():
+                total = s["hits"] + s["misses"]
+                entry = self._entries.get(key)
+                out[key] = {
+                    **s,
+                    "hit_rate": (s["hits"] / total) if total else 0.0,
+                    "age_s": None if entry is None else round(now - entry.fetched_at, 1),
+                    "expires_in_s": None if entry is None else round(entry.expires_at - now, 1),
+                }
+            return out
+
+
+# 프로세스 공용(FNG/뉴스/마켓 목록/트랜스크립트/유동성 후보)
+SOURCE_CACHE = TTLCache()
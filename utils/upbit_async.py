@@ -0,0 +1,166 @@
+# utils/upbit_async.py
+import asyncio
+import hashlib
+import uuid
+from urllib.parse import urlencode
+
+import httpx
+import jwt
+
+from .aio_http import get_json, request
+from .rate_limit import UPBIT_EXCHANGE_LIMITER, UPBIT_QUOTATION_LIMITER
+
+SERVER_URL = "https://api.upbit.com/v1"
+
+# 취소된 주문 대기 뒤에 남은 확인 task(GC 방지)
+_background: set = set()
+
+
+# =========================================================
+# 시세(quotation) API — pyupbit.get_tickers / get_current_price / get_orderbook와 같은 반환 형태
+# =========================================================
+async def aget_tickers(fiat: str = "KRW") -> list[str]:
+    markets = await get_json(f"{SERVER_URL}/market/all", params={"isDetails": "false"},
+                             limiter=UPBIT_QUOTATION_LIMITER)
+    return [m["market"] for m in markets if m["market"].startswith(f"{fiat}-")]
+
+
+async def aget_current_price(ticker: str | list[str] = "KRW-BTC"):
+    """티커 1개면 float, 여러 개면 {ticker: price}(200개씩 나눠서 동시 조회)"""
+    if isinstance(ticker, str) or len(ticker) == 1:
+        t = ticker if isinstance(ticker, str) else ticker[0]
+        rows = await get_json(f"{SERVER_URL}/ticker", params={"markets": t}, limiter=UPBIT_QUOTATION_LIMITER)
+        return rows[0]["trade_price"]
+
+    chunks = [ticker[i:i + 200] for i in range(0, len(ticker), 200)]
+    results = await asyncio.gather(*(
+        get_json(f"{SERVER_URL}/ticker", params={"markets": ",".join(c)}, limiter=UPBIT_QUOTATION_LIMITER)
+        for c in chunks
+    ))
+    return {row["market"]: row["trade_price"] for rows in results for row in rows}
+
+
+async def aget_orderbook(ticker: str = "KRW-BTC") -> dict:
+    rows = await get_json(f"{SERVER_URL}/orderbook", params={"markets": ticker}, limiter=UPBIT_QUOTATION_LIMITER)
+    return rows[0]
+
+
+# =========================================================
+# 거래(exchange) API — pyupbit.Upbit과 같은 JWT 인증
+# =========================================================
+class AsyncUpbit:
+    """
+    pyupbit.Upbit의 asyncio 버전(매매 루프에서 쓰는 메서드만).
+    - 주문 실패 시 pyupbit처럼 None 반환(로그만)
+    """
+
+    def __init__(self, access: str, secret: str):
+        self.access = access
+        self.secret = secret
+
+    def _headers(self, query: dict | None = None) -> dict:
+        payload = {"access_key": self.access, "nonce": str(uuid.uuid4())}
+        if query is not None:
+            m = hashlib.sha512()
+            m.update(urlencode(query, doseq=True).replace("%5B%5D=", "[]=").encode())
+            payload["query_hash"] = m.hexdigest()
+            payload["query_hash_alg"] = "SHA512"
+        return {"Authorization": f"Bearer {jwt.encode(payload, self.secret, algorithm='HS256')}"}
+
+    async def get_balances(self) -> list[dict]:
+        return await get_json(f"{SERVER_URL}/accounts", headers=self._headers(), limiter=UPBIT_EXCHANGE_LIMITER)
+
+    async def get_balance(self, ticker: str = "KRW") -> float:
+        """주문 가능 수량(locked 제외). ticker는 KRW / BTC / KRW-BTC 모두 허용"""
+        currency = ticker.split("-")[-1]
+        for b in await self.get_balances():
+            if b.get("currency") == currency:
+                return float(b.get("balance") or 0.0)
+        return 0.0
+
+    async def get_order(self, identifier: str) -> dict | None:
+        """identifier로 주문 조회(없으면 None)"""
+        query = {"identifier": identifier}
+        try:
+            return await get_json(f"{SERVER_URL}/order", params=query, headers=self._headers(query),
+                                  limiter=UPBIT_EXCHANGE_LIMITER)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return None
+            raise
+
+    async def _order(self, data: dict):
+        """
+        주문은 멱등이 아니라서 취소/재전송하지 않음.
+        - 주문마다 identifier(uuid)를 붙이고, POST는 취소하지 않음(바깥 취소도 shield)
+        - 응답을 못 받으면(timeout/연결 끊김) 재전송 대신 identifier로 조회해서 실제 접수 여부 확인
+        - 기다리던 쪽이 취소되면(사이클/결정 timeout) POST는 끝까지 가고, 결과는 _after_cancel이 기록/확인
+        """
+        data = {**data, "identifier": str(uuid.uuid4())}
+        post = asyncio.ensure_future(request("POST", f"{SERVER_URL}/orders", json=data, headers=self._headers(data),
+                                             limiter=UPBIT_EXCHANGE_LIMITER, cancel=False))
+        try:
+            resp = await asyncio.shield(post)
+            return resp.json()
+        except asyncio.CancelledError:
+            print("[ORDER CANCELLED] waiter cancelled, order may still be placed:", data["identifier"])
+            post.add_done_callback(lambda fut: self._after_cancel(fut, data))
+            raise
+        except httpx.HTTPStatusError as e:
+            # 거래소가 거절한 주문(접수 안 됨)
+            print("[ORDER FAIL]", e.response.status_code, e.response.text)
+            return None
+        except Exception as e:
+            print("[ORDER UNKNOWN] -> check by identifier:", repr(e))
+            return await self._reconcile(data["identifier"])
+
+    def _after_cancel(self, fut: asyncio.Future, data: dict):
+        """취소된 주문 대기의 POST 결과 기록(응답이 없으면 identifier로 확인하는 task를 띄움)"""
+        if fut.cancelled():
+            return
+        e = fut.exception()
+        if e is None:
+            order = fut.result().json()
+            print("[ORDER AFTER CANCEL] placed:", data["market"], data["side"], order.get("uuid"), order)
+        elif isinstance(e, httpx.HTTPStatusError):
+            print("[ORDER AFTER CANCEL] rejected:", e.response.status_code, e.response.text)
+        else:
+            print("[ORDER AFTER CANCEL] unknown -> check by identifier:", repr(e))
+            task = asyncio.get_running_loop().create_task(self._reconcile(data["identifier"]))
+            # 이벤트 루프는 task를 약하게만 참조하므로 끝날 때까지 들고 있음
+            _background.add(task)
+            task.add_done_callback(_background.discard)
+
+    async def _reconcile(self, identifier: str, attempts: int = 3, delay: float = 1.0):
+        """응답을 못 받은 주문 확인: 접수됐으면 그 주문, attempts번 조회해도 없으면 None"""
+        for _ in range(attempts):
+            await asyncio.sleep(delay)
+            try:
+                order = await self.get_order(identifier)
+            except Exception as e:
+                print("[ORDER CHECK FAIL]", repr(e))
+                continue
+            if order is not None:
+                print("[ORDER RECONCILED]", identifier, order.get("uuid"))
+                return order
+        print("[ORDER NOT FOUND] treat as not placed:", identifier)
+        return None
+
+    async def buy_market_order(self, ticker: str, price: float):
+        return await self._order({"market": ticker, "side": "bid", "price": str(price), "ord_type": "price"})
+
+    async def sell_market_order(self, ticker: str, volume: float):
+        return await self._order({"market": ticker, "side": "ask", "volume": str(volume), "ord_type": "market"})
+
+
+if __name__ == "__main__":
+    async def main():
+        from .aio_http import aclose
+
+        tickers = (await aget_tickers())[:5]
+        print(tickers)
+        print(await aget_current_price(tickers))
+        print((await aget_orderbook(tickers[0]))["orderbook_units"][0])
+        await aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+# utils/valuation.py
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+import pyupbit
+
+
+@dataclass
+class Valuation:
+    """총자산 평가 결과. quote_age_s = 평가에 쓴 시세 중 가장 오래된 것의 나이(초)"""
+    krw_balance: float
+    total_equity: float
+    balances: list
+    quote_age_s: float = 0.0
+    priced: int = 0
+    unpriced: list = field(default_factory=list)    # 시세를 못 구해서 빠진 티커
+
+    def as_tuple(self) -> tuple[float, float, list]:
+        """calc_total_equity_krw 기존 반환 형태(krw_balance, total_equity, balances)"""
+        return self.krw_balance, self.total_equity, self.balances
+
+    def summary(self) -> dict:
+        return {
+            "total_equity": round(self.total_equity, 2),
+            "krw_balance": round(self.krw_balance, 2),
+            "priced": self.priced,
+            "quote_age_s": round(self.quote_age_s, 2),
+            "unpriced": self.unpriced,
+        }
+
+
+def holdings(balances: list, krw_markets: Optional[Iterable[str]] = None) -> tuple[float, dict]:
+    """balances → (KRW 잔고, {KRW-티커: 수량}). krw_markets를 주면 상장된 마켓만"""
+    markets = set(krw_markets) if krw_markets is not None else None
+    krw_balance = 0.0
+    qty_by_ticker = {}
+    for b in balances:
+        cur = b.get("currency")
+        qty = float(b.get("balance") or 0.0) + float(b.get("locked") or 0.0)
+        if cur == "KRW":
+            krw_balance = qty
+            continue
+        if not cur or qty <= 0:
+            continue
+        t = f"KRW-{cur}"
+        if markets is None or t in markets:
+            qty_by_ticker[t] = qty
+    return krw_balance, qty_by_ticker
+
+
+def _trade_price(ticker: str) -> float:
+    price = pyupbit.get_current_price(ticker)
+    if price is None:
+        raise ValueError(f"no quote for {ticker}")
+    return float(price)
+
+
+class QuoteCache:
+    """
+    짧은 TTL 시세 캐시(사이클 안에서 주문마다 하는 총자산 평가용).
+    - 시세는 전부 최근 체결가(trade_price) 하나로(일괄/개별 섞어도 같은 기준)
+    - 만료/없는 티커만 get_current_price(tickers) 1번으로 일괄 조회
+    - 일괄 조회에서 빠진 티커만 개별 get_current_price(ticker)로
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0):
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._quotes: dict[str, tuple[float, float]] = {}   # ticker -> (price, fetched_at)
+        self._stats = {"hits": 0, "batch_calls": 0, "batch_priced": 0, "fallbacks": 0, "misses": 0}
+
+    def put_many(self, prices: dict, at: Optional[float] = None):
+        at = time.time() if at is None else at
+        with self._lock:
+            for t, p in prices.items():
+                if p is not None:
+                    self._quotes[t] = (float(p), at)
+
+    def _fresh(self, tickers: list[str]) -> tuple[dict, list]:
+        now = time.time()
+        hit, miss = {}, []
+        with self._lock:
+            for t in tickers:
+                q = self._quotes.get(t)
+                if q is not None and now - q[1] < self.ttl:
+                    hit[t] = q
+                else:
+                    miss.append(t)
+            self._stats["hits"] += len(hit)
+        return hit, miss
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._stats[name] += n
+
+    def get_many(self, tickers: list[str]) -> dict[str, tuple[float, float]]:
+        """{ticker: (price, fetched_at)}. 끝까지 못 구한 티커는 결과에 없음"""
+        quotes, miss = self._fresh(list(dict.fromkeys(tickers)))
+        if miss:
+            try:
+                self._count("batch_calls")
+                res = pyupbit.get_current_price(miss if len(miss) > 1 else miss[0])
+                batch = res if isinstance(res, dict) else ({miss[0]: res} if res is not None else {})
+            except Exception as e:
+                print("[VALUATION] batch quote failed -> per-ticker:", repr(e))
+                batch = {}
+            self.put_many(batch)
+            self._count("batch_priced", len(batch))
+
+            for t in miss:
+                if batch.get(t) is None:
+                    try:
+                        self.put_many({t: _trade_price(t)})
+                        self._count("fallbacks")
+                    except Exception:
+                        self._count("misses")
+                        continue
+                with self._lock:
+                    quotes[t] = self._quotes[t]
+        return quotes
+
+    async def aget_many(self, tickers: list[str]) -> dict[str, tuple[float, float]]:
+        """get_many의 asyncio 버전(일괄 1번 + 빠진 티커만 개별 동시 조회)"""
+        from .upbit_async import aget_current_price
+
+        quotes, miss = self._fresh(list(dict.fromkeys(tickers)))
+        if not miss:
+            return quotes
+
+        try:
+            self._count("batch_calls")
+            res = await aget_current_price(miss)
+            batch = res if isinstance(res, dict) else {miss[0]: res}
+        except Exception as e:
+            print("[VALUATION] batch quote failed -> per-ticker:", repr(e))
+            batch = {}
+        self.put_many(batch)
+        self._count("batch_priced", len(batch))
+
+        rest = [t for t in miss if batch.get(t) is None]
+        prices = await asyncio.gather(*(aget_current_price(t) for t in rest), return_exceptions=True)
+        for t, p in zip(rest, prices):
+            if isinstance(p, Exception) or p is None:
+                self._count("misses")
+                continue
+            self.put_many({t: p})
+            self._count("fallbacks")
+
+        with self._lock:
+            for t in miss:
+                if t in self._quotes:
+                    quotes[t] = self._quotes[t]
+        return quotes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "cached": len(self._quotes)}
+
+
+def value_portfolio(balances: list, quotes: dict[str, tuple[float, float]],
+                    qty_by_ticker: dict, krw_balance: float) -> Valuation:
+    now = time.time()
+    total = float(krw_balance)
+    oldest = now
+    unpriced = []
+    for t, qty in qty_by_ticker.items():
+        q = quotes.get(t)
+        if q is None:
+            unpriced.append(t)
+            continue
+        total += qty * q[0]
+        oldest = min(oldest, q[1])
+    return Valuation(krw_balance=krw_balance, total_equity=total, balances=balances,
+                     quote_age_s=now - oldest, priced=len(qty_by_ticker) - len(unpriced),
+                     unpriced=unpriced)
+
+
+def valuate(balances: list, krw_markets: Optional[Iterable[str]] = None,
+            cache: Optional["QuoteCache"] = None) -> Valuation:
+    """보유 코인 전체를 일괄 시세 1번(+빠진 것만 개별)으로 평가"""
+    cache = cache or QUOTE_CACHE
+    krw_balance, qty_by_ticker = holdings(balances, krw_markets)
+    quotes = cache.get_many(list(qty_by_ticker))
+    return value_portfolio(balances, quotes, qty_by_ticker, krw_balance)
+
+
+async def avaluate(balances: list, krw_markets: Optional[Iterable[str]] = None,
+                   cache: Optional["QuoteCache"] = None) -> Valuation:
+    cache = cache or QUOTE_CACHE
+    krw_balance, qty_by_ticker = holdings(balances, krw_markets)
+    quotes = await cache.aget_many(list(qty_by_ticker))
+    return value_portfolio(balances, quotes, qty_by_ticker, krw_balance)
+
+
+# 프로세스 공용. 주문 직후 평가에도 쓰므로 TTL은 짧게
+# (사이클 시작 스냅샷 시세는 결정이 끝날 즈음이면 이미 만료라 미리 채우지 않음)
+QUOTE_CACHE = QuoteCache(ttl_seconds=float(os.getenv("QUOTE_TTL_SECONDS", "5")))